@@ -0,0 +1,42 @@
+"""
+Helpers shared by the benchmarks
+"""
+
+import concurrent.futures
+import time
+from typing import Any, Callable
+
+from nanopy.rpc import RPC
+
+
+class Canned(RPC):
+    "RPC client replying with a canned response"
+
+    def __init__(self, response: Any, validation: str = "full"):
+        self.validation = validation
+        self.response = response
+
+    def request(self, data: dict[str, Any]) -> Any:
+        return self.response
+
+
+def threaded(
+    fn: Callable[[], Any], requests: int, concurrency: int
+) -> tuple[float, list[float]]:
+    """Call fn requests times from a pool of threads
+
+    :arg fn: function making a request
+    :arg requests: number of calls
+    :arg concurrency: number of threads
+    :return: seconds taken and latency in ms of each call
+    """
+
+    def timed(_: int) -> float:
+        t0 = time.perf_counter()
+        fn()
+        return (time.perf_counter() - t0) * 1e3
+
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+        t0 = time.perf_counter()
+        latency = list(pool.map(timed, range(requests)))
+        return time.perf_counter() - t0, latency
@@ -0,0 +1,72 @@
+"""
+Throughput of AsyncHTTP versus HTTP on a thread pool against a local stub node
+
+``python benchmarks/rpc_async.py -n 5000 -c 16``
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import threading
+import time
+
+from nanopy.rpc import HTTP, AsyncHTTP
+
+BALANCE = {"balance": "1", "pending": "0", "receivable": "0"}
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    "Reply to every request on a keep-alive connection with an account balance"
+    body = json.dumps(BALANCE).encode()
+    head = f"HTTP/1.1 200 OK\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+    while await reader.readline():
+        length = 0
+        while (h := await reader.readline()).strip():
+            k, _, v = h.decode().partition(":")
+            if k.lower() == "content-length":
+                length = int(v)
+        await reader.readexactly(length)
+        writer.write(head + body)
+        await writer.drain()
+    writer.close()
+
+
+def serve() -> str:
+    "Start the stub node on a background event loop and return its URL"
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    server = asyncio.run_coroutine_threadsafe(
+        asyncio.start_server(handle, "127.0.0.1", 0), loop
+    ).result()
+    return f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+async def run_async(url: str, requests: int, concurrency: int) -> None:
+    "Make requests with AsyncHTTP"
+    async with AsyncHTTP(url, max_connections=concurrency) as rpc:
+        await asyncio.gather(*(rpc.account_balance("") for _ in range(requests)))
+
+
+def main() -> None:
+    "Print requests per second of both clients"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--requests", default=5000, type=int)
+    parser.add_argument("-c", "--concurrency", default=16, type=int)
+    args = parser.parse_args()
+
+    url = serve()
+    rpc = HTTP(url)
+    with concurrent.futures.ThreadPoolExecutor(args.concurrency) as pool:
+        t0 = time.perf_counter()
+        list(pool.map(lambda _: rpc.account_balance(""), range(args.requests)))
+        t = time.perf_counter() - t0
+    print(f"{'HTTP':<10} {args.requests / t:>10.0f} req/s")
+    t0 = time.perf_counter()
+    asyncio.run(run_async(url, args.requests, args.concurrency))
+    t = time.perf_counter() - t0
+    print(f"{'AsyncHTTP':<10} {args.requests / t:>10.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Blocks per second broadcast to a local stub node one at a time, concurrently
+across accounts and asynchronously
+
+``python benchmarks/rpc_broadcast.py -a 100 -b 20 -j 16 -l 5``
+"""
+
+import argparse
+import asyncio
+import os
+from typing import Any
+
+import nanopy as npy
+from nanopy.rpc import HTTP, Broadcaster
+from nanopy.stub import Stub
+
+
+def chains(accounts: int, length: int) -> list[npy.StateBlock]:
+    "Signed send blocks of several accounts, interleaved"
+    blocks = []
+    for _ in range(accounts):
+        a = npy.Account(sk=os.urandom(32).hex())
+        a.state = ("0" * 64, length, a)
+        blocks.append([a.send(a, 1, work="0" * 16) for _ in range(length)])
+    return [b for c in zip(*blocks) for b in c]
+
+
+def main() -> None:
+    "Print the blocks per second of each mode"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-a", "--accounts", default=100, type=int)
+    parser.add_argument("-b", "--blocks", default=20, type=int, help="per account")
+    parser.add_argument("-j", "--jobs", default=16, type=int)
+    parser.add_argument("-l", "--latency", default=5, type=float, help="node ms")
+    args = parser.parse_args()
+
+    async def handler(data: dict[str, Any]) -> Any:
+        if data["action"] == "blocks_info":
+            return {"blocks": {}, "blocks_not_found": []}
+        if data.get("async"):
+            return {"started": "1"}
+        await asyncio.sleep(args.latency / 1e3)
+        return {"hash": "0" * 64}
+
+    rpc = HTTP(f"http://127.0.0.1:{Stub(handler).start_thread()}")
+    blocks = chains(args.accounts, args.blocks)
+    print(f"{'mode':<8} {'blocks':>7} {'s':>8} {'blocks/s':>9}")
+    for name, jobs, async_ in (
+        ("serial", 1, False),
+        ("threads", args.jobs, False),
+        ("async", args.jobs, True),
+    ):
+        b = Broadcaster(rpc, jobs, async_)
+        assert not b.run(blocks)
+        print(f"{name:<8} {b.processed:>7} {b.seconds:>8.2f} {b.rate:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
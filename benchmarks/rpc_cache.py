@@ -0,0 +1,64 @@
+"""
+Time of repeated block_info lookups with and without a response cache against
+a local stub node
+
+``python benchmarks/rpc_cache.py -n 2000 -b 100 -l 1``
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import Any
+
+import nanopy as npy
+from nanopy.rpc import HTTP, Cache
+from nanopy.stub import Stub
+
+
+def block_infos(n: int) -> dict[str, Any]:
+    "block_info responses of n signed, confirmed blocks by hash"
+    acc = npy.Account(sk=os.urandom(32).hex())
+    base = {"block_account": acc.addr, "successor": "1" * 64, "subtype": "receive"}
+    base["confirmed"] = "true"
+    base |= dict.fromkeys(["amount", "height", "local_timestamp"], "0")
+    info = {}
+    for _ in range(n):
+        b = acc.receive(os.urandom(32).hex(), 1, work="0" * 16)
+        info[b.hash_] = base | {"balance": str(b.bal), "contents": b.dict_}
+    return info
+
+
+def main() -> None:
+    "Print the time per lookup, hit rate and bytes saved"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--lookups", default=2000, type=int)
+    parser.add_argument("-b", "--blocks", default=100, type=int)
+    parser.add_argument("-l", "--latency", default=1, type=float, help="node ms")
+    args = parser.parse_args()
+
+    info = block_infos(args.blocks)
+
+    async def handler(data: dict[str, Any]) -> Any:
+        await asyncio.sleep(args.latency / 1e3)
+        return info[data["hash"]]
+
+    url = f"http://127.0.0.1:{Stub(handler).start_thread()}"
+    hashes = random.choices(list(info), k=args.lookups)
+    print(f"{'cache':<6} {'us/lookup':>10} {'hit rate':>9} {'KiB saved':>10}")
+    for cache in (None, Cache()):
+        rpc = HTTP(url)
+        rpc.cache = cache
+        t0 = time.perf_counter()
+        for h in hashes:
+            rpc.block_info(h)
+        us = (time.perf_counter() - t0) / args.lookups * 1e6
+        name, rate, saved = "off", 0.0, 0
+        if cache is not None:
+            name, rate, saved = "on", cache.hit_rate, cache.bytes_saved
+        print(f"{name:<6} {us:>10.1f} {rate:>9.2f} {saved / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
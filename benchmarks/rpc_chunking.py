@@ -0,0 +1,63 @@
+"""
+Time of accounts_balances for 1k to 1M accounts in one request and in
+concurrent chunks against a local stub node
+
+``python benchmarks/rpc_chunking.py -m 1000000 -s 1000 -l 5``
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any
+
+from nanopy.rpc import HTTP, AsyncHTTP
+from nanopy.stub import Stub
+
+BALANCE = {"balance": "1", "pending": "0", "receivable": "0"}
+
+
+async def balances(url: str, accounts: list[str], chunk_size: int) -> Any:
+    "accounts_balances with AsyncHTTP"
+    async with AsyncHTTP(url) as rpc:
+        rpc.chunk_size = chunk_size
+        return await rpc.accounts_balances(accounts)
+
+
+def timed(url: str, client: str, accounts: list[str], chunk_size: int) -> float:
+    "Seconds taken by accounts_balances"
+    t0 = time.perf_counter()
+    if client == "async":
+        r = asyncio.run(balances(url, accounts, chunk_size))
+    else:
+        rpc = HTTP(url)
+        rpc.chunk_size = chunk_size if client == "threads" else 0
+        r = rpc.accounts_balances(accounts)
+    assert len(r["balances"]) == len(accounts)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    "Print the time per call for each number of accounts and client"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-m", "--max", default=1000000, type=int, help="accounts")
+    parser.add_argument("-s", "--chunk-size", default=1000, type=int)
+    parser.add_argument("-l", "--latency", default=5, type=float, help="node ms")
+    args = parser.parse_args()
+
+    async def handler(data: dict[str, Any]) -> Any:
+        await asyncio.sleep(args.latency / 1e3)
+        return {"balances": {a: BALANCE for a in data["accounts"]}}
+
+    url = f"http://127.0.0.1:{Stub(handler).start_thread()}"
+    accounts = [f"nano_{i:060d}" for i in range(args.max)]
+    print(f"{'accounts':>9} {'client':<8} {'ms':>10} {'accounts/s':>12}")
+    n = 1000
+    while n <= args.max:
+        for client in ("single", "threads", "async"):
+            t = timed(url, client, accounts[:n], args.chunk_size)
+            print(f"{n:>9} {client:<8} {t * 1e3:>10.1f} {n / t:>12.0f}")
+        n *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Requests reaching a local stub node when many threads ask for the balance of
+the same few accounts, with and without coalescing
+
+``python benchmarks/rpc_coalesce.py -n 2000 -c 32 -k 4 -l 5``
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import time
+from typing import Any
+
+import nanopy as npy
+from nanopy.rpc import HTTP, SingleFlight
+from nanopy.stub import Stub
+
+
+def main() -> None:
+    "Print the requests made and calls per second"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--calls", default=2000, type=int)
+    parser.add_argument("-c", "--concurrency", default=32, type=int)
+    parser.add_argument("-k", "--keys", default=4, type=int, help="hot accounts")
+    parser.add_argument("-l", "--latency", default=5, type=float, help="node ms")
+    args = parser.parse_args()
+
+    requests = 0
+
+    async def handler(_: dict[str, Any]) -> Any:
+        nonlocal requests
+        requests += 1
+        await asyncio.sleep(args.latency / 1e3)
+        return {"balance": "1", "pending": "0", "receivable": "0"}
+
+    url = f"http://127.0.0.1:{Stub(handler).start_thread()}"
+    accounts = [npy.Account(pk=f"{i:064x}").addr for i in range(args.keys)]
+    print(f"{'coalesce':<9} {'requests':>9} {'calls/s':>9}")
+    for coalesce in (None, SingleFlight()):
+        rpc = HTTP(url)
+        rpc.coalesce = coalesce
+        requests = 0
+        with concurrent.futures.ThreadPoolExecutor(args.concurrency) as pool:
+            t0 = time.perf_counter()
+            calls = (accounts[i % args.keys] for i in range(args.calls))
+            list(pool.map(rpc.account_balance, calls))
+            t = time.perf_counter() - t0
+        name = "off" if coalesce is None else "on"
+        print(f"{name:<9} {requests:>9} {args.calls / t:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Throughput and latency of many threads against a local stub node which slows
+down past a number of requests in flight, with and without a limiter
+
+``python benchmarks/rpc_limiter.py -n 2000 -c 64 -k 8 -l 5``
+"""
+
+import argparse
+import asyncio
+import statistics
+from typing import Any
+
+from common import threaded
+
+from nanopy.rpc import HTTP, Limiter
+from nanopy.stub import Stub
+
+
+def main() -> None:
+    "Print the requests per second, latency quantiles and final limit"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--requests", default=2000, type=int)
+    parser.add_argument("-c", "--concurrency", default=64, type=int)
+    parser.add_argument("-k", "--capacity", default=8, type=int, help="node")
+    parser.add_argument("-l", "--latency", default=5, type=float, help="node ms")
+    args = parser.parse_args()
+
+    in_flight = 0
+
+    async def handler(_: dict[str, Any]) -> Any:
+        nonlocal in_flight
+        in_flight += 1
+        excess = max(0, in_flight - args.capacity)
+        await asyncio.sleep(args.latency / 1e3 * (1 + excess))
+        in_flight -= 1
+        return {"count": "1", "unchecked": "0", "cemented": "1"}
+
+    url = f"http://127.0.0.1:{Stub(handler).start_thread()}"
+    print(f"{'limiter':<8} {'req/s':>8} {'median ms':>10} {'p99 ms':>10} {'limit':>6}")
+    target = args.latency / 1e3 * 4
+    for limiter in (None, Limiter(limit=args.capacity // 2, target=target)):
+        rpc = HTTP(url)
+        rpc.limiter = limiter
+        t, latency = threaded(rpc.block_count, args.requests, args.concurrency)
+        q = statistics.quantiles(latency, n=100)
+        name, limit = ("off", "") if limiter is None else ("on", f"{limiter.limit:.1f}")
+        print(
+            f"{name:<8} {args.requests / t:>8.0f} {statistics.median(latency):>10.2f}"
+            f" {q[-1]:>10.2f} {limit:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
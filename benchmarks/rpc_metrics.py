@@ -0,0 +1,43 @@
+"""
+Time per request against a local stub node without metrics and with the
+built-in recorder, and the time per recorded phase
+
+``python benchmarks/rpc_metrics.py -n 5000``
+"""
+
+import argparse
+import time
+
+from nanopy.rpc import HTTP, Metrics
+from nanopy.stub import Stub
+
+BLOCK_COUNT = {"count": "1", "unchecked": "0", "cemented": "1"}
+
+
+def main() -> None:
+    "Print the microseconds per request and per observation"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--requests", default=5000, type=int)
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{Stub(lambda _: BLOCK_COUNT).start_thread()}"
+    print(f"{'metrics':<8} {'us/request':>11}")
+    for metrics in (None, Metrics()):
+        rpc = HTTP(url)
+        rpc.metrics = metrics
+        rpc.block_count()
+        t0 = time.perf_counter()
+        for _ in range(args.requests):
+            rpc.block_count()
+        us = (time.perf_counter() - t0) / args.requests * 1e6
+        print(f"{'off' if metrics is None else 'on':<8} {us:>11.1f}")
+    m = Metrics()
+    t0 = time.perf_counter()
+    for i in range(args.requests * 10):
+        m.observe("block_count", "network", i * 1e-6, 64)
+    ns = (time.perf_counter() - t0) / args.requests / 10 * 1e9
+    print(f"observe: {ns:.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Latency of reads from a pool of local stub nodes, one of which stalls now and
+then, with and without hedging
+
+``python benchmarks/rpc_pool.py -n 500 -p 0.05 -s 200``
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Any
+
+from nanopy.rpc import Pool
+from nanopy.stub import Stub
+
+
+def main() -> None:
+    "Print latency quantiles and the number of hedged requests"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--requests", default=500, type=int)
+    parser.add_argument("-p", "--stall-rate", default=0.05, type=float)
+    parser.add_argument("-s", "--stall", default=200, type=float, help="stall ms")
+    args = parser.parse_args()
+
+    async def handler(_: dict[str, Any]) -> Any:
+        stall = random.random() < args.stall_rate
+        await asyncio.sleep((args.stall if stall else 1 + random.random()) / 1e3)
+        return {"count": "1", "unchecked": "0", "cemented": "1"}
+
+    urls = [f"http://127.0.0.1:{Stub(handler).start_thread()}" for _ in range(3)]
+    print(f"{'hedge':<6} {'median ms':>10} {'p99 ms':>10} {'max ms':>10} {'hedges':>7}")
+    for hedge in (False, True):
+        pool = Pool(urls, hedge=hedge)
+        pool.hedge_delay = 0.01
+        latency = []
+        for _ in range(args.requests):
+            t0 = time.perf_counter()
+            pool.block_count()
+            latency.append((time.perf_counter() - t0) * 1e3)
+        q = statistics.quantiles(latency, n=100)
+        print(
+            f"{'on' if hedge else 'off':<6} {statistics.median(latency):>10.2f}"
+            f" {q[-1]:>10.2f} {max(latency):>10.2f} {pool.hedges:>7}"
+        )
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
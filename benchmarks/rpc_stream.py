@@ -0,0 +1,56 @@
+"""
+Peak memory and time of a large ledger response parsed whole and streamed
+against a local stub node
+
+``python benchmarks/rpc_stream.py -n 200000``
+"""
+
+import argparse
+import multiprocessing
+import threading
+import time
+import tracemalloc
+from typing import Callable
+
+from nanopy.rpc import HTTP
+from nanopy.stub import Stub
+
+
+def measure(name: str, call: Callable[[], int]) -> None:
+    "Print the peak traced memory and time of a call"
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    n = call()
+    t = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:<8} {n:>9} {peak / 2**20:>10.1f} {t:>8.2f}")
+
+
+def serve(n: int, ports: "multiprocessing.Queue[int]") -> None:
+    "Serve a ledger of n accounts from a stub node, outside the measured process"
+    info = dict.fromkeys(["frontier", "open_block", "representative_block"], "0" * 64)
+    info |= {"balance": "1", "modified_timestamp": "0", "block_count": "1"}
+    accounts = {f"nano_{i:060d}": info for i in range(n)}
+    ports.put(Stub(lambda _: {"accounts": accounts}).start_thread())
+    threading.Event().wait()
+
+
+def main() -> None:
+    "Compare ledger with stream('ledger')"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--accounts", default=200000, type=int)
+    args = parser.parse_args()
+
+    ports: "multiprocessing.Queue[int]" = multiprocessing.Queue()
+    multiprocessing.Process(
+        target=serve, args=(args.accounts, ports), daemon=True
+    ).start()
+    rpc = HTTP(f"http://127.0.0.1:{ports.get()}")
+    print(f"{'mode':<8} {'accounts':>9} {'peak MiB':>10} {'s':>8}")
+    measure("whole", lambda: len(rpc.ledger("", args.accounts)["accounts"]))
+    measure("stream", lambda: sum(1 for _ in rpc.stream("ledger", "", args.accounts)))
+
+
+if __name__ == "__main__":
+    main()
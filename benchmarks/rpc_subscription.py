@@ -0,0 +1,60 @@
+"""
+Confirmations per second decoded by a Subscription to a local stub node
+watching many accounts, verifying signatures one at a time and in batches
+
+``python benchmarks/rpc_subscription.py -n 5000 -a 50000``
+"""
+
+import argparse
+import itertools
+import os
+import time
+from typing import Any
+
+import nanopy as npy
+from nanopy.rpc import Subscription
+from nanopy.stub import Stub
+
+
+def confirmations(n: int, to: list[npy.Account]) -> list[dict[str, Any]]:
+    "confirmations of n signed sends to the accounts"
+    payer = npy.Account(sk=os.urandom(32).hex())
+    payer.state = ("1" * 64, n, payer)
+    messages = []
+    for a in itertools.islice(itertools.cycle(to), n):
+        b = payer.send(a, 1, work="0" * 16)
+        block = b.dict_ | {"link_as_account": a.addr, "subtype": "send"}
+        message = {"account": payer.addr, "hash": b.hash_, "block": block}
+        messages.append({"topic": "confirmation", "message": message})
+    return messages
+
+
+def main() -> None:
+    "Print confirmations per second for each way of verifying"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--confirmations", default=5000, type=int)
+    parser.add_argument("-a", "--accounts", default=50000, type=int)
+    args = parser.parse_args()
+
+    stub = Stub(lambda data: {"ack": data["action"]})
+    url = f"ws://127.0.0.1:{stub.start_thread()}"
+    accounts = [npy.Account(pk=os.urandom(32).hex()) for _ in range(args.accounts)]
+    messages = confirmations(args.confirmations, accounts)
+
+    async def publish() -> None:
+        for m in messages:
+            await stub.publish(m)
+
+    print(f"{'verify':<8} {'batch':>6} {'confirmations/s':>16}")
+    for verify, batch in ((False, 1024), (True, 1), (True, 1024)):
+        with Subscription(url, (a.addr for a in accounts), verify, batch) as sub:
+            stub.call(publish())
+            time.sleep(1)
+            t0 = time.perf_counter()
+            n = sum(1 for _ in itertools.islice(sub, args.confirmations))
+            t = time.perf_counter() - t0
+        print(f"{str(verify):<8} {batch:>6} {n / t:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
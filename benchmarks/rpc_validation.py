@@ -0,0 +1,108 @@
+"""
+Response validation overhead of account_info and blocks_info
+
+``python benchmarks/rpc_validation.py -n 2000 -b 100``
+"""
+
+import argparse
+import os
+import time
+from typing import Any, Callable
+
+import jsonschema
+from common import Canned
+
+import nanopy as npy
+from nanopy.rpc import RPC
+
+
+class Uncached(Canned):
+    "Validate every response with jsonschema.validate like before caching"
+
+    def _validate(
+        self,
+        data: dict[str, Any],
+        r: Any,
+        schema: Callable[[], dict[str, Any]] | None = None,
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Any:
+        if schema:
+            jsonschema.validate(r, schema())
+        return super()._validate(data, r, None, check)
+
+
+class Cached(Canned):
+    "Validate every response with the cached jsonschema validator"
+
+    def _validate(
+        self,
+        data: dict[str, Any],
+        r: Any,
+        schema: Callable[[], dict[str, Any]] | None = None,
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Any:
+        if schema:
+            self._validator(data["action"], schema)[1].validate(r)
+        return super()._validate(data, r, None, check)
+
+
+def blocks_info(n: int) -> dict[str, Any]:
+    "A blocks_info response of n signed blocks"
+    acc = npy.Account(sk=os.urandom(32).hex())
+    blocks = {}
+    for _ in range(n):
+        b = acc.receive(os.urandom(32).hex(), 1, work="0" * 16)
+        blocks[b.hash_] = {
+            "block_account": acc.addr,
+            "amount": "1",
+            "balance": str(b.bal),
+            "height": "1",
+            "local_timestamp": "0",
+            "successor": "0" * 64,
+            "confirmed": "true",
+            "contents": b.dict_,
+            "subtype": "receive",
+        }
+    return {"blocks": blocks}
+
+
+def main() -> None:
+    "Print the mean time per call for each validation mode"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--calls", default=2000, type=int)
+    parser.add_argument("-b", "--blocks", default=100, type=int)
+    args = parser.parse_args()
+
+    info = {
+        "frontier": "0" * 64,
+        "open_block": "0" * 64,
+        "representative_block": "0" * 64,
+        "balance": "1",
+        "modified_timestamp": "0",
+        "block_count": "1",
+        "account_version": "2",
+        "confirmation_height": "1",
+        "confirmation_height_frontier": "0" * 64,
+        "representative": npy.Account(pk="0" * 64).addr,
+    }
+    binfo = blocks_info(args.blocks)
+    cases: list[tuple[str, int, Any, Callable[[RPC], Any]]] = [
+        ("account_info", args.calls, info, lambda r: r.account_info("")),
+        ("blocks_info", 20, binfo, lambda r: r.blocks_info(list(binfo["blocks"]))),
+    ]
+    print(f"{'action':<14} {'mode':<9} {'us/call':>10}")
+    for action, calls, response, call in cases:
+        clients: list[tuple[str, RPC]] = [("uncached", Uncached(response))]
+        clients += [("cached", Cached(response))]
+        clients += [(m, Canned(response, m)) for m in ("full", "sampled", "off")]
+        for mode, r in clients:
+            call(r)
+            t0 = time.perf_counter()
+            for _ in range(calls):
+                call(r)
+            us = (time.perf_counter() - t0) / calls * 1e6
+            print(f"{action:<14} {mode:<9} {us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Latency and throughput of WS and AsyncWS against a local WebSocket stub node
+
+``python benchmarks/rpc_ws.py -n 2000 -c 32 -l 5``
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any
+
+from common import threaded
+
+from nanopy.rpc import WS, AsyncWS
+from nanopy.stub import Stub
+
+
+def report(name: str, latency: list[float], seconds: float) -> None:
+    "Print latency quantiles and requests per second"
+    q = statistics.quantiles(latency, n=100)
+    rps = len(latency) / seconds
+    print(f"{name:<8} {statistics.median(latency):>10.2f} {q[-1]:>10.2f} {rps:>10.0f}")
+
+
+def run_threads(rpc: WS, requests: int, concurrency: int) -> None:
+    "Make requests with WS from a pool of threads"
+    seconds, latency = threaded(rpc.block_count, requests, concurrency)
+    report("serial" if concurrency == 1 else "threads", latency, seconds)
+
+
+async def run_async(rpc: AsyncWS, requests: int) -> None:
+    "Make concurrent requests with AsyncWS"
+
+    async def timed() -> float:
+        t0 = time.perf_counter()
+        await rpc.block_count()
+        return (time.perf_counter() - t0) * 1e3
+
+    t0 = time.perf_counter()
+    latency = await asyncio.gather(*(timed() for _ in range(requests)))
+    report("async", latency, time.perf_counter() - t0)
+
+
+def main() -> None:
+    "Compare one request in flight with multiplexed requests"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--requests", default=2000, type=int)
+    parser.add_argument("-c", "--concurrency", default=32, type=int)
+    parser.add_argument("-l", "--latency", default=5, type=float, help="node ms")
+    args = parser.parse_args()
+
+    async def handler(_: dict[str, Any]) -> Any:
+        await asyncio.sleep(args.latency / 1e3)
+        return {"count": "1", "unchecked": "0", "cemented": "1"}
+
+    url = f"ws://127.0.0.1:{Stub(handler).start_thread()}"
+    print(f"{'client':<8} {'median ms':>10} {'p99 ms':>10} {'req/s':>10}")
+    rpc = WS(url, max_in_flight=args.concurrency)
+    run_threads(rpc, args.requests // 10, 1)
+    run_threads(rpc, args.requests, args.concurrency)
+    rpc.close()
+    arpc = AsyncWS(url, max_in_flight=args.concurrency)
+    asyncio.run(run_async(arpc, args.requests))
+    arpc.close()
+
+
+if __name__ == "__main__":
+    main()
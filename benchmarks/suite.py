@@ -0,0 +1,204 @@
+"""
+Throughput of the primitives, bulk RPC parsing and send/receive flows against
+a local fake node, with warmup, statistics and JSON output to compare commits
+
+``python benchmarks/suite.py --low-difficulty -o new.json -c old.json``
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from typing import Any, Callable
+
+from common import Canned
+
+import nanopy as npy
+from nanopy.cli import Session
+from nanopy.rpc import HTTP
+from nanopy.stub import Node
+
+LOW = npy.Network(
+    send_difficulty="fff0000000000000", receive_difficulty="ffe0000000000000"
+)
+
+
+def run(fn: Callable[[], Any], number: int, repeat: int, warmup: int) -> list[float]:
+    """Seconds per call of fn in each of repeat rounds of number calls, after
+    warmup rounds that are not timed
+
+    :arg fn: function to time
+    :arg number: calls per round
+    :arg repeat: timed rounds
+    :arg warmup: untimed rounds
+    :return: seconds per call of each timed round
+    """
+    samples = []
+    for i in range(warmup + repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if i >= warmup:
+            samples.append((time.perf_counter() - t0) / number)
+    return samples
+
+
+def stats(samples: list[float], number: int) -> dict[str, Any]:
+    "Summary of the seconds per call of the rounds"
+    median = statistics.median(samples)
+    return {
+        "number": number,
+        "rounds": len(samples),
+        "median": median,
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "min": min(samples),
+        "max": max(samples),
+        "ops": 1 / median if median else 0.0,
+    }
+
+
+def primitives(n: int) -> dict[str, tuple[Callable[[], Any], int]]:
+    "Cases of the key, address, hash, signature and work primitives"
+    net = npy.Account.network
+    acc = npy.Account(sk=os.urandom(32).hex())
+    acc.state = ("1" * 64, 1 << 100, acc)
+    b = acc.send(acc, 1, work="0" * 16)
+    b.work_generate(net.send_difficulty)
+    blocks = [acc.send(acc, 1, work="0" * 16) for _ in range(100)]
+    seed = os.urandom(32).hex()
+    return {
+        "deterministic_key": (lambda: npy.deterministic_key(seed, 1), n),
+        "network.from_pk": (lambda: net.from_pk(acc.pk), n),
+        "network.to_pk": (lambda: net.to_pk(acc.addr), n),
+        "block.hash_": (lambda: b.hash_, n),
+        "block.sign": (lambda: acc.send(acc, 1, work="0" * 16), n // 10),
+        "block.verify_signature": (b.verify_signature, n // 10),
+        "verify_signatures/100": (lambda: npy.verify_signatures(blocks), n // 100),
+        "block.work_validate": (lambda: b.work_validate(net.send_difficulty), n),
+        "block.work_generate/send": (
+            lambda: b.work_generate(net.send_difficulty),
+            max(1, n // 1000),
+        ),
+    }
+
+
+def parsing(n: int, url: str, node: Node) -> dict[str, tuple[Callable[[], Any], int]]:
+    "Cases of schema and block validation of canned and served responses"
+    g, work = node.genesis, node.work
+    node.work = False
+    acc = npy.Account(sk=os.urandom(32).hex())
+    for _ in range(100):
+        b = g.send(acc, 1, work="0" * 16)
+        node.call(node.request({"action": "process", "block": b.dict_}))
+    hashes = list(node.blocks)[-100:]
+    accounts = [npy.Account(pk=f"{i:064x}").addr for i in range(1000)] + [acc.addr]
+    rpc = HTTP(url)
+    info = rpc.account_info(g.addr, representative=True)
+    binfo = rpc.blocks_info(hashes)
+    canned, bcanned = Canned(info), Canned(binfo)
+    node.work = work
+    return {
+        "validate.account_info": (lambda: canned.account_info(g.addr), n // 10),
+        "validate.blocks_info/100": (lambda: bcanned.blocks_info(hashes), n // 1000),
+        "rpc.blocks_info/100": (lambda: rpc.blocks_info(hashes), n // 1000),
+        "rpc.accounts_balances/1000": (
+            lambda: rpc.accounts_balances(accounts),
+            n // 1000,
+        ),
+    }
+
+
+def flows(n: int, url: str, node: Node) -> dict[str, tuple[Callable[[], Any], int]]:
+    "Cases of a send and its receive, with work, broadcast to the node like the cli"
+    g = node.genesis
+    acc = npy.Account(sk=os.urandom(32).hex())
+    s = Session(HTTP(url))
+
+    def send_receive() -> None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            h = s.process(s.send(g, acc, "0.000001"))
+            s.process(s.receive(acc, h))
+
+    return {"flow.send_receive": (send_receive, max(1, n // 1000))}
+
+
+def compare(results: dict[str, Any], path: str) -> None:
+    "Print the change of the median of each case from a previous JSON output"
+    with open(path, encoding="utf-8") as f:
+        base = json.load(f)["results"]
+    print(f"\n{'case':<28} {'base us':>12} {'us':>12} {'change':>8}")
+    for name, r in results.items():
+        if name in base:
+            b, m = base[name]["median"] * 1e6, r["median"] * 1e6
+            print(f"{name:<28} {b:>12.2f} {m:>12.2f} {(m / b - 1) * 100:>+7.1f}%")
+
+
+def commit() -> str:
+    "Current git commit, empty outside a work tree"
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def main() -> None:
+    "Print the statistics of each case and optionally write and compare JSON"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", default=10000, type=int, help="scale")
+    parser.add_argument("-r", "--repeat", default=5, type=int, help="timed rounds")
+    parser.add_argument("-w", "--warmup", default=1, type=int, help="untimed rounds")
+    parser.add_argument("-k", "--filter", default="", help="run cases containing")
+    parser.add_argument("-o", "--output", default="", help="JSON file to write")
+    parser.add_argument("-c", "--compare", default="", help="JSON file to compare")
+    parser.add_argument(
+        "--low-difficulty", action="store_true", help="cheap work for CI"
+    )
+    args = parser.parse_args()
+
+    if args.low_difficulty:
+        npy.Account.set_network(LOW)
+    node = Node()
+    url = f"http://127.0.0.1:{node.start_thread()}"
+    cases = primitives(args.number)
+    cases |= parsing(args.number, url, node)
+    cases |= flows(args.number, url, node)
+    results = {}
+    print(f"{'case':<28} {'median us':>12} {'stdev us':>10} {'ops/s':>10}")
+    for name, (fn, number) in cases.items():
+        if args.filter not in name:
+            continue
+        number = max(1, number)
+        r = stats(run(fn, number, args.repeat, args.warmup), number)
+        results[name] = r
+        us, sd = r["median"] * 1e6, r["stdev"] * 1e6
+        print(f"{name:<28} {us:>12.2f} {sd:>10.2f} {r['ops']:>10.0f}")
+    node.call(node.stop())
+    if args.output:
+        meta = {
+            "commit": commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "network": dataclasses.asdict(npy.Account.network),
+            "args": vars(args),
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(meta | {"results": results}, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
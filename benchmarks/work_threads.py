@@ -0,0 +1,41 @@
+"""
+Solve latency versus the number of work generation threads
+
+``python benchmarks/work_threads.py -d fffff00000000000 -n 50``
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import nanopy as npy
+from nanopy import ext  # type: ignore
+
+
+def main() -> None:
+    "Print solve latency and hashrate for 1 to N threads"
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-d", "--difficulty", default="fffff80000000000", type=str)
+    parser.add_argument("-n", "--solves", default=20, type=int)
+    parser.add_argument("-t", "--threads", default=os.cpu_count() or 1, type=int)
+    args = parser.parse_args()
+
+    difficulty = int(args.difficulty, 16)
+    print(f"{'threads':>7} {'median ms':>10} {'p90 ms':>10} {'MH/s':>8}")
+    for t in range(1, args.threads + 1):
+        npy.work_config(threads=t)
+        ext.stats(True)
+        latency = []
+        for _ in range(args.solves):
+            t0 = time.perf_counter()
+            ext.work_generate(os.urandom(32), difficulty, os.urandom(128))
+            latency.append((time.perf_counter() - t0) * 1e3)
+        q = statistics.quantiles(latency, n=10)
+        mhs = ext.stats()["hashrate"] / 1e6
+        print(f"{t:>7} {statistics.median(latency):>10.2f} {q[-1]:>10.2f} {mhs:>8.2f}")
+    npy.work_config()
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,8 @@ BLAKE2B_SRC = BLAKE2B_DIR + "/blake2b.c"
 e = setuptools.Extension("nanopy.ext", ["src/nanopy/ext.c", BLAKE2B_SRC, ED25519_SRC])
 e.define_macros += ED25519_IMPL
 e.extra_compile_args += ARCH_FLAG
+if k == "Windows":
+    e.extra_compile_args += ["/std:c11", "/experimental:c11atomics"]
 e.include_dirs += [BLAKE2B_DIR, ED25519_DIR]
 
 o = {}
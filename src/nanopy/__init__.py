@@ -3,14 +3,17 @@ nanopy
 ######
 """
 
+import array
 import base64
 import dataclasses
 import decimal
+import fractions
 import hashlib
 import hmac
 import json
+import math
 import os
-from typing import Optional
+from typing import Any, Iterable, Optional
 
 import mnemonic
 
@@ -19,6 +22,65 @@ from . import ext  # type: ignore
 decimal.getcontext().prec = 40
 
 
+def _parse_cpus(cpus: str) -> list[int]:
+    """Parse a CPU list like 0-3,6
+
+    :arg cpus: comma separated CPU ids or ranges
+    :return: CPU ids
+    """
+    r: list[int] = []
+    for c in filter(None, cpus.split(",")):
+        lo, _, hi = c.partition("-")
+        r.extend(range(int(lo), int(hi or lo) + 1))
+    return r
+
+
+def _cpu_count() -> int:
+    """Number of CPUs available to this process, limited by its cgroup CPU quota
+
+    :return: CPU count
+    """
+    try:
+        n = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover
+        n = os.cpu_count() or 1
+    cg = "/sys/fs/cgroup/"
+    for q, p in [("cpu.max", ""), ("cpu/cpu.cfs_quota_us", "cpu/cpu.cfs_period_us")]:
+        try:
+            with open(cg + q, encoding="ascii") as f:
+                v = f.read().split()
+            if p:
+                with open(cg + p, encoding="ascii") as f:
+                    v.append(f.read())
+            if int(v[0]) > 0:
+                return max(1, min(n, math.ceil(int(v[0]) / int(v[1]))))
+        except (OSError, ValueError):
+            pass
+    return n
+
+
+def work_config(
+    threads: int = 0, cpus: Iterable[int] | None = None, nice: int | None = None
+) -> None:
+    """Configure the CPU threads used for work generation. Unset arguments are
+    read from the environment variables ``NANOPY_WORK_THREADS``,
+    ``NANOPY_WORK_CPUS`` (e.g. ``0-3,6``) and ``NANOPY_WORK_NICE``.
+
+    :arg threads: number of threads, defaults to the CPUs available to the process
+    :arg cpus: CPU ids to pin the threads to, all CPUs if empty
+    :arg nice: niceness of the threads, [-20, 19]
+    """
+    env = os.environ
+    c = list(cpus) if cpus is not None else _parse_cpus(env.get("NANOPY_WORK_CPUS", ""))
+    threads = threads or int(env.get("NANOPY_WORK_THREADS", "0"))
+    threads = threads or (min(len(c), _cpu_count()) if c else _cpu_count())
+    nice = nice if nice is not None else int(env.get("NANOPY_WORK_NICE", "0"))
+    ext.work_config(threads, c, nice)
+
+
+work_config()
+
+
 def deterministic_key(seed: str, i: int = 0) -> str:
     """Derive deterministic private key from seed based on index i
 
@@ -70,6 +132,23 @@ def mnemonic_key(
     return sk.hex()
 
 
+def verify_signatures(blocks: Iterable["StateBlock"]) -> list[bool]:
+    """Verify the signatures of blocks in batches, faster than one at a time
+    when most are valid
+
+    :arg blocks: state blocks
+    :return: True for each block with a valid signature, False otherwise
+    """
+    blocks = list(blocks)
+    v = ext.verify_signature_many(
+        b"".join(bytes.fromhex(b.sig) for b in blocks),
+        b"".join(bytes.fromhex(b.acc.pk) for b in blocks),
+        b"".join(bytes.fromhex(b.hash_) for b in blocks),
+        os.urandom(16 * len(blocks)),
+    )
+    return [bool(x) for x in v]
+
+
 @dataclasses.dataclass
 class Network:  # pylint: disable=too-many-instance-attributes
     """Network
@@ -93,26 +172,41 @@ class Network:  # pylint: disable=too-many-instance-attributes
     rpc_url: str = "http://localhost:7076"
     std_unit: str = "Ӿ"
 
-    def from_multiplier(self, multiplier: float) -> str:
+    def from_multiplier(
+        self, multiplier: float | fractions.Fraction, base: str = ""
+    ) -> str:
         """Get difficulty from multiplier
 
-        :arg multiplier: positive number
+        :arg multiplier: positive finite number
+        :arg base: 16 hex char base difficulty, defaults to difficulty
         :return: 16 hex char difficulty
         """
-        d = int((int(self.difficulty, 16) - (1 << 64)) / multiplier + (1 << 64))
+        if isinstance(multiplier, float) and not math.isfinite(multiplier):
+            raise ValueError("Multiplier should be positive")
+        m = fractions.Fraction(multiplier)
+        if m <= 0:
+            raise ValueError("Multiplier should be positive")
+        r = (
+            ((1 << 64) - int(base or self.difficulty, 16))
+            * m.denominator
+            // m.numerator
+        )
+        d = (1 << 64) - r if 0 < r < 1 << 64 else 0 if r else (1 << 64) - 1
         return f"{d:016x}"
 
-    def to_multiplier(self, difficulty: str) -> float:
+    def to_multiplier(self, difficulty: str, base: str = "") -> fractions.Fraction:
         """Get multiplier from difficulty
 
         :arg difficulty: 16 hex char difficulty
-        :return: multiplier
+        :arg base: 16 hex char base difficulty, defaults to difficulty
+        :return: exact multiplier, which :meth:`from_multiplier` maps back to
+          difficulty
         """
         if len(difficulty) != 16:
             raise ValueError("Difficulty should be 16 hex char")
-        base_d = (1 << 64) - int(self.difficulty, 16)
+        base_d = (1 << 64) - int(base or self.difficulty, 16)
         d = (1 << 64) - int(difficulty, 16)
-        return base_d / d
+        return fractions.Fraction(base_d, d)
 
     def from_pk(self, pk: str) -> str:
         """Get account address from public key
@@ -309,11 +403,17 @@ class Account:  # pylint: disable=too-many-instance-attributes
         self.raw_bal = value[1]
         self.rep = value[2]
 
-    def change_rep(self, rep: "Account", work: str = "") -> "StateBlock":
+    def change_rep(
+        self,
+        rep: "Account",
+        work: str = "",
+        multiplier: float | fractions.Fraction = 0,
+    ) -> "StateBlock":
         """Construct a signed change StateBlock with work
 
         :arg rep: representative account
         :arg work: 16 hex char work for the block
+        :arg multiplier: positive number, scales the network send/receive difficulty
         :return: a signed change StateBlock
         """
         b = StateBlock(self, rep, self.raw_bal, self.frontier, "0" * 64)
@@ -322,13 +422,18 @@ class Account:  # pylint: disable=too-many-instance-attributes
             assert len(bytes.fromhex(work)) == 8
             b.work = work
         else:
-            b.work_generate(self.network.send_difficulty)
+            b.work_generate(self.network.send_difficulty, multiplier)
         self.frontier = b.hash_
         self.rep = b.rep
         return b
 
-    def receive(
-        self, hash_: str, raw_amt: int, rep: Optional["Account"] = None, work: str = ""
+    def receive(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        hash_: str,
+        raw_amt: int,
+        rep: Optional["Account"] = None,
+        work: str = "",
+        multiplier: float | fractions.Fraction = 0,
     ) -> "StateBlock":
         """Construct a signed receive StateBlock with work
 
@@ -336,6 +441,7 @@ class Account:  # pylint: disable=too-many-instance-attributes
         :arg raw_amt: raw amount to receive
         :arg rep: representative account
         :arg work: 16 hex char work for the block
+        :arg multiplier: positive number, scales the network send/receive difficulty
         :return: a signed receive StateBlock
         """
         assert len(bytes.fromhex(hash_)) == 32
@@ -351,18 +457,19 @@ class Account:  # pylint: disable=too-many-instance-attributes
             assert len(bytes.fromhex(work)) == 8
             b.work = work
         else:
-            b.work_generate(self.network.receive_difficulty)
+            b.work_generate(self.network.receive_difficulty, multiplier)
         self.frontier = b.hash_
         self.raw_bal = b.bal
         self.rep = b.rep
         return b
 
-    def send(
+    def send(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
         to: "Account",
         raw_amt: int,
         rep: Optional["Account"] = None,
         work: str = "",
+        multiplier: float | fractions.Fraction = 0,
     ) -> "StateBlock":
         """Construct a signed send StateBlock with work
 
@@ -370,6 +477,7 @@ class Account:  # pylint: disable=too-many-instance-attributes
         :arg raw_amt: raw amount to send
         :arg rep: representative account
         :arg work: 16 hex char work for the block
+        :arg multiplier: positive number, scales the network send/receive difficulty
         :return: a signed send StateBlock
         """
         if not isinstance(raw_amt, int) or raw_amt <= 0:
@@ -384,12 +492,51 @@ class Account:  # pylint: disable=too-many-instance-attributes
             assert len(bytes.fromhex(work)) == 8
             b.work = work
         else:
-            b.work_generate(self.network.send_difficulty)
+            b.work_generate(self.network.send_difficulty, multiplier)
         self.frontier = b.hash_
         self.raw_bal = b.bal
         self.rep = b.rep
         return b
 
+    def chain(
+        self,
+        ops: Iterable[tuple[Any, ...]],
+        multiplier: float | fractions.Fraction = 0,
+    ) -> list["StateBlock"]:
+        """Construct a chain of signed StateBlocks and compute their work in
+        parallel. Every block is built and signed first since its work root is
+        the hash of the previous block.
+
+        :arg ops: operations as tuples of method name and its arguments, e.g.
+          ``("send", to, raw_amt)``, ``("receive", hash_, raw_amt, rep)`` or
+          ``("change_rep", rep)``
+        :arg multiplier: positive number, scales the network send/receive difficulty
+        :return: signed StateBlocks with work, in order
+        """
+        state = self.state
+        blocks, difficulties = [], []
+        try:
+            for op, *args in ops:
+                if op not in ("change_rep", "receive", "send"):
+                    raise ValueError(f"Unknown operation: {op}")
+                blocks.append(getattr(self, op)(*args, work="0" * 16))
+                n = self.network
+                d = n.receive_difficulty if op == "receive" else n.send_difficulty
+                if multiplier:
+                    d = self.network.from_multiplier(multiplier, d)
+                difficulties.append(int(d, 16))
+            works, _ = ext.work_generate_many(
+                b"".join(bytes.fromhex(b.prev) for b in blocks),
+                array.array("Q", difficulties).tobytes(),
+                os.urandom(128),
+            )
+            for b, w in zip(blocks, array.array("Q", works)):
+                b.work = f"{w:016x}"
+        except BaseException:
+            self.state = state
+            raise
+        return blocks
+
     def _sign(self, b: "StateBlock") -> None:
         """Sign a block
 
@@ -443,6 +590,23 @@ class StateBlock:
             "signature": self.sig,
         }
 
+    @classmethod
+    def from_dict(cls, block: dict[str, str]) -> "StateBlock":
+        """Block from a dict like :attr:`dict_`, e.g. a JSON block of the RPC
+
+        :arg block: block as dict
+        :return: the block
+        """
+        return cls(
+            Account(block["account"]),
+            Account(block["representative"]),
+            int(block["balance"]),
+            block["previous"],
+            block["link"],
+            block["signature"],
+            block["work"],
+        )
+
     def verify_signature(self) -> bool:
         """Verify signature for block
 
@@ -453,23 +617,40 @@ class StateBlock:
         h = bytes.fromhex(self.hash_)
         return bool(ext.verify_signature(s, p, h))
 
-    def work_generate(self, difficulty: str) -> None:
+    @property
+    def difficulty(self) -> str:
+        "16 hex char difficulty of the block work"
+        w = ext.work_difficulty(int(self.work, 16), bytes.fromhex(self.prev))
+        return f"{w:016x}"
+
+    def work_generate(
+        self, difficulty: str, multiplier: float | fractions.Fraction = 0
+    ) -> tuple[str, fractions.Fraction]:
         """Compute work
 
         :arg difficulty: 16 hex char difficulty
+        :arg multiplier: positive number, scales difficulty
+        :return: achieved difficulty and its multiplier relative to difficulty
         """
         assert len(bytes.fromhex(difficulty)) == 8
-        w = ext.work_generate(
-            bytes.fromhex(self.prev), int(difficulty, 16), os.urandom(128)
+        n = self.acc.network
+        target = n.from_multiplier(multiplier, difficulty) if multiplier else difficulty
+        w, d = ext.work_generate(
+            bytes.fromhex(self.prev), int(target, 16), os.urandom(128)
         )
         self.work = f"{w:016x}"
+        return f"{d:016x}", n.to_multiplier(f"{d:016x}", difficulty)
 
-    def work_validate(self, difficulty: str) -> bool:
+    def work_validate(
+        self, difficulty: str, multiplier: float | fractions.Fraction = 0
+    ) -> bool:
         """Check whether block has a valid work.
 
         :arg difficulty: 16 hex char difficulty
-        :arg multiplier: positive number, overrides difficulty
+        :arg multiplier: positive number, scales difficulty
         """
         assert len(bytes.fromhex(difficulty)) == 8
+        if multiplier:
+            difficulty = self.acc.network.from_multiplier(multiplier, difficulty)
         h = bytes.fromhex(self.prev)
         return bool(ext.work_validate(int(self.work, 16), h, int(difficulty, 16)))
@@ -1,7 +1,9 @@
 # pylint: disable=missing-module-docstring,missing-class-docstring,missing-function-docstring
 import argparse
+import concurrent.futures
 import configparser
 import getpass
+import json
 import os
 from typing import Callable
 
@@ -9,27 +11,58 @@ import platformdirs
 import pykeepass  # type: ignore
 
 from . import Account, StateBlock, deterministic_key
-from .rpc import HTTP
+from .rpc import HTTP, RPC, Broadcaster, Pool, Response, Tracker
+
+
+def connect(url: str) -> RPC:
+    urls = url.replace(",", " ").split()
+    return Pool(urls) if len(urls) > 1 else HTTP(url=url)
 
 
 class Session:
 
-    def __init__(self, rpc: "HTTP"):
+    def __init__(self, rpc: RPC):
         self.rpc = rpc
+        self.tracker: Tracker | None = None
+        self.confirmations: list[concurrent.futures.Future[str]] = []
+
+    def process(self, b: StateBlock) -> str:
+        if not self.tracker:
+            return str(self.rpc.process(b.dict_)["hash"])
+        self.confirmations.append(self.tracker.process(b))
+        return b.hash_
+
+    def wait(self) -> None:
+        if not self.tracker:
+            return
+        try:
+            for f in self.confirmations:
+                print(f"Confirmed {f.result()}")
+        finally:
+            self.tracker.close()
+
+    def broadcast(self, f: str, concurrency: int = 16, async_: bool = False) -> None:
+        with open(f, encoding="utf-8") as blocks:
+            bs = [
+                StateBlock.from_dict(b)
+                for b in map(json.loads, filter(str.strip, blocks))
+            ]
+        bc = Broadcaster(self.rpc, concurrency, async_)
+        for h, e in bc.run(bs).items():
+            print(f"{h} {e}")
+        print(f"Sent: {bc.processed}/{len(bs)} in {bc.seconds:.2f} s ({bc.rate:.0f}/s)")
 
     def check_status(self, accounts: list[str]) -> None:
         if not accounts:
             return
         n = Account.network
-        info = self.rpc.accounts_balances(accounts)
+        info = Response(self.rpc.accounts_balances(accounts))
         for account in accounts:
-            accinfo = info["balances"][account]
+            accinfo = info.balances[account]
             print(f"Acc : {account}")
-            print(f"Bal : {n.from_raw(int(accinfo['balance'])):>40} {n.std_unit}")
-            if int(accinfo["receivable"]) > 0:
-                print(
-                    f"Rec : {n.from_raw(int(accinfo['receivable'])):>40} {n.std_unit}"
-                )
+            print(f"Bal : {n.from_raw(accinfo.balance):>40} {n.std_unit}")
+            if accinfo.receivable > 0:
+                print(f"Rec : {n.from_raw(accinfo.receivable):>40} {n.std_unit}")
 
     def create_new_key(self, f: str, k: str, g: str = "") -> None:
         acc = Account()
@@ -61,13 +94,9 @@ class Session:
         return addresses
 
     def get_account_info(self, acc: Account) -> None:
-        info = self.rpc.account_info(acc.addr, representative=True)
+        info = Response(self.rpc.account_info(acc.addr, representative=True))
         if "frontier" in info:
-            acc.state = (
-                info["frontier"],
-                int(info["balance"]),
-                Account(addr=info["representative"]),
-            )
+            acc.state = (info.frontier.hex(), info.balance, info.representative)
         print(f"Acc : {acc}")
         print(f"Bal : {acc.bal:>40} {acc.network.std_unit}")
         print(f"Rep : {acc.rep}")
@@ -98,7 +127,7 @@ class Session:
         return acc.send(to, raw_amt, rep)
 
 
-def main() -> None:
+def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "-n",
@@ -126,27 +155,50 @@ def main() -> None:
     )
     ox.add_argument("-s", "--send", help="Send to", metavar="ADDRESS", type=Account)
 
+    o.add_argument(
+        "-c", "--confirm", action="store_true", help="Wait for confirmation."
+    )
+
     sx = o.add_mutually_exclusive_group()
     sx.add_argument("-a", "--amount", type=str, help="Amount to send")
     sx.add_argument("-e", "--empty", action="store_true", help="Empty account")
-    args = parser.parse_args()
+
+    b = subparsers.add_parser("broadcast", help="Broadcast signed blocks")
+    b.add_argument(
+        "f", metavar="FILE", type=str, help="File of JSON blocks, one per line."
+    )
+    b.add_argument(
+        "-j", "--jobs", default=16, help="Accounts sent concurrently. (16)", type=int
+    )
+    b.add_argument(
+        "--async", action="store_true", dest="async_", help="Process asynchronously."
+    )
+
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
 
     config = configparser.ConfigParser(allow_no_value=True)
     config.read(platformdirs.user_config_dir("nanopy.ini"))
 
     Account.set_network(name=args.network)
     n = Account.network
-    s = Session(HTTP(url=str(config[n.name].get("rpc", fallback=n.rpc_url))))
+    s = Session(connect(str(config[n.name].get("rpc", fallback=n.rpc_url))))
 
     receivable: Callable[[Account], list[str]] = lambda acc: s.rpc.receivable(str(acc))[
         "blocks"
     ]
-    process: Callable[[StateBlock], str] = lambda b: s.rpc.process(b.dict_)["hash"]
 
     if not args.sub:
         s.check_status([a for a in config.options(n.name) if a.startswith(n.prefix)])
         return
 
+    if args.sub == "broadcast":
+        s.broadcast(args.f, args.jobs, args.async_)
+        return
+
     if args.new:
         s.create_new_key(args.f, args.k, args.group)
         return
@@ -159,18 +211,21 @@ def main() -> None:
 
     acc = Account(sk=deterministic_key(seed, args.index))
     s.get_account_info(acc)
+    if args.confirm:
+        s.tracker = Tracker(s.rpc, str(config[n.name].get("ws", fallback="")))
     if args.send:
         if args.empty:
-            print(process(s.send(acc, args.send, acc.bal, args.rep)))
+            print(s.process(s.send(acc, args.send, acc.bal, args.rep)))
         elif args.amount:
-            print(process(s.send(acc, args.send, args.amount, args.rep)))
+            print(s.process(s.send(acc, args.send, args.amount, args.rep)))
     elif args.receive:
-        print(process(s.receive(acc, args.receive, args.rep)))
+        print(s.process(s.receive(acc, args.receive, args.rep)))
     elif args.receive_all:
         for r in receivable(acc):
-            print(process(s.receive(acc, r, args.rep)))
+            print(s.process(s.receive(acc, r, args.rep)))
     elif args.rep:
-        print(process(s.change_rep(acc, args.rep)))
+        print(s.process(s.change_rep(acc, args.rep)))
+    s.wait()
 
 
 if __name__ == "__main__":  # pragma: no cover
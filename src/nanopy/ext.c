@@ -3,6 +3,7 @@
 #include <blake2.h>
 #include <ed25519-hash-custom.h>
 #include <ed25519.h>
+#include <stdatomic.h>
 #include <stdbool.h>
 
 #ifdef USE_OCL
@@ -12,36 +13,253 @@
 #include <OpenCL/opencl.h>
 #endif
 #include "opencl_program.h"
-#else
+#endif
+
 #ifdef _WIN32
 #include <windows.h>
 #else
 #include <pthread.h>
+#include <time.h>
 #include <unistd.h>
+#ifdef __linux__
+#include <sched.h>
+#include <sys/resource.h>
+#include <sys/syscall.h>
 #endif
 #endif
 
 static const size_t n = 1 << 20;
-static uint64_t s[16];
-static int p;
 
-static uint64_t xorshift1024star() {
-  uint64_t s0 = s[p++], s1 = s[p &= 15];
-  s1 ^= s1 << 31;
-  s1 ^= s1 >> 11;
-  s1 ^= s0 ^ (s0 >> 30);
-  s[p] = s1;
-  return s1 * 1181783497276652981ull;
-}
+typedef struct {
+  uint64_t s[16];
+  int p;
+} rng_t;
 
-static bool is_valid(uint64_t work, uint8_t *h, uint64_t difficulty) {
+static uint64_t nonces, solves, cancellations;
+static double elapsed;
+static uint64_t *worker_nonces;
+static double *worker_elapsed;
+static long num_workers;
+static PyObject *callback;
+
+typedef struct {
+#ifdef __linux__
+  cpu_set_t cpus;
+#elif defined(_WIN32)
+  DWORD_PTR cpus;
+#endif
+  int nice;
+} thread_config_t;
+static thread_config_t config;
+static long num_threads;
+#ifdef __linux__
+static const long max_cpus = CPU_SETSIZE;
+#elif defined(_WIN32)
+static const long max_cpus = 8 * sizeof(DWORD_PTR);
+#else
+static const long max_cpus = 1024;
+#endif
+
+#ifdef _WIN32
+static SRWLOCK mutex = SRWLOCK_INIT;
+static void lock() { AcquireSRWLockExclusive(&mutex); }
+static void unlock() { ReleaseSRWLockExclusive(&mutex); }
+#else
+static pthread_mutex_t mutex = PTHREAD_MUTEX_INITIALIZER;
+static void lock() { pthread_mutex_lock(&mutex); }
+static void unlock() { pthread_mutex_unlock(&mutex); }
+#endif
+
+static uint64_t get_difficulty(uint64_t work, const uint8_t *h) {
   uint64_t d;
   blake2b_state b;
   blake2b_init(&b, 8);
   blake2b_update(&b, &work, 8);
   blake2b_update(&b, h, 32);
   blake2b_final(&b, &d, 8);
-  return d >= difficulty;
+  return d;
+}
+
+static bool is_valid(uint64_t work, uint8_t *h, uint64_t difficulty) {
+  return get_difficulty(work, h) >= difficulty;
+}
+
+static double now() {
+#ifdef _WIN32
+  LARGE_INTEGER f, c;
+  QueryPerformanceFrequency(&f);
+  QueryPerformanceCounter(&c);
+  return (double)c.QuadPart / (double)f.QuadPart;
+#else
+  struct timespec ts;
+  clock_gettime(CLOCK_MONOTONIC, &ts);
+  return (double)ts.tv_sec + (double)ts.tv_nsec * 1e-9;
+#endif
+}
+
+static int resize_stats(long len) {
+  int err = 0;
+  lock();
+  if (len > num_workers) {
+    uint64_t *wn = realloc(worker_nonces, len * sizeof(uint64_t));
+    if (wn)
+      worker_nonces = wn;
+    double *we = wn ? realloc(worker_elapsed, len * sizeof(double)) : NULL;
+    if (we)
+      worker_elapsed = we;
+    if (!wn || !we)
+      err = -1;
+    else {
+      for (long t = num_workers; t < len; t++) {
+        worker_nonces[t] = 0;
+        worker_elapsed[t] = 0;
+      }
+      num_workers = len;
+    }
+  }
+  unlock();
+  return err;
+}
+
+static void free_stats() {
+  free(worker_nonces);
+  free(worker_elapsed);
+  Py_CLEAR(callback);
+}
+
+static void add_stats(long t, uint64_t tries, double t0, double t1) {
+  lock();
+  worker_nonces[t] += tries;
+  worker_elapsed[t] += t1 - t0;
+  nonces += tries;
+  unlock();
+}
+
+static void add_elapsed(double t) {
+  lock();
+  elapsed += t;
+  unlock();
+}
+
+static uint64_t record_solve(uint64_t work, const uint8_t *h, uint64_t tries,
+                             double t) {
+  const uint64_t difficulty = get_difficulty(work, h);
+  lock();
+  solves++;
+  PyObject *cb = callback;
+  Py_XINCREF(cb);
+  unlock();
+  if (cb) {
+    PyObject *info =
+        Py_BuildValue("{s:K,s:K,s:K,s:d}", "work", work, "difficulty",
+                      difficulty, "nonces", tries, "time", t);
+    PyObject *r = info ? PyObject_CallFunctionObjArgs(cb, info, NULL) : NULL;
+    if (!r)
+      PyErr_WriteUnraisable(cb);
+    Py_XDECREF(r);
+    Py_XDECREF(info);
+    Py_DECREF(cb);
+  }
+  return difficulty;
+}
+
+static PyObject *cancelled(double t) {
+  lock();
+  cancellations++;
+  elapsed += t;
+  unlock();
+  return NULL;
+}
+
+static PyObject *work_config(PyObject *Py_UNUSED(self), PyObject *args) {
+  long threads;
+  PyObject *cpus;
+  thread_config_t c = {0};
+
+  if (!PyArg_ParseTuple(args, "lOi", &threads, &cpus, &c.nice))
+    return PyErr_Format(PyExc_RuntimeError, "Failed to parse arguments");
+  if (threads < 0)
+    return PyErr_Format(PyExc_ValueError, "Threads must be >= 0");
+  if (c.nice < -20 || c.nice > 19)
+    return PyErr_Format(PyExc_ValueError, "Nice must be within [-20, 19]");
+
+  const Py_ssize_t len = PySequence_Size(cpus);
+  if (len < 0)
+    return NULL;
+  for (Py_ssize_t i = 0; i < len; i++) {
+    PyObject *item = PySequence_GetItem(cpus, i);
+    const long cpu = item ? PyLong_AsLong(item) : -1;
+    Py_XDECREF(item);
+    if (PyErr_Occurred())
+      return NULL;
+    if (cpu < 0 || cpu >= max_cpus)
+      return PyErr_Format(PyExc_ValueError, "CPU must be within [0, %ld)",
+                          max_cpus);
+#ifdef __linux__
+    CPU_SET(cpu, &c.cpus);
+#elif defined(_WIN32)
+    c.cpus |= (DWORD_PTR)1 << cpu;
+#endif
+  }
+
+  lock();
+  num_threads = threads;
+  config = c;
+  unlock();
+  Py_RETURN_NONE;
+}
+
+static long get_num_threads(thread_config_t *c) {
+  lock();
+  const long threads = num_threads;
+  *c = config;
+  unlock();
+  if (threads)
+    return threads;
+#ifdef _WIN32
+  return GetActiveProcessorCount(ALL_PROCESSOR_GROUPS);
+#else
+  return sysconf(_SC_NPROCESSORS_ONLN);
+#endif
+}
+
+static void configure_thread(const thread_config_t *c) {
+#ifdef __linux__
+  if (CPU_COUNT(&c->cpus))
+    pthread_setaffinity_np(pthread_self(), sizeof c->cpus, &c->cpus);
+  if (c->nice)
+    setpriority(PRIO_PROCESS, (id_t)syscall(SYS_gettid), c->nice);
+#elif defined(_WIN32)
+  if (c->cpus)
+    SetThreadAffinityMask(GetCurrentThread(), c->cpus);
+  if (c->nice)
+    SetThreadPriority(GetCurrentThread(),
+                      c->nice >= 15   ? THREAD_PRIORITY_IDLE
+                      : c->nice >= 10 ? THREAD_PRIORITY_LOWEST
+                      : c->nice > 0   ? THREAD_PRIORITY_BELOW_NORMAL
+                                      : THREAD_PRIORITY_ABOVE_NORMAL);
+#else
+  (void)c;
+#endif
+}
+
+typedef struct {
+  uint8_t *h;
+  uint64_t difficulty, nonce, result, tries;
+  double t0, t1;
+  atomic_bool *stop;
+  bool found;
+  Py_ssize_t root;
+  thread_config_t config;
+} thread_arg_t;
+
+static uint64_t xorshift1024star(rng_t *r) {
+  uint64_t s0 = r->s[r->p++], s1 = r->s[r->p &= 15];
+  s1 ^= s1 << 31;
+  s1 ^= s1 >> 11;
+  s1 ^= s0 ^ (s0 >> 30);
+  r->s[r->p] = s1;
+  return s1 * 1181783497276652981ull;
 }
 
 static PyObject *work_validate(PyObject *Py_UNUSED(self), PyObject *args) {
@@ -58,7 +276,142 @@ static PyObject *work_validate(PyObject *Py_UNUSED(self), PyObject *args) {
   return Py_BuildValue("i", res);
 }
 
+static PyObject *work_difficulty(PyObject *Py_UNUSED(self), PyObject *args) {
+  uint8_t *h;
+  uint64_t work;
+  Py_ssize_t n0;
+
+  if (!PyArg_ParseTuple(args, "Ky#", &work, &h, &n0))
+    return PyErr_Format(PyExc_RuntimeError, "Failed to parse arguments");
+  if (n0 != 32)
+    return PyErr_Format(PyExc_ValueError, "Hash must be 32 bytes");
+
+  return Py_BuildValue("K", get_difficulty(work, h));
+}
+
+typedef struct {
+  const uint8_t *works, *roots, *difficulties;
+  uint64_t difficulty;
+  uint8_t *valid, *achieved;
+  Py_ssize_t start, end;
+  thread_config_t config;
+} validate_arg_t;
+
+#ifdef _WIN32
+static DWORD WINAPI validate_worker(LPVOID arg) {
+#else
+static void *validate_worker(void *arg) {
+#endif
+  validate_arg_t *a = (validate_arg_t *)arg;
+  configure_thread(&a->config);
+  for (Py_ssize_t i = a->start; i < a->end; i++) {
+    uint64_t work, difficulty = a->difficulty;
+    memcpy(&work, a->works + 8 * i, 8);
+    if (a->difficulties)
+      memcpy(&difficulty, a->difficulties + 8 * i, 8);
+    const uint64_t d = get_difficulty(work, a->roots + 32 * i);
+    memcpy(a->achieved + 8 * i, &d, 8);
+    a->valid[i] = d >= difficulty;
+  }
+  return 0;
+}
+
+static PyObject *work_validate_many_impl(PyObject *works, PyObject *roots,
+                                         PyObject *difficulties,
+                                         uint64_t difficulty) {
+  const Py_ssize_t len = PyBytes_Size(works) / 8;
+  if (PyBytes_Size(works) % 8)
+    return PyErr_Format(PyExc_ValueError,
+                        "Works must be a multiple of 8 bytes");
+  if (PyBytes_Size(roots) != 32 * len)
+    return PyErr_Format(PyExc_ValueError, "Hashes must be 32 bytes per work");
+  if (difficulties && PyBytes_Size(difficulties) != 8 * len)
+    return PyErr_Format(PyExc_ValueError,
+                        "Difficulties must be 8 bytes per work");
+
+  thread_config_t c;
+  long NUM_THREADS = get_num_threads(&c);
+  if (NUM_THREADS > 1 + len / 4096)
+    NUM_THREADS = 1 + len / 4096;
+#ifdef _WIN32
+  HANDLE *threads = malloc(NUM_THREADS * sizeof(HANDLE));
+#else
+  pthread_t *threads = malloc(NUM_THREADS * sizeof(pthread_t));
+#endif
+  validate_arg_t *vargs = malloc(NUM_THREADS * sizeof(validate_arg_t));
+  PyObject *valid = PyBytes_FromStringAndSize(NULL, len);
+  PyObject *achieved = PyBytes_FromStringAndSize(NULL, 8 * len);
+  if (!threads || !vargs || !valid || !achieved) {
+    free(threads);
+    free(vargs);
+    Py_XDECREF(valid);
+    Py_XDECREF(achieved);
+    return PyErr_Occurred() ? NULL : PyErr_NoMemory();
+  }
+
+  for (long t = 0; t < NUM_THREADS; t++) {
+    vargs[t].works = (uint8_t *)PyBytes_AsString(works);
+    vargs[t].roots = (uint8_t *)PyBytes_AsString(roots);
+    vargs[t].difficulties =
+        difficulties ? (uint8_t *)PyBytes_AsString(difficulties) : NULL;
+    vargs[t].difficulty = difficulty;
+    vargs[t].valid = (uint8_t *)PyBytes_AsString(valid);
+    vargs[t].achieved = (uint8_t *)PyBytes_AsString(achieved);
+    vargs[t].start = len * t / NUM_THREADS;
+    vargs[t].end = len * (t + 1) / NUM_THREADS;
+    vargs[t].config = c;
+  }
+  PyThreadState *ts = PyEval_SaveThread();
+  for (long t = 0; t < NUM_THREADS; t++) {
+#ifdef _WIN32
+    threads[t] = CreateThread(NULL, 0, validate_worker, &vargs[t], 0, NULL);
+#else
+    pthread_create(&threads[t], NULL, validate_worker, &vargs[t]);
+#endif
+  }
+  for (long t = 0; t < NUM_THREADS; t++) {
+#ifdef _WIN32
+    WaitForSingleObject(threads[t], INFINITE);
+    CloseHandle(threads[t]);
+#else
+    pthread_join(threads[t], NULL);
+#endif
+  }
+  PyEval_RestoreThread(ts);
+  free(threads);
+  free(vargs);
+  return Py_BuildValue("NN", valid, achieved);
+}
+
+static PyObject *work_validate_many(PyObject *Py_UNUSED(self), PyObject *args) {
+  PyObject *w, *r, *d;
+  uint64_t difficulty = 0;
+
+  if (!PyArg_ParseTuple(args, "OOO", &w, &r, &d))
+    return PyErr_Format(PyExc_RuntimeError, "Failed to parse arguments");
+  if (PyLong_Check(d)) {
+    difficulty = PyLong_AsUnsignedLongLong(d);
+    if (PyErr_Occurred())
+      return NULL;
+  }
+
+  PyObject *works = PyBytes_FromObject(w);
+  PyObject *roots = works ? PyBytes_FromObject(r) : NULL;
+  PyObject *difficulties =
+      roots && !PyLong_Check(d) ? PyBytes_FromObject(d) : NULL;
+  PyObject *res =
+      roots && (difficulties || PyLong_Check(d))
+          ? work_validate_many_impl(works, roots, difficulties, difficulty)
+          : NULL;
+  Py_XDECREF(works);
+  Py_XDECREF(roots);
+  Py_XDECREF(difficulties);
+  return res;
+}
+
 #ifdef USE_OCL
+static const char backend[] = "opencl";
+static char device_name[128];
 static cl_platform_id platform;
 static cl_device_id device;
 static cl_context context;
@@ -68,6 +421,7 @@ static cl_mem d_nonce, d_work, d_h, d_difficulty;
 static cl_kernel kernel;
 
 static void free_ext(void *Py_UNUSED(m)) {
+  free_stats();
   clReleaseKernel(kernel);
   clReleaseMemObject(d_nonce);
   clReleaseMemObject(d_work);
@@ -98,11 +452,10 @@ static PyObject *setup_cl() {
   if (err)
     return PyErr_Format(PyExc_RuntimeError,
                         "OpenCL:%d: Failed to clGetDeviceIDs", err);
-#ifndef NDEBUG
-  char cl_device_name[128];
-  clGetDeviceInfo(device, CL_DEVICE_NAME, sizeof cl_device_name, cl_device_name,
+  clGetDeviceInfo(device, CL_DEVICE_NAME, sizeof device_name, device_name,
                   NULL);
-  printf("OpenCL: %s\n", cl_device_name);
+#ifndef NDEBUG
+  printf("OpenCL: %s\n", device_name);
 #endif
 
   context = clCreateContext(NULL, 1, &device, NULL, NULL, &err);
@@ -181,7 +534,8 @@ static PyObject *setup_cl() {
   return NULL;
 }
 
-static PyObject *work_generate_impl(uint8_t *h, uint64_t difficulty) {
+static PyObject *work_generate_impl(uint8_t *h, uint64_t difficulty,
+                                    rng_t *rng) {
   uint64_t work = 0;
 
   int err =
@@ -201,8 +555,15 @@ static PyObject *work_generate_impl(uint8_t *h, uint64_t difficulty) {
     return PyErr_Format(PyExc_RuntimeError,
                         "OpenCL:%d: Failed to clEnqueueWriteBuffer", err);
 
+  if (resize_stats(1))
+    return PyErr_NoMemory();
+  uint64_t tries = 0;
+  const double t0 = now();
   while (!work) {
-    const uint64_t nonce = xorshift1024star();
+    if (PyErr_CheckSignals())
+      return cancelled(now() - t0);
+    const uint64_t nonce = xorshift1024star(rng);
+    const double t1 = now();
 
     err = clEnqueueWriteBuffer(queue, d_nonce, CL_TRUE, 0, 8, &nonce, 0, NULL,
                                NULL);
@@ -221,16 +582,33 @@ static PyObject *work_generate_impl(uint8_t *h, uint64_t difficulty) {
     if (err)
       return PyErr_Format(PyExc_RuntimeError,
                           "OpenCL:%d: Failed to clEnqueueReadBuffer", err);
+
+    add_stats(0, n, t1, now());
+    tries += n;
   }
 
-  return Py_BuildValue("K", work);
+  const double t = now() - t0;
+  add_elapsed(t);
+  return Py_BuildValue("KK", work, record_solve(work, h, tries, t));
+}
+
+static int work_generate_many_impl(uint8_t *h, const uint64_t *difficulty,
+                                   uint64_t *works, uint64_t *achieved,
+                                   Py_ssize_t len, rng_t *rng) {
+  for (Py_ssize_t i = 0; i < len; i++) {
+    PyObject *r = work_generate_impl(h + 32 * i, difficulty[i], rng);
+    if (!r || !PyArg_ParseTuple(r, "KK", &works[i], &achieved[i])) {
+      Py_XDECREF(r);
+      return -1;
+    }
+    Py_DECREF(r);
+  }
+  return 0;
 }
 #else
-static void free_ext(void *Py_UNUSED(m)) {}
-typedef struct {
-  uint8_t *h;
-  uint64_t difficulty, nonce, result;
-} thread_arg_t;
+static const char backend[] = "cpu";
+static const char device_name[] = "cpu";
+static void free_ext(void *Py_UNUSED(m)) { free_stats(); }
 
 #ifdef _WIN32
 static DWORD WINAPI worker(LPVOID arg) {
@@ -238,37 +616,75 @@ static DWORD WINAPI worker(LPVOID arg) {
 static void *worker(void *arg) {
 #endif
   thread_arg_t *a = (thread_arg_t *)arg;
-  for (uint64_t i = 0; i < n; i++) {
-    if (is_valid(a->nonce + i, a->h, a->difficulty)) {
-      a->result = a->nonce + i;
+  configure_thread(&a->config);
+  a->t0 = now();
+  for (a->tries = 0;
+       a->tries < n && !atomic_load_explicit(a->stop, memory_order_relaxed);
+       a->tries++) {
+    if (is_valid(a->nonce + a->tries, a->h, a->difficulty)) {
+      a->result = a->nonce + a->tries++;
+      a->found = true;
+      atomic_store(a->stop, true);
       break;
     }
   }
+  a->t1 = now();
   return 0;
 }
 
-static PyObject *work_generate_impl(uint8_t *h, uint64_t difficulty) {
-  uint64_t work = 0;
+static int work_generate_many_impl(uint8_t *h, const uint64_t *difficulty,
+                                   uint64_t *works, uint64_t *achieved,
+                                   Py_ssize_t len, rng_t *rng) {
+  if (!len)
+    return 0;
+  thread_config_t c;
+  const long NUM_THREADS = get_num_threads(&c);
 #ifdef _WIN32
-  long NUM_THREADS = GetActiveProcessorCount(ALL_PROCESSOR_GROUPS);
   HANDLE *threads = malloc(NUM_THREADS * sizeof(HANDLE));
 #else
-  long NUM_THREADS = sysconf(_SC_NPROCESSORS_ONLN);
   pthread_t *threads = malloc(NUM_THREADS * sizeof(pthread_t));
 #endif
   thread_arg_t *wargs = malloc(NUM_THREADS * sizeof(thread_arg_t));
-  while (!work) {
+  atomic_bool *stop = malloc(len * sizeof(atomic_bool));
+  uint64_t *tries = calloc(len, sizeof(uint64_t));
+  Py_ssize_t *pending = malloc(len * sizeof(Py_ssize_t));
+  int err = 0;
+  if (!threads || !wargs || !stop || !tries || !pending ||
+      resize_stats(NUM_THREADS)) {
+    PyErr_NoMemory();
+    err = -1;
+  }
+  for (Py_ssize_t i = 0; !err && i < len; i++)
+    atomic_init(&stop[i], false);
+  const double t0 = now();
+  while (!err) {
+    Py_ssize_t num_pending = 0;
+    for (Py_ssize_t i = 0; i < len; i++)
+      if (!atomic_load(&stop[i]))
+        pending[num_pending++] = i;
+    if (!num_pending)
+      break;
+    if (PyErr_CheckSignals()) {
+      cancelled(now() - t0);
+      err = -1;
+      break;
+    }
     for (int t = 0; t < NUM_THREADS; t++) {
-      wargs[t].h = h;
-      wargs[t].difficulty = difficulty;
-      wargs[t].nonce = xorshift1024star();
-      wargs[t].result = 0;
+      const Py_ssize_t i = pending[t % num_pending];
+      wargs[t].h = h + 32 * i;
+      wargs[t].difficulty = difficulty[i];
+      wargs[t].nonce = xorshift1024star(rng);
+      wargs[t].found = false;
+      wargs[t].stop = &stop[i];
+      wargs[t].root = i;
+      wargs[t].config = c;
 #ifdef _WIN32
       threads[t] = CreateThread(NULL, 0, worker, &wargs[t], 0, NULL);
 #else
       pthread_create(&threads[t], NULL, worker, &wargs[t]);
 #endif
     }
+    PyThreadState *ts = PyEval_SaveThread();
     for (int t = 0; t < NUM_THREADS; t++) {
 #ifdef _WIN32
       WaitForSingleObject(threads[t], INFINITE);
@@ -276,13 +692,38 @@ static PyObject *work_generate_impl(uint8_t *h, uint64_t difficulty) {
 #else
       pthread_join(threads[t], NULL);
 #endif
-      if (wargs[t].result)
-        work = wargs[t].result;
+    }
+    PyEval_RestoreThread(ts);
+    for (int t = 0; t < NUM_THREADS; t++) {
+      const Py_ssize_t i = wargs[t].root;
+      add_stats(t, wargs[t].tries, wargs[t].t0, wargs[t].t1);
+      tries[i] += wargs[t].tries;
+    }
+    for (int t = 0; t < NUM_THREADS; t++) {
+      const Py_ssize_t i = wargs[t].root;
+      if (wargs[t].found && tries[i]) {
+        works[i] = wargs[t].result;
+        achieved[i] = record_solve(works[i], h + 32 * i, tries[i], now() - t0);
+        tries[i] = 0;
+      }
     }
   }
+  if (!err)
+    add_elapsed(now() - t0);
   free(threads);
   free(wargs);
-  return Py_BuildValue("K", work);
+  free(stop);
+  free(tries);
+  free(pending);
+  return err;
+}
+
+static PyObject *work_generate_impl(uint8_t *h, uint64_t difficulty,
+                                    rng_t *rng) {
+  uint64_t work, achieved;
+  if (work_generate_many_impl(h, &difficulty, &work, &achieved, 1, rng))
+    return NULL;
+  return Py_BuildValue("KK", work, achieved);
 }
 #endif
 
@@ -290,21 +731,60 @@ static PyObject *work_generate(PyObject *Py_UNUSED(self), PyObject *args) {
   uint8_t *h, *r;
   uint64_t difficulty;
   Py_ssize_t n0, n1;
+  rng_t rng = {0};
 
   if (!PyArg_ParseTuple(args, "y#Ky#", &h, &n0, &difficulty, &r, &n1))
     return PyErr_Format(PyExc_RuntimeError, "Failed to parse arguments");
   if (n0 != 32)
     return PyErr_Format(PyExc_ValueError, "Hash must be 32 bytes");
-  if (n1 != sizeof s)
+  if (n1 != sizeof rng.s)
+    return PyErr_Format(PyExc_ValueError, "Random must be 128 bytes");
+
+  memcpy(rng.s, r, sizeof rng.s);
+  return work_generate_impl(h, difficulty, &rng);
+}
+
+static PyObject *work_generate_many(PyObject *Py_UNUSED(self), PyObject *args) {
+  uint8_t *h, *d, *r;
+  Py_ssize_t n0, n1, n2;
+  rng_t rng = {0};
+
+  if (!PyArg_ParseTuple(args, "y#y#y#", &h, &n0, &d, &n1, &r, &n2))
+    return PyErr_Format(PyExc_RuntimeError, "Failed to parse arguments");
+  if (n0 % 32)
+    return PyErr_Format(PyExc_ValueError,
+                        "Hashes must be a multiple of 32 bytes");
+  if (n1 != n0 / 4)
+    return PyErr_Format(PyExc_ValueError,
+                        "Difficulties must be 8 bytes per hash");
+  if (n2 != sizeof rng.s)
     return PyErr_Format(PyExc_ValueError, "Random must be 128 bytes");
 
-  p = 0;
-  memcpy(s, r, sizeof s);
-  return work_generate_impl(h, difficulty);
+  const Py_ssize_t len = n0 / 32;
+  uint64_t *difficulty = malloc(n1 + 8);
+  uint64_t *works = malloc(n1 + 8);
+  uint64_t *achieved = malloc(n1 + 8);
+  PyObject *res = NULL;
+  if (!difficulty || !works || !achieved)
+    PyErr_NoMemory();
+  else {
+    memcpy(difficulty, d, n1);
+    memcpy(rng.s, r, sizeof rng.s);
+    if (!work_generate_many_impl(h, difficulty, works, achieved, len, &rng))
+      res = Py_BuildValue("y#y#", (char *)works, n1, (char *)achieved, n1);
+  }
+  free(difficulty);
+  free(works);
+  free(achieved);
+  return res;
 }
 
-void ed25519_randombytes_unsafe(void *Py_UNUSED(out),
-                                size_t Py_UNUSED(outlen)) {}
+static const uint8_t *batch_random;
+
+void ed25519_randombytes_unsafe(void *out, size_t outlen) {
+  memcpy(out, batch_random, outlen);
+  batch_random += outlen;
+}
 
 void ed25519_hash_init(ed25519_hash_context *ctx) { blake2b_init(ctx, 64); }
 
@@ -371,12 +851,140 @@ static PyObject *verify_signature(PyObject *Py_UNUSED(self), PyObject *args) {
   return Py_BuildValue("i", res);
 }
 
+static PyObject *verify_signature_many(PyObject *Py_UNUSED(self),
+                                       PyObject *args) {
+  uint8_t *sig, *pk, *m, *r;
+  Py_ssize_t n0, n1, n2, n3;
+
+  if (!PyArg_ParseTuple(args, "y#y#y#y#", &sig, &n0, &pk, &n1, &m, &n2, &r,
+                        &n3))
+    return PyErr_Format(PyExc_RuntimeError, "Failed to parse arguments");
+  if (n0 % 64)
+    return PyErr_Format(PyExc_ValueError,
+                        "Signatures must be a multiple of 64 bytes");
+  const Py_ssize_t len = n0 / 64;
+  if (n1 != 32 * len)
+    return PyErr_Format(PyExc_ValueError,
+                        "Public keys must be 32 bytes per signature");
+  if (n2 != 32 * len)
+    return PyErr_Format(PyExc_ValueError,
+                        "Messages must be 32 bytes per signature");
+  if (n3 != 16 * len)
+    return PyErr_Format(PyExc_ValueError,
+                        "Random must be 16 bytes per signature");
+
+  const uint8_t **sigs = malloc((len + 1) * sizeof(uint8_t *));
+  const uint8_t **pks = malloc((len + 1) * sizeof(uint8_t *));
+  const uint8_t **ms = malloc((len + 1) * sizeof(uint8_t *));
+  size_t *mlen = malloc((len + 1) * sizeof(size_t));
+  int *valid = malloc((len + 1) * sizeof(int));
+  PyObject *res = NULL;
+  if (!sigs || !pks || !ms || !mlen || !valid)
+    PyErr_NoMemory();
+  else if ((res = PyBytes_FromStringAndSize(NULL, len))) {
+    for (Py_ssize_t i = 0; i < len; i++) {
+      sigs[i] = sig + 64 * i;
+      pks[i] = pk + 32 * i;
+      ms[i] = m + 32 * i;
+      mlen[i] = 32;
+    }
+    batch_random = r;
+    ed25519_sign_open_batch(ms, mlen, pks, sigs, len, valid);
+    uint8_t *v = (uint8_t *)PyBytes_AsString(res);
+    for (Py_ssize_t i = 0; i < len; i++)
+      v[i] = valid[i];
+  }
+  free(sigs);
+  free(pks);
+  free(ms);
+  free(mlen);
+  free(valid);
+  return res;
+}
+
+static PyObject *stats(PyObject *Py_UNUSED(self), PyObject *args) {
+  int reset = 0;
+
+  if (!PyArg_ParseTuple(args, "|p", &reset))
+    return PyErr_Format(PyExc_RuntimeError, "Failed to parse arguments");
+
+  lock();
+  const long len = num_workers;
+  const uint64_t tries = nonces, solved = solves, cancelled = cancellations;
+  const double t = elapsed;
+  uint64_t *wn = malloc((len + 1) * sizeof(uint64_t));
+  double *we = malloc((len + 1) * sizeof(double));
+  if (wn && we) {
+    memcpy(wn, worker_nonces, len * sizeof(uint64_t));
+    memcpy(we, worker_elapsed, len * sizeof(double));
+  }
+  unlock();
+
+  PyObject *workers = wn && we ? PyList_New(len) : PyErr_NoMemory();
+  for (long i = 0; workers && i < len; i++) {
+    PyObject *w =
+        Py_BuildValue("{s:K,s:d,s:d}", "nonces", wn[i], "time", we[i],
+                      "hashrate", we[i] > 0 ? (double)wn[i] / we[i] : 0.0);
+    if (!w || PyList_SetItem(workers, i, w))
+      Py_CLEAR(workers);
+  }
+  PyObject *r =
+      workers
+          ? Py_BuildValue("{s:s,s:s,s:K,s:K,s:K,s:d,s:d,s:N}", "backend",
+                          backend, "device", device_name, "nonces", tries,
+                          "solves", solved, "cancellations", cancelled, "time",
+                          t, "hashrate", t > 0 ? (double)tries / t : 0.0,
+                          "workers", workers)
+          : NULL;
+  if (r && reset) {
+    lock();
+    nonces -= tries;
+    solves -= solved;
+    cancellations -= cancelled;
+    elapsed -= t;
+    for (long i = 0; i < len; i++) {
+      worker_nonces[i] -= wn[i];
+      worker_elapsed[i] -= we[i];
+    }
+    unlock();
+  }
+  free(wn);
+  free(we);
+  return r;
+}
+
+static PyObject *work_callback(PyObject *Py_UNUSED(self), PyObject *args) {
+  PyObject *cb;
+
+  if (!PyArg_ParseTuple(args, "O", &cb))
+    return PyErr_Format(PyExc_RuntimeError, "Failed to parse arguments");
+  if (cb != Py_None && !PyCallable_Check(cb))
+    return PyErr_Format(PyExc_TypeError, "Callback must be callable or None");
+
+  if (cb == Py_None)
+    cb = NULL;
+  Py_XINCREF(cb);
+  lock();
+  PyObject *old = callback;
+  callback = cb;
+  unlock();
+  Py_XDECREF(old);
+  Py_RETURN_NONE;
+}
+
 static PyMethodDef m[] = {
     {"work_generate", work_generate, METH_VARARGS, NULL},
+    {"work_generate_many", work_generate_many, METH_VARARGS, NULL},
     {"work_validate", work_validate, METH_VARARGS, NULL},
+    {"work_validate_many", work_validate_many, METH_VARARGS, NULL},
+    {"work_difficulty", work_difficulty, METH_VARARGS, NULL},
+    {"stats", stats, METH_VARARGS, NULL},
+    {"work_callback", work_callback, METH_VARARGS, NULL},
+    {"work_config", work_config, METH_VARARGS, NULL},
     {"publickey", publickey, METH_VARARGS, NULL},
     {"sign", sign, METH_VARARGS, NULL},
     {"verify_signature", verify_signature, METH_VARARGS, NULL},
+    {"verify_signature_many", verify_signature_many, METH_VARARGS, NULL},
     {}};
 
 static struct PyModuleDef ext = {
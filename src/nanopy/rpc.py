@@ -5,15 +5,1269 @@ nanopy.rpc
 A wrapper to make RPC requests to a node.
 """
 
+import array
+import asyncio
+import bisect
+import codecs
+import collections
+import collections.abc
+import concurrent.futures
+import copy
+import decimal
+import fractions
+import functools
+import http.server
+import inspect
+import itertools
 import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
 from abc import ABC, abstractmethod
-from typing import Any, Callable
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Iterator
 
 import jsonschema
 import requests
 import websocket
 
 import nanopy as npy
+from nanopy import ext  # type: ignore
+
+
+class _Compiler:
+    """Generate a Python function that checks an instance against a JSON schema
+    made of the keywords used by :class:`RPC`. The function returns whether the
+    instance is valid, same as ``jsonschema`` would decide, without building any
+    errors.
+    """
+
+    _types = {"array": "list", "object": "dict", "string": "str"}
+    _keywords = {
+        "anyOf",
+        "const",
+        "enum",
+        "items",
+        "pattern",
+        "patternProperties",
+        "properties",
+        "required",
+        "type",
+    }
+
+    def __init__(self) -> None:
+        self.consts: dict[str, Any] = {}
+        self.lines: list[str] = []
+
+    def const(self, value: Any) -> str:
+        "name of a constant in the generated code"
+        name = f"c{len(self.consts)}"
+        self.consts[name] = value
+        return name
+
+    def expr(self, schema: dict[str, Any], x: str, known: str = "") -> str:
+        """boolean expression checking the value of variable x against schema
+
+        :arg schema: JSON schema
+        :arg x: variable name
+        :arg known: python type of the variable, if already checked
+        """
+        if set(schema) - self._keywords:
+            raise ValueError(f"Unsupported keywords: {set(schema) - self._keywords}")
+        t = self._types[schema["type"]] if "type" in schema else ""
+        e = [f"isinstance({x}, {t})"] if t and t != known else []
+        t = t or known
+        if "const" in schema:
+            e.append(f"{x} == {self.const(schema['const'])}")
+        if "enum" in schema:
+            e.append(f"{x} in {self.const(tuple(schema['enum']))}")
+        if "pattern" in schema:
+            p = self.const(re.compile(schema["pattern"]).search)
+            e.append(f"{p}({x}) is not None")
+            if t != "str":
+                e[-1] = f"(not isinstance({x}, str) or {e[-1]})"
+        if set(schema) == {"required"}:
+            e.append(" and ".join(f"{k!r} in {x}" for k in schema["required"]))
+            if t != "dict":
+                e[-1] = f"(not isinstance({x}, dict) or ({e[-1] or 'True'}))"
+        elif set(schema) - {"type", "const", "enum", "pattern"}:
+            e.append(f"{self.function(schema, t)}({x})")
+        return " and ".join(e) or "True"
+
+    def function(self, schema: dict[str, Any], t: str) -> str:
+        "generate a function checking the structural keywords of schema"
+        name = f"f{len(self.lines)}"
+        self.lines.append("")
+        body = []
+        if "items" in schema:
+            i = "" if t == "list" else " "
+            if t != "list":
+                body.append("if isinstance(x, list):")
+            body.append(f"{i}for v in x:")
+            body.append(f"{i} if not ({self.expr(schema['items'], 'v')}):")
+            body.append(f"{i}  return False")
+        if set(schema) & {"properties", "patternProperties", "required"}:
+            if t != "dict":
+                body.append("if not isinstance(x, dict):")
+                body.append(" return True")
+        for k, v in schema.get("properties", {}).items():
+            body.append(f"if {k!r} in x:")
+            body.append(f" v = x[{k!r}]")
+            body.append(f" if not ({self.expr(v, 'v')}):")
+            body.append("  return False")
+        if "patternProperties" in schema:
+            body.append("for k, v in x.items():")
+            for k, v in schema["patternProperties"].items():
+                p = self.const(re.compile(k).search)
+                body.append(f" if {p}(k) is not None and not ({self.expr(v, 'v')}):")
+                body.append("  return False")
+        if "required" in schema:
+            e = " and ".join(f"{k!r} in x" for k in schema["required"])
+            body.append(f"if not ({e or 'True'}):")
+            body.append(" return False")
+        if "anyOf" in schema:
+            e = " or ".join(f"({self.expr(s, 'x', t)})" for s in schema["anyOf"])
+            body.append(f"if not ({e}):")
+            body.append(" return False")
+        body.append("return True")
+        self.lines[int(name[1:])] = f"def {name}(x):\n " + "\n ".join(body)
+        return name
+
+    @classmethod
+    def compile(cls, schema: dict[str, Any]) -> Callable[[Any], bool]:
+        """Compile schema
+
+        :arg schema: JSON schema
+        :return: function returning True if its argument is valid
+        """
+        c = cls()
+        c.lines.append(f"def f(x):\n return {c.expr(schema, 'x')}")
+        namespace = dict(c.consts)
+        exec("\n".join(c.lines), namespace)  # pylint: disable=exec-used
+        return namespace["f"]  # type: ignore
+
+
+class _JSONStream:  # pylint: disable=too-few-public-methods
+    """Incremental parser of a JSON object. Iterating yields ``(member, key,
+    value)`` for each member, ``key`` being None and ``value`` an empty
+    container for object and array members, which are followed by a tuple for
+    each of their entries, ``key`` being the index in arrays.
+
+    :arg chunks: iterable of the bytes of the document
+    """
+
+    _ws = re.compile(r"[ \t\n\r]*")
+    _ends = frozenset(" \t\n\r,:]}")
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decode = codecs.getincrementaldecoder("utf-8")().decode
+        self._raw = json.JSONDecoder().raw_decode
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        "read the next chunk, False at the end of the document"
+        chunk = next(self._chunks, None)
+        self._buf = self._buf[self._pos :] + self._decode(chunk or b"", chunk is None)
+        self._pos = 0
+        self._eof = chunk is None
+        return not self._eof
+
+    def _peek(self) -> str:
+        "skip whitespace and return the next character, empty at the end"
+        c = self._buf[self._pos : self._pos + 1]
+        if c and c not in " \t\n\r":
+            return c
+        while True:
+            self._pos = self._ws.match(self._buf, self._pos).end()  # type: ignore[union-attr]
+            if self._pos < len(self._buf) or not self._fill():
+                return self._buf[self._pos : self._pos + 1]
+
+    def _expect(self, c: str) -> None:
+        "step over a character"
+        if self._peek() != c:
+            raise json.JSONDecodeError(f"Expecting '{c}'", self._buf, self._pos)
+        self._pos += 1
+
+    def _value(self) -> Any:
+        "parse the next value whole, once the character after it has arrived"
+        self._peek()
+        while True:
+            try:
+                v, end = self._raw(self._buf, self._pos)
+                if self._eof or self._buf[end : end + 1] in self._ends:
+                    self._pos = end
+                    return v
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def _each(self, close: str) -> Iterator[None]:
+        "step over the separators of an object or array, yield before each item"
+        self._pos += 1
+        if self._peek() == close:
+            self._pos += 1
+            return
+        while True:
+            yield
+            if self._peek() == close:
+                self._pos += 1
+                return
+            self._expect(",")
+
+    def __iter__(self) -> Iterator[tuple[str, Any, Any]]:
+        if self._peek() != "{":
+            raise json.JSONDecodeError("Expecting '{'", self._buf, self._pos)
+        for _ in self._each("}"):
+            member = self._value()
+            self._expect(":")
+            c = self._peek()
+            if c == "{":
+                yield member, None, {}
+                for _ in self._each("}"):
+                    k = self._value()
+                    self._expect(":")
+                    yield member, k, self._value()
+            elif c == "[":
+                yield member, None, []
+                for i, _ in enumerate(self._each("]")):
+                    yield member, i, self._value()
+            else:
+                yield member, None, self._value()
+
+
+def _members(r: dict[str, Any]) -> Iterator[tuple[str, Any, Any]]:
+    "the tuples of :class:`_JSONStream` for a parsed JSON object"
+    for member, v in r.items():
+        if isinstance(v, dict):
+            yield member, None, {}
+            yield from ((member, k, x) for k, x in v.items())
+        elif isinstance(v, list):
+            yield member, None, []
+            yield from ((member, i, x) for i, x in enumerate(v))
+        else:
+            yield member, None, v
+
+
+class _Streaming:  # pylint: disable=too-few-public-methods,protected-access
+    "stand-in for a client, whose action methods stream the response"
+
+    def __init__(self, rpc: "RPC"):
+        self._rpc = rpc
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._rpc, name)
+
+    def _request(
+        self,
+        data: dict[str, Any],
+        schema: Callable[[], dict[str, Any]] | None = None,
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Any:
+        if check:
+            raise ValueError(f"Cannot stream {data['action']}")
+        return self._rpc._stream(data, schema)
+
+    def _bulk(
+        self,
+        data: dict[str, Any],
+        key: str,
+        schema: Callable[[], dict[str, Any]],
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Any:
+        if check is None:
+            return self._rpc._stream(data, schema)
+        requested = {i.lower() for i in data[key]}
+
+        def entry(_: dict[str, Any], r: Any) -> None:
+            "check an entry as the response to a request of its key alone"
+            k = next(iter(next(iter(r.values()))))
+            assert k.lower() in requested
+            check(data | {key: [k]}, r)
+
+        return self._rpc._stream(data, schema, entry)
+
+
+class _Typed:  # pylint: disable=too-few-public-methods,protected-access
+    """stand-in for a client, whose action methods return a :class:`Response`
+    instead of validating the response against the schema"""
+
+    def __init__(self, rpc: "RPC"):
+        self._rpc = rpc
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._rpc, name)
+
+    @staticmethod
+    def _wrap(r: Any, action: str) -> Any:
+        "wrap a response of an action, or of an awaitable, in a Response"
+        if not inspect.isawaitable(r):
+            return Response(r, action)
+
+        async def wrap() -> Any:
+            return Response(await r, action)
+
+        return wrap()
+
+    def _request(
+        self,
+        data: dict[str, Any],
+        _: Callable[[], dict[str, Any]] | None = None,
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Any:
+        return self._wrap(self._rpc._request(data, None, check), data["action"])
+
+    def _bulk(
+        self,
+        data: dict[str, Any],
+        key: str,
+        _: Callable[[], dict[str, Any]],
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Any:
+        return self._wrap(self._rpc._bulk(data, key, None, check), data["action"])
+
+
+class ChunkError(Exception):
+    """Raised when chunks of a bulk request fail. The responses of the other
+    chunks are merged in ``result``.
+
+    :arg errors: exception of each failed chunk by index
+    :arg chunks: accounts or hashes of each chunk
+    :arg result: merged response of the chunks that succeeded
+    """
+
+    def __init__(
+        self,
+        errors: dict[int, BaseException],
+        chunks: list[list[str]],
+        result: dict[str, Any],
+    ):
+        self.errors = errors
+        self.chunks = chunks
+        self.result = result
+        failed = "; ".join(
+            f"chunk {i} ({len(chunks[i])} items from {chunks[i][0]}): {e!r}"
+            for i, e in errors.items()
+        )
+        super().__init__(f"{len(errors)} of {len(chunks)} chunks failed: {failed}")
+
+    @property
+    def missing(self) -> list[str]:
+        "accounts or hashes of the failed chunks"
+        return [x for i in self.errors for x in self.chunks[i]]
+
+
+class Cache:  # pylint: disable=too-many-instance-attributes
+    """LRU cache of RPC responses. Responses about confirmed blocks, which
+    cannot change, are kept until evicted, and those of the volatile actions in
+    ``ttl`` for that many seconds. Assign it to ``RPC.cache`` to use it.
+
+    :arg size: maximum number of cached responses
+    :arg path: JSON file to load the responses about blocks from, and to
+      :meth:`save` them to
+    :arg ttl: seconds to keep the responses of volatile actions, by action
+    """
+
+    actions = frozenset(
+        {"block_account", "block_info", "blocks", "blocks_info", "chain"}
+    )
+    "actions whose responses may be about confirmed blocks"
+
+    def __init__(
+        self, size: int = 10000, path: str = "", ttl: dict[str, float] | None = None
+    ):
+        self.size = size
+        self.path = path
+        self.ttl = {"version": 60, "representatives_online": 10} if ttl is None else ttl
+        self.hits = self.misses = self.bytes_saved = 0
+        self._entries: collections.OrderedDict[str, tuple[str, float]] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for k, v in json.load(f).items():
+                    self._entries[k] = (v, math.inf)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        "fraction of lookups answered from the cache"
+        n = self.hits + self.misses
+        return self.hits / n if n else 0.0
+
+    def caches(self, action: str) -> bool:
+        """Whether the responses of an action may be cached, so are looked up
+
+        :arg action: RPC action
+        :return: True if in ``actions`` or ``ttl``
+        """
+        return action in self.actions or action in self.ttl
+
+    def get(self, key: str) -> Any:
+        """Get a cached response
+
+        :arg key: canonical request
+        :return: JSON response, None if not cached
+        """
+        with self._lock:
+            e = self._entries.get(key)
+            if e and e[1] < time.monotonic():
+                del self._entries[key]
+                e = None
+            if e is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.bytes_saved += len(e[0])
+        return json.loads(e[0])
+
+    def put(self, key: str, r: Any, ttl: float = math.inf) -> None:
+        """Cache a response, evicting the least recently used if full
+
+        :arg key: canonical request
+        :arg r: JSON response
+        :arg ttl: seconds to keep the response
+        """
+        with self._lock:
+            self._entries[key] = (json.dumps(r), time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        "Write the responses about blocks to ``path``"
+        with self._lock:
+            d = {k: v for k, (v, t) in self._entries.items() if t == math.inf}
+        with open(f"{self.path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(d, f)
+        os.replace(f"{self.path}.tmp", self.path)
+
+
+class _Flight:  # pylint: disable=too-few-public-methods
+    "a call in flight and its number of callers"
+
+    def __init__(self, future: "concurrent.futures.Future[Any] | asyncio.Future[Any]"):
+        self.future = future
+        self.callers = 1
+
+
+class SingleFlight:
+    """Coalescer of identical requests in flight. The first caller of a request
+    makes it, and callers arriving before the response share it, or its error.
+    Callers of a shared response each get a copy of it. Assign it to
+    ``RPC.coalesce`` to use it.
+    """
+
+    def __init__(self) -> None:
+        self.calls = self.shared = 0
+        self._lock = threading.Lock()
+        self._futures: dict[str, _Flight] = {}
+        self._tasks: dict[tuple[asyncio.AbstractEventLoop, str], _Flight] = {}
+
+    def call(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Call a function, or wait for the call in flight with the same key
+
+        :arg key: canonical request
+        :arg fn: function making the request
+        :return: its result
+        """
+        leader = False
+        with self._lock:
+            flight = self._futures.get(key)
+            if flight:
+                flight.callers += 1
+                self.shared += 1
+            else:
+                flight = self._futures[key] = _Flight(concurrent.futures.Future())
+                self.calls += 1
+                leader = True
+        f = flight.future
+        assert isinstance(f, concurrent.futures.Future)
+        if not leader:
+            return copy.deepcopy(f.result())
+        try:
+            r = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._futures[key]
+            f.set_exception(e)
+            raise
+        with self._lock:
+            del self._futures[key]
+            shared = flight.callers > 1
+        f.set_result(r)
+        return copy.deepcopy(r) if shared else r
+
+    async def acall(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await a coroutine function, or the call in flight with the same key.
+        The call goes on if its callers are cancelled.
+
+        :arg key: canonical request
+        :arg fn: coroutine function making the request
+        :return: its result
+        """
+        k = (asyncio.get_running_loop(), key)
+        with self._lock:
+            flight = self._tasks.get(k)
+            if flight:
+                flight.callers += 1
+                self.shared += 1
+            else:
+                t = asyncio.ensure_future(fn())
+                flight = self._tasks[k] = _Flight(t)
+                t.add_done_callback(lambda _: self._tasks.pop(k))
+                self.calls += 1
+        assert isinstance(flight.future, asyncio.Future)
+        r = await asyncio.shield(flight.future)
+        return copy.deepcopy(r) if flight.callers > 1 else r
+
+
+class Limiter:  # pylint: disable=too-many-instance-attributes
+    """Token bucket and adaptive concurrency limit in front of RPC requests,
+    shared by threads and event loops. A request takes the tokens of the weight
+    of its action, refilled at ``rate`` per second up to ``burst``, and waits
+    while ``limit`` requests are in flight. The limit grows by one per ``limit``
+    requests answered within ``target`` seconds, and is multiplied by
+    ``backoff`` once per round of requests when one fails or is slower.
+    Assign it to ``RPC.limiter`` to use it.
+
+    :arg rate: tokens per second, inf to not limit the rate
+    :arg burst: maximum tokens, defaults to rate
+    :arg limit: initial concurrency limit
+    :arg target: seconds above which a response counts as congestion
+    :arg weights: tokens per request by action, defaults to ``weights``
+    :raises ValueError: if rate is not a positive number
+    """
+
+    weights = {
+        "account_history": 2.0,
+        "accounts_balances": 2.0,
+        "accounts_frontiers": 2.0,
+        "accounts_receivable": 2.0,
+        "blocks_info": 2.0,
+        "delegators": 5.0,
+        "frontiers": 5.0,
+        "ledger": 10.0,
+        "unopened": 10.0,
+        "work_generate": 10.0,
+    }
+    "tokens per request by action, 1 for the others"
+    backoff = 0.5
+    "factor of the concurrency limit on congestion"
+    min_limit = 1.0
+    "minimum concurrency limit"
+    max_limit = 256.0
+    "maximum concurrency limit"
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        rate: float = math.inf,
+        burst: float = 0,
+        limit: float = 8,
+        target: float = 1.0,
+        weights: dict[str, float] | None = None,
+    ):
+        if rate <= 0 or math.isnan(rate):
+            raise ValueError("The rate must be positive")
+        self.rate = rate
+        self.burst = burst or rate
+        self.limit = limit
+        self.target = target
+        if weights is not None:
+            self.weights = weights
+        self.tokens = self.burst
+        self.in_flight = 0
+        self._stamp = self._cut = time.monotonic()
+        self._cond = threading.Condition()
+        self._line: collections.deque[object] = collections.deque()
+        self._futures: list[tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = []
+
+    def _take(self, action: str, ticket: object) -> float | None:
+        """Take a slot and the tokens of a request if available and first in
+        line, under the lock
+
+        :arg action: RPC action
+        :arg ticket: place in line of the request
+        :return: 0 if taken, else seconds until the tokens are refilled, or None
+          to wait for a request to end or the requests ahead
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+        w = min(self.weights.get(action, 1.0), self.burst)
+        if self._line[0] is not ticket or self.in_flight >= int(self.limit):
+            return None
+        if self.tokens < w:
+            return (w - self.tokens) / self.rate
+        self.tokens -= w
+        self.in_flight += 1
+        self._line.popleft()
+        self._notify()
+        return 0
+
+    def _leave(self, ticket: object) -> None:
+        "Leave the line if still in it, under the lock"
+        if ticket in self._line:
+            self._line.remove(ticket)
+            self._notify()
+
+    def _notify(self) -> None:
+        "Wake the waiting threads and coroutines, under the lock"
+        self._cond.notify_all()
+        for loop, f in self._futures:
+            loop.call_soon_threadsafe(self._wake, f)
+        self._futures.clear()
+
+    @staticmethod
+    def _wake(f: "asyncio.Future[None]") -> None:
+        "Wake a waiting coroutine, unless it was cancelled"
+        if not f.done():
+            f.set_result(None)
+
+    @property
+    def waiting(self) -> int:
+        "number of requests waiting"
+        return len(self._line)
+
+    def acquire(self, action: str) -> float:
+        """Wait for a slot and the tokens of a request, after the requests
+        already waiting
+
+        :arg action: RPC action
+        :return: time the request starts, to pass to :meth:`release`
+        """
+        ticket = object()
+        with self._cond:
+            self._line.append(ticket)
+            try:
+                while (d := self._take(action, ticket)) != 0:
+                    self._cond.wait(d)
+            finally:
+                self._leave(ticket)
+        return time.monotonic()
+
+    async def aacquire(self, action: str) -> float:
+        """Wait for a slot and the tokens of a request, after the requests
+        already waiting, without blocking the event loop
+
+        :arg action: RPC action
+        :return: time the request starts, to pass to :meth:`release`
+        """
+        loop = asyncio.get_running_loop()
+        ticket = object()
+        with self._cond:
+            self._line.append(ticket)
+        try:
+            while True:
+                f = loop.create_future()
+                with self._cond:
+                    d = self._take(action, ticket)
+                    if d == 0:
+                        return time.monotonic()
+                    self._futures.append((loop, f))
+                timer = None if d is None else loop.call_later(d, self._wake, f)
+                try:
+                    await f
+                finally:
+                    if timer:
+                        timer.cancel()
+        finally:
+            with self._cond:
+                self._leave(ticket)
+
+    def release(self, started: float, error: bool = False) -> None:
+        """End a request, adapting the concurrency limit to its outcome
+
+        :arg started: time the request started, from :meth:`acquire`
+        :arg error: whether the request failed
+        """
+        now = time.monotonic()
+        with self._cond:
+            self.in_flight -= 1
+            if error or now - started > self.target:
+                if started >= self._cut:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._cut = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._notify()
+
+
+class Offline:
+    """Answers of the actions computable without a node, from
+    :class:`nanopy.Network`, :func:`nanopy.deterministic_key`, the ext module
+    and :class:`nanopy.StateBlock`, like the node would answer them. Requests it
+    cannot answer, e.g. the hash of a legacy block, go to the node. Assign it to
+    ``RPC.offline`` to use it.
+    """
+
+    actions = frozenset(
+        {
+            "account_get",
+            "account_key",
+            "block_hash",
+            "deterministic_key",
+            "key_expand",
+            "nano_to_raw",
+            "raw_to_nano",
+            "validate_account_number",
+            "work_validate",
+        }
+    )
+    "actions answered offline"
+
+    def __init__(self) -> None:
+        self.answered = 0
+
+    def answer(self, data: dict[str, Any]) -> Any:
+        """Answer a request
+
+        :arg data: the request
+        :return: JSON response, None if the node must answer it
+        """
+        if data["action"] not in self.actions:
+            return None
+        r = getattr(self, f"_{data['action']}")(data)
+        self.answered += r is not None
+        return r
+
+    def many(self, reqs: Iterable[dict[str, Any]]) -> list[Any]:
+        """Answer many requests, validating the work of the ``work_validate``
+        requests in one batch
+
+        :arg reqs: requests
+        :return: JSON response of each request, None if the node must answer it
+        """
+        reqs = list(reqs)
+        r: list[Any] = [None] * len(reqs)
+        batch: list[tuple[int, int, bytes]] = []
+        for i, data in enumerate(reqs):
+            if (
+                data["action"] != "work_validate"
+                or data.get("version", "work_1") != "work_1"
+                or self._work_error(data) is not None
+            ):
+                r[i] = self.answer(data)
+            else:
+                batch.append((i, int(data["work"], 16), bytes.fromhex(data["hash"])))
+        if batch:
+            works = array.array("Q", [w for _, w, _ in batch])
+            _, achieved = ext.work_validate_many(
+                works, b"".join(h for _, _, h in batch), 0
+            )
+            for (i, _, _), d in zip(batch, array.array("Q", achieved)):
+                r[i] = self._work(reqs[i], d)
+                self.answered += 1
+        return r
+
+    @staticmethod
+    def _hex(value: Any, n: int) -> bool:
+        "whether value is n hex chars"
+        return isinstance(value, str) and bool(
+            re.fullmatch(f"[0-9a-f]{{{n}}}", value, re.I)
+        )
+
+    @staticmethod
+    def _pk(account: Any) -> str:
+        "public key of an account, empty if invalid"
+        if not isinstance(account, str):
+            return ""
+        try:
+            return npy.Account.network.to_pk(Offline._nano(account))
+        except ValueError:
+            return ""
+
+    @staticmethod
+    def _nano(account: Any) -> Any:
+        "account with the legacy xrb_ prefix of the nano network replaced"
+        if isinstance(account, str) and account.startswith("xrb_"):
+            if npy.Account.network.prefix == "nano_":
+                return "nano_" + account[4:]
+        return account
+
+    @staticmethod
+    def _keys(sk: str) -> dict[str, str]:
+        "private and public keys and account of a private key"
+        acc = npy.Account(sk=sk.lower())
+        return {"private": sk.upper(), "public": acc.pk.upper(), "account": acc.addr}
+
+    def _validate_account_number(self, data: dict[str, Any]) -> Any:
+        return {"valid": "1" if self._pk(data["account"]) else "0"}
+
+    def _account_key(self, data: dict[str, Any]) -> Any:
+        pk = self._pk(data["account"])
+        return {"key": pk.upper()} if pk else {"error": "Bad account number"}
+
+    def _account_get(self, data: dict[str, Any]) -> Any:
+        if not self._hex(data["key"], 64):
+            return {"error": "Bad public key"}
+        return {"account": npy.Account.network.from_pk(data["key"].lower())}
+
+    def _deterministic_key(self, data: dict[str, Any]) -> Any:
+        if not self._hex(data["seed"], 64):
+            return {"error": "Bad seed"}
+        try:
+            i = int(data["index"])
+        except (TypeError, ValueError):
+            return {"error": "Invalid index"}
+        if not 0 <= i < 1 << 32:
+            return {"error": "Invalid index"}
+        return self._keys(npy.deterministic_key(data["seed"].lower(), i))
+
+    def _key_expand(self, data: dict[str, Any]) -> Any:
+        if not self._hex(data["key"], 64):
+            return {"error": "Bad private key"}
+        return self._keys(data["key"])
+
+    def _block_hash(self, data: dict[str, Any]) -> Any:
+        block = data["block"]
+        if isinstance(block, str):
+            block = json.loads(block)
+        if block.get("type") != "state":
+            return None
+        block = block | {
+            k: self._nano(block[k]) for k in ("account", "representative") if k in block
+        }
+        try:
+            b = npy.StateBlock.from_dict(block | {"signature": "", "work": ""})
+        except (KeyError, TypeError, ValueError):
+            return {"error": "Block is invalid"}
+        if not (self._hex(b.prev, 64) and self._hex(b.link, 64)):
+            return {"error": "Block is invalid"}
+        if not 0 <= b.bal < 1 << 128:
+            return {"error": "Block is invalid"}
+        return {"hash": b.hash_.upper()}
+
+    def _work_error(self, data: dict[str, Any]) -> Any:
+        "error of a work_validate request, None if valid"
+        if not self._hex(data["work"], 16):
+            return {"error": "Bad work"}
+        if not self._hex(data["hash"], 64):
+            return {"error": "Bad hash number"}
+        if "difficulty" in data and not self._hex(data["difficulty"], 16):
+            return {"error": "Bad difficulty"}
+        try:
+            if fractions.Fraction(data.get("multiplier", 1)) <= 0:
+                raise ValueError
+        except (OverflowError, TypeError, ValueError):
+            return {"error": "Bad multiplier"}
+        return None
+
+    @staticmethod
+    def _work(data: dict[str, Any], d: int) -> Any:
+        "response of a work_validate request for work of difficulty d"
+        n = npy.Account.network
+        r = {
+            "valid_all": "1" if d >= int(n.send_difficulty, 16) else "0",
+            "valid_receive": "1" if d >= int(n.receive_difficulty, 16) else "0",
+            "difficulty": f"{d:016x}",
+            "multiplier": f"{float(n.to_multiplier(f'{d:016x}')):.15f}",
+        }
+        if "multiplier" in data:
+            threshold = n.from_multiplier(fractions.Fraction(data["multiplier"]))
+            r["valid"] = "1" if d >= int(threshold, 16) else "0"
+        elif "difficulty" in data:
+            r["valid"] = "1" if d >= int(data["difficulty"], 16) else "0"
+        return r
+
+    def _work_validate(self, data: dict[str, Any]) -> Any:
+        if data.get("version", "work_1") != "work_1":
+            return None
+        e = self._work_error(data)
+        if e is not None:
+            return e
+        w = int(data["work"], 16)
+        return self._work(data, ext.work_difficulty(w, bytes.fromhex(data["hash"])))
+
+    @staticmethod
+    def _decimal(value: Any) -> decimal.Decimal | None:
+        "a non-negative decimal amount, None if invalid"
+        try:
+            a = decimal.Decimal(value)
+        except (TypeError, decimal.InvalidOperation):
+            return None
+        return a if a.is_finite() and a >= 0 else None
+
+    def _nano_to_raw(self, data: dict[str, Any]) -> Any:
+        a = self._decimal(data["amount"])
+        if a is None or a.scaleb(npy.Account.network.exp) % 1:
+            return {"error": "Invalid amount number"}
+        raw = int(a.scaleb(npy.Account.network.exp))
+        return {"amount": str(raw)} if raw < 1 << 128 else {"error": "Amount too big"}
+
+    def _raw_to_nano(self, data: dict[str, Any]) -> Any:
+        a = self._decimal(data["amount"])
+        if a is None or a % 1:
+            return {"error": "Invalid amount number"}
+        if a >= 1 << 128:
+            return {"error": "Amount too big"}
+        nano = npy.Account.network.from_raw(int(a))
+        return {"amount": nano.rstrip("0").rstrip(".")}
+
+
+@functools.lru_cache(maxsize=65536)
+def _pk(prefix: str, addr: str) -> str:
+    "public key of an address, checked once per address and network prefix"
+    return npy.Network(prefix=prefix).to_pk(addr)
+
+
+class Response(collections.abc.Mapping[str, Any]):
+    """Typed view of a JSON response, whose fields are decoded and validated on
+    first access and then memoized. Raw amounts, counts, heights and timestamps
+    are ints, amounts in nano of the actions in ``units`` are Decimals, hashes,
+    signatures and work are bytes, and accounts are :class:`nanopy.Account`.
+    Objects are :class:`Response` and arrays tuples. Values of other fields, and
+    of object members keyed by account or hash, are decoded by their shape.
+    Fields are also attributes, e.g. ``r.balances[account].balance``.
+
+    :arg raw: JSON response
+    :arg action: RPC action of the response
+    """
+
+    __slots__ = ("raw", "action", "_memo")
+
+    units = frozenset({"raw_to_nano"})
+    "actions whose amounts are in nano instead of raw"
+
+    _ints = frozenset(
+        {
+            "account_version",
+            "amount",
+            "balance",
+            "block_count",
+            "cemented",
+            "confirmation_height",
+            "count",
+            "height",
+            "local_timestamp",
+            "modified_timestamp",
+            "pending",
+            "receivable",
+            "unchecked",
+            "weight",
+        }
+    )
+    _hashes = frozenset(
+        {
+            "confirmation_height_frontier",
+            "frontier",
+            "hash",
+            "link",
+            "open_block",
+            "previous",
+            "representative_block",
+            "signature",
+            "successor",
+            "work",
+        }
+    )
+    _accounts = frozenset(
+        {"account", "block_account", "link_as_account", "representative"}
+    )
+    _uint = re.compile("[0-9]{1,39}")
+    _udbl = re.compile(r"[0-9]{1,39}(?:\.[0-9]+)?")
+    _hex = re.compile("(?:[0-9a-fA-F]{2}){8,64}")
+    _hash = re.compile("[0-9a-fA-F]{64}")
+    _account = re.compile("[a-z]{3,4}_[0-9a-z]{60}")
+
+    def __init__(self, raw: dict[str, Any], action: str = ""):
+        self.raw = raw
+        self.action = action
+        self._memo: dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        v = self._memo[key] = self._decode(key, self.raw[key], self.action)
+        return v
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError as e:
+            raise AttributeError(name) from e
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.raw)
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __repr__(self) -> str:
+        return f"Response({self.raw!r})"
+
+    @classmethod
+    def _decode(cls, key: str, v: Any, action: str = "") -> Any:
+        """Decode a value of a field
+
+        :arg key: name of the field, or account or hash of an object member
+        :arg v: JSON value
+        :arg action: RPC action of the response
+        :return: decoded value
+        :raises ValueError: if the value is not valid for the field
+        """
+        if isinstance(v, dict):
+            return Response(v, action)
+        if isinstance(v, list):
+            return tuple(cls._decode(key, x, action) for x in v)
+        if not isinstance(v, str):
+            raise ValueError(f"Invalid {key}: {v!r}")
+        if key in cls._ints:
+            return cls._amount(key, v, action in cls.units)
+        if key in cls._hashes:
+            if not cls._hex.fullmatch(v):
+                raise ValueError(f"Invalid {key}: {v!r}")
+            return bytes.fromhex(v)
+        if key in cls._accounts or cls._account.fullmatch(v):
+            return npy.Account(pk=_pk(npy.Account.network.prefix, v))
+        return cls._shape(v)
+
+    @classmethod
+    def _amount(cls, key: str, v: str, nano: bool) -> int | decimal.Decimal:
+        "integer of a raw amount or count, Decimal of an amount in nano"
+        if nano and cls._udbl.fullmatch(v):
+            return decimal.Decimal(v)
+        if nano or not cls._uint.fullmatch(v) or int(v) >= 1 << 128:
+            raise ValueError(f"Invalid {key}: {v!r}")
+        return int(v)
+
+    @classmethod
+    def _shape(cls, v: str) -> Any:
+        "value decoded by its shape, a hash or a number, else the string"
+        if cls._hash.fullmatch(v):
+            return bytes.fromhex(v)
+        return int(v) if cls._uint.fullmatch(v) else v
+
+
+class _Series:  # pylint: disable=too-few-public-methods
+    "histogram of the durations of a phase of an action, with bytes and errors"
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)
+        self.sum = 0.0
+        self.bytes = 0
+        self.errors: collections.Counter[str] = collections.Counter()
+
+
+class Metrics:
+    """Recorder of the phases of RPC requests, keeping a histogram of their
+    durations, the bytes decoded and a count of errors per action and phase.
+    Assign it to ``RPC.metrics`` to use it. The phases are ``request``, from
+    call to validated response, cache and retries included, ``network``, one
+    attempt to get the response, ``decode``, parsing its JSON,
+    ``schema-validate``, ``block-validate`` and ``throttle``, waiting for the
+    ``RPC.limiter``, whose state is kept in ``gauges``. Override
+    :meth:`observe` to pass the phases to other recorders or tracers.
+
+    :arg buckets: upper bounds of the histogram buckets in seconds, ascending
+    """
+
+    buckets: tuple[float, ...] = (
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        10.0,
+    )
+
+    def __init__(self, buckets: Iterable[float] | None = None):
+        if buckets is not None:
+            self.buckets = tuple(buckets)
+        self._series: dict[tuple[str, str], _Series] = {}
+        self.gauges: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._server: http.server.ThreadingHTTPServer | None = None
+
+    def observe(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, action: str, phase: str, seconds: float, size: int = 0, error: str = ""
+    ) -> None:
+        """Record a phase of a request, called as it ends
+
+        :arg action: RPC action
+        :arg phase: phase of the request, e.g. ``network``
+        :arg seconds: duration of the phase
+        :arg size: bytes of the response handled in the phase
+        :arg error: error ending the phase, the message of a node error or the
+          name of an exception, empty on success
+        """
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            s = self._series.get((action, phase))
+            if s is None:
+                s = self._series[(action, phase)] = _Series(len(self.buckets))
+            s.counts[i] += 1
+            s.sum += seconds
+            s.bytes += size
+            if error:
+                s.errors[error] += 1
+
+    def gauge(self, name: str, value: float) -> None:
+        """Record the current value of a gauge, e.g. ``limiter_limit``
+
+        :arg name: name of the gauge
+        :arg value: its value
+        """
+        with self._lock:
+            self.gauges[name] = value
+
+    def count(self, action: str, phase: str = "request") -> int:
+        """Number of phases recorded
+
+        :arg action: RPC action
+        :arg phase: phase of the request
+        """
+        s = self._series.get((action, phase))
+        return sum(s.counts) if s else 0
+
+    def errors(self, action: str, phase: str = "request") -> dict[str, int]:
+        """Number of phases ending in an error, by error
+
+        :arg action: RPC action
+        :arg phase: phase of the request
+        """
+        s = self._series.get((action, phase))
+        return dict(s.errors) if s else {}
+
+    def quantile(self, action: str, phase: str = "request", q: float = 0.5) -> float:
+        """Upper bound of the bucket holding a quantile of the durations
+
+        :arg action: RPC action
+        :arg phase: phase of the request
+        :arg q: quantile, e.g. 0.99
+        :return: seconds, inf if above the last bucket, nan if none recorded
+        """
+        s = self._series.get((action, phase))
+        n = sum(s.counts) if s else 0
+        if not s or not n:
+            return math.nan
+        total = zip(self.buckets + (math.inf,), itertools.accumulate(s.counts))
+        return next((b for b, c in total if c >= q * n), math.inf)
+
+    def exposition(self) -> str:
+        "Metrics in the Prometheus text exposition format"
+        lines = [
+            "# HELP nanopy_rpc_seconds Duration of the phases of RPC requests",
+            "# TYPE nanopy_rpc_seconds histogram",
+        ]
+        bytes_, errors = [], []
+        bounds = [repr(b) for b in self.buckets] + ["+Inf"]
+        with self._lock:
+            for (action, phase), s in sorted(self._series.items()):
+                labels = f'action="{_escape(action)}",phase="{_escape(phase)}"'
+                for b, c in zip(bounds, itertools.accumulate(s.counts)):
+                    lines.append(f'nanopy_rpc_seconds_bucket{{{labels},le="{b}"}} {c}')
+                lines.append(f"nanopy_rpc_seconds_sum{{{labels}}} {s.sum!r}")
+                lines.append(f"nanopy_rpc_seconds_count{{{labels}}} {sum(s.counts)}")
+                if s.bytes:
+                    bytes_.append(f"nanopy_rpc_bytes_total{{{labels}}} {s.bytes}")
+                for e, c in sorted(s.errors.items()):
+                    errors.append(
+                        f'nanopy_rpc_errors_total{{{labels},error="{_escape(e)}"}} {c}'
+                    )
+            gauges = sorted(self.gauges.items())
+        lines += [
+            "# HELP nanopy_rpc_bytes_total Bytes of the RPC responses",
+            "# TYPE nanopy_rpc_bytes_total counter",
+            *bytes_,
+            "# HELP nanopy_rpc_errors_total Phases of RPC requests ending in an error",
+            "# TYPE nanopy_rpc_errors_total counter",
+            *errors,
+        ]
+        for name, value in gauges:
+            lines += [f"# TYPE nanopy_rpc_{name} gauge", f"nanopy_rpc_{name} {value!r}"]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = 0, host: str = "127.0.0.1") -> int:
+        """Serve :meth:`exposition` over HTTP from a daemon thread, for a
+        Prometheus server to scrape
+
+        :arg port: port to listen on, any free port if 0
+        :arg host: address to listen on
+        :return: port
+        """
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            "answer every GET with the exposition"
+
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                "send the exposition"
+                body = metrics.exposition().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_: Any) -> None:
+                "do not log requests"
+
+        self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address[1]
+
+    def close(self) -> None:
+        "Stop serving"
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _escape(value: str) -> str:
+    "escape a Prometheus label value"
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Span:
+    "a timed phase of a request, reported to a :class:`Metrics` on exit"
+
+    __slots__ = ("metrics", "action", "phase", "size", "error", "t0")
+
+    def __init__(self, metrics: Metrics | None, action: str, phase: str):
+        self.metrics = metrics
+        self.action = action
+        self.phase = phase
+        self.size = 0
+        self.error = ""
+        self.t0 = 0.0
+
+    def __enter__(self) -> "_Span":
+        if self.metrics:
+            self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, t: type[BaseException] | None, *_: Any) -> None:
+        if self.metrics:
+            self.metrics.observe(
+                self.action,
+                self.phase,
+                time.perf_counter() - self.t0,
+                self.size,
+                self.error or (t.__name__ if t else ""),
+            )
 
 
 class RPC(ABC):  # pylint: disable=too-many-public-methods
@@ -66,6 +1320,90 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         }
     )
 
+    _validators: dict[
+        str, tuple[Callable[[Any], bool], jsonschema.protocols.Validator]
+    ] = {}
+    _modes = ("full", "sampled", "off")
+    _validation = "full"
+    sample_rate = 0.01
+    "fraction of responses validated against the schema in sampled mode"
+    chunk_size = 1000
+    """maximum number of accounts or hashes per request of bulk actions, larger
+    lists are split into chunks requested concurrently, 0 to never split"""
+    chunk_concurrency = 8
+    "maximum number of chunks of a request in flight"
+    cache: Cache | None = None
+    "response cache, None to not cache"
+    coalesce: SingleFlight | None = None
+    "coalescer of identical requests in flight, None to not coalesce"
+    limiter: Limiter | None = None
+    "rate and concurrency limiter of requests, None to not limit"
+    metrics: Metrics | None = None
+    "recorder of the phases of requests, None to not record"
+    offline: Offline | None = None
+    "answers of the actions computable without a node, None to ask the node"
+    reads = frozenset(
+        {
+            "account_balance",
+            "account_block_count",
+            "account_get",
+            "account_history",
+            "account_info",
+            "account_key",
+            "account_representative",
+            "account_weight",
+            "accounts_balances",
+            "accounts_frontiers",
+            "accounts_receivable",
+            "accounts_representatives",
+            "available_supply",
+            "block_account",
+            "block_count",
+            "block_hash",
+            "block_info",
+            "blocks",
+            "blocks_info",
+            "chain",
+            "confirmation_quorum",
+            "delegators",
+            "delegators_count",
+            "deterministic_key",
+            "frontier_count",
+            "frontiers",
+            "key_expand",
+            "ledger",
+            "nano_to_raw",
+            "raw_to_nano",
+            "receivable",
+            "receivable_exists",
+            "representatives",
+            "representatives_online",
+            "successors",
+            "telemetry",
+            "unopened",
+            "validate_account_number",
+            "version",
+            "work_validate",
+        }
+    )
+    """actions which do not change any state, so are safe to retry and to send
+    to several nodes"""
+
+    @property
+    def validation(self) -> str:
+        """Response schema validation mode. *full* validates every response,
+        *sampled* validates a random ``sample_rate`` fraction of responses and
+        *off* skips validation. Blocks are always checked for hash and
+        signature.
+        """
+        return self._validation
+
+    @validation.setter
+    def validation(self, mode: str) -> None:
+        if mode not in self._modes:
+            raise ValueError(f"Validation must be one of {', '.join(self._modes)}")
+        self._validation = mode
+
     @abstractmethod
     def request(self, data: dict[str, Any]) -> Any:
         """Make RPC request
@@ -75,20 +1413,426 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         """
         raise NotImplementedError("Implement in a derived class")
 
+    @classmethod
+    def _validator(
+        cls, action: str, schema: Callable[[], dict[str, Any]]
+    ) -> tuple[Callable[[Any], bool], jsonschema.protocols.Validator]:
+        """Get the cached validators of an action, compiling them on first use
+
+        :arg action: RPC action
+        :arg schema: function returning the JSON schema of the action response
+        :return: a fast function checking validity and a JSON schema validator
+        """
+        if action not in cls._validators:
+            s = schema()
+            v = jsonschema.validators.validator_for(s)
+            v.check_schema(s)
+            RPC._validators[action] = (_Compiler.compile(s), v(s))
+        return cls._validators[action]
+
     def _request(
-        self, data: dict[str, Any], schema: dict[str, Any] | None = None
+        self,
+        data: dict[str, Any],
+        schema: Callable[[], dict[str, Any]] | None = None,
+        check: Callable[[dict[str, Any], Any], None] | None = None,
     ) -> Any:
         """Make a request and validate response with JSON schema
 
         :arg data: dict like object
-        :arg schema: JSON schema to validate response
+        :arg schema: function returning JSON schema to validate response
+        :arg check: function of the request and response to further validate it,
+          e.g. blocks
         :return: JSON reponse as dict
         """
-        r = self.request(data)
-        if schema:
-            jsonschema.validate(r, schema)
+        with self._span(data["action"], "request") as s:
+            r = None if self.offline is None else self.offline.answer(data)
+            if r is None and (
+                self.cache is None or not self.cache.caches(data["action"])
+            ):
+                r = self._fetch(data, schema, check)
+            elif r is None:
+                rest, r = self._cached(data)
+                if rest is not None:
+                    r = self._store(data, self._fetch(rest, schema, check), r)
+            s.error = str(r.get("error", "")) if isinstance(r, dict) else ""
+        return r
+
+    def _span(self, action: str, phase: str) -> _Span:
+        """Time a phase of a request for ``metrics``
+
+        :arg action: RPC action
+        :arg phase: phase of the request
+        :return: context manager, whose ``size`` and ``error`` may be set
+        """
+        return _Span(self.metrics, action, phase)
+
+    def _fetch(
+        self,
+        data: dict[str, Any],
+        schema: Callable[[], dict[str, Any]] | None = None,
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Any:
+        """Make a request and validate the response, once for identical read-only
+        requests in flight if coalescing
+
+        :arg data: dict like object
+        :arg schema: function returning JSON schema to validate response
+        :arg check: function of the request and response to further validate it,
+          e.g. blocks
+        :return: JSON reponse as dict
+        """
+        if self.coalesce is None or data["action"] not in RPC.reads:
+            return self._validate(data, self._limited(data), schema, check)
+        return self.coalesce.call(
+            self._flight(data),
+            lambda: self._validate(data, self._limited(data), schema, check),
+        )
+
+    def _limited(self, data: dict[str, Any]) -> Any:
+        """Make a request, through the ``limiter`` if any
+
+        :arg data: dict like object
+        :return: JSON reponse as dict
+        """
+        if self.limiter is None:
+            return self.request(data)
+        with self._span(data["action"], "throttle"):
+            started = self.limiter.acquire(data["action"])
+        self._gauge()
+        error = True
+        try:
+            r = self.request(data)
+            error = False
+        finally:
+            self.limiter.release(started, error)
+            self._gauge()
+        return r
+
+    def _gauge(self) -> None:
+        "Record the state of the ``limiter`` in ``metrics``"
+        if self.metrics and self.limiter:
+            self.metrics.gauge("limiter_limit", self.limiter.limit)
+            self.metrics.gauge("limiter_in_flight", self.limiter.in_flight)
+            self.metrics.gauge("limiter_waiting", self.limiter.waiting)
+
+    @staticmethod
+    def _key(data: dict[str, Any]) -> str:
+        "canonical request"
+        return json.dumps(data, sort_keys=True)
+
+    def _flight(self, data: dict[str, Any]) -> str:
+        "canonical request to the node of the client, with its validation"
+        node = getattr(self, "url", None) or f"{type(self).__name__}@{id(self)}"
+        return json.dumps([node, self._validation, data], sort_keys=True)
+
+    @classmethod
+    def _block_key(cls, data: dict[str, Any], h: str) -> str:
+        "canonical request of a block of blocks or blocks_info"
+        d = {k: v for k, v in data.items() if k != "include_not_found"}
+        return cls._key(d | {"hashes": [h]})
+
+    @staticmethod
+    def _immutable(data: dict[str, Any], r: Any) -> bool:
+        "whether a response, or a block of blocks and blocks_info, cannot change"
+        action = data["action"]
+        if action in ("block_info", "blocks_info"):
+            return (
+                r.get("confirmed") == "true"
+                and r.get("successor", "0" * 64) != "0" * 64
+                and not data.get("pending")
+                and not data.get("receive_hash")
+            )
+        if action == "chain":
+            return not data.get("reverse") and "blocks" in r
+        return action == "blocks" or action == "block_account" and "account" in r
+
+    def _cached(self, data: dict[str, Any]) -> tuple[dict[str, Any] | None, Any]:
+        """Look up a request in the cache. Blocks of blocks and blocks_info are
+        looked up one at a time.
+
+        :arg data: dict like object
+        :return: the request for what is not cached, None if all is, and the
+          cached response
+        """
+        assert self.cache is not None
+        if data["action"] in ("blocks", "blocks_info"):
+            hit, rest = {}, []
+            for h in data["hashes"]:
+                b = self.cache.get(self._block_key(data, h))
+                if b is None:
+                    rest.append(h)
+                else:
+                    hit[h] = b
+            if rest:
+                return data | {"hashes": rest}, hit
+            if data.get("include_not_found"):
+                return None, {"blocks": hit, "blocks_not_found": []}
+            return None, {"blocks": hit}
+        r = self.cache.get(self._key(data))
+        return (data, None) if r is None else (None, r)
+
+    def _store(self, data: dict[str, Any], r: Any, hit: Any) -> Any:
+        """Cache what cannot change in a response, or a volatile response for a
+        while, and merge the cached part of the response
+
+        :arg data: the request
+        :arg r: JSON response to the part that was not cached
+        :arg hit: the cached part of the response
+        :return: JSON reponse as dict
+        """
+        assert self.cache is not None
+        if "error" in r:
+            return r
+        action = data["action"]
+        if action in ("blocks", "blocks_info"):
+            for h, b in r["blocks"].items():
+                if self._immutable(data, b):
+                    self.cache.put(self._block_key(data, h), b)
+            blocks = hit | r["blocks"]
+            r = r | {"blocks": {h: blocks[h] for h in data["hashes"] if h in blocks}}
+        elif self._immutable(data, r):
+            self.cache.put(self._key(data), r)
+        elif action in self.cache.ttl:
+            self.cache.put(self._key(data), r, self.cache.ttl[action])
+        return r
+
+    def _validate(
+        self,
+        data: dict[str, Any],
+        r: Any,
+        schema: Callable[[], dict[str, Any]] | None = None,
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Any:
+        """Validate a response
+
+        :arg data: the request
+        :arg r: JSON response
+        :arg schema: function returning JSON schema to validate response
+        :arg check: function of the request and response to further validate it,
+          e.g. blocks
+        :return: JSON reponse as dict
+        """
+        sample = self._validation == "sampled" and random.random() < self.sample_rate
+        if schema and (self._validation == "full" or sample):
+            with self._span(data["action"], "schema-validate"):
+                is_valid, v = self._validator(data["action"], schema)
+                if not is_valid(r):
+                    e = jsonschema.exceptions.best_match(v.iter_errors(r))
+                    if e:
+                        raise e
+        if check and "error" not in r:
+            with self._span(data["action"], "block-validate"):
+                check(data, r)
         return r
 
+    def _bulk(
+        self,
+        data: dict[str, Any],
+        key: str,
+        schema: Callable[[], dict[str, Any]] | None,
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Any:
+        """Make a request of a bulk action. A list ``data[key]`` longer than
+        ``chunk_size`` is split into chunks, which are requested concurrently and
+        the responses merged.
+
+        :arg data: dict like object
+        :arg key: key of the accounts or hashes in data
+        :arg schema: function returning JSON schema to validate response
+        :arg check: function of the request and response to further validate it,
+          e.g. blocks
+        :return: JSON reponse as dict
+        :raises ChunkError: if any chunk fails
+        """
+        items, n = data[key], self.chunk_size
+        if n <= 0 or not isinstance(items, list) or len(items) <= n:
+            return self._request(data, schema, check)
+        chunks = [items[i : i + n] for i in range(0, len(items), n)]
+        calls: list[Callable[[], Any]] = [
+            functools.partial(self._request, data | {key: chunk}, schema, check)
+            for chunk in chunks
+        ]
+        return self._gather(calls, functools.partial(self._merge, chunks))
+
+    def _gather(
+        self, calls: list[Callable[[], Any]], merge: Callable[[list[Any]], Any]
+    ) -> Any:
+        """Make requests concurrently from a pool of ``chunk_concurrency`` threads
+
+        :arg calls: functions making a request each
+        :arg merge: function combining the responses, or exceptions, of the calls
+        :return: merged response
+        """
+        workers = min(len(calls), self.chunk_concurrency)
+        with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+            futures = [pool.submit(c) for c in calls]
+        return merge([f.exception() or f.result() for f in futures])
+
+    @staticmethod
+    def _merge(chunks: list[list[str]], responses: list[Any]) -> Any:
+        """Merge the responses to the chunks of a bulk request into one
+
+        :arg chunks: accounts or hashes of each chunk
+        :arg responses: JSON response, or exception, of each chunk
+        :return: JSON reponse as dict
+        :raises ChunkError: if any chunk fails
+        """
+        merged: dict[str, Any] = {}
+        errors: dict[int, BaseException] = {}
+        for i, r in enumerate(responses):
+            if isinstance(r, BaseException):
+                errors[i] = r
+            elif "error" in r:
+                errors[i] = RuntimeError(r["error"])
+            else:
+                for k, v in r.items():
+                    if isinstance(v, dict):
+                        merged.setdefault(k, {}).update(v)
+                    elif isinstance(v, list):
+                        merged.setdefault(k, []).extend(v)
+                    else:
+                        merged.setdefault(k, v)
+        if errors:
+            raise ChunkError(errors, chunks, merged)
+        return merged
+
+    def stream(self, action: str, *args: Any, **kwargs: Any) -> Any:
+        """Make the request of an action, like its method, and parse the response
+        incrementally. Each entry is validated as it arrives and the entries of
+        the first object or array member of the response are yielded one at a
+        time, as (key, value) tuples for an object. Other members are validated
+        and dropped.
+
+        :arg action: name of the method of the action, e.g. ``"ledger"``
+        :arg args: arguments of the method
+        :arg kwargs: keyword arguments of the method
+        :return: iterator of the entries, asynchronous in async clients
+        :raises ValueError: if the response of the action is not made of entries
+        :raises RuntimeError: if the node returns an error
+        """
+        return getattr(type(self), action)(_Streaming(self), *args, **kwargs)
+
+    def typed(self, action: str, *args: Any, **kwargs: Any) -> Any:
+        """Make the request of an action, like its method, and return a
+        :class:`Response`, whose fields are decoded and validated on first
+        access instead of validating the whole response against the schema.
+        Blocks are still checked for hash and signature.
+
+        :arg action: name of the method of the action, e.g. ``"accounts_balances"``
+        :arg args: arguments of the method
+        :arg kwargs: keyword arguments of the method
+        :return: the response, awaitable in async clients
+        """
+        return getattr(type(self), action)(_Typed(self), *args, **kwargs)
+
+    def _events(self, data: dict[str, Any]) -> Any:
+        """Make a request and parse the response incrementally
+
+        :arg data: dict like object
+        :return: iterator of the tuples of :class:`_JSONStream`
+        """
+        return _members(self._limited(data))
+
+    def _stream(
+        self,
+        data: dict[str, Any],
+        schema: Callable[[], dict[str, Any]] | None = None,
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Any:
+        """Make a request and yield the entries of the response
+
+        :arg data: dict like object
+        :arg schema: function returning JSON schema to validate response
+        :arg check: function of the request and response to further validate it,
+          e.g. blocks
+        :return: iterator of the entries
+        """
+        yield from self._entries(data, self._events(data), schema, check)
+
+    def _entries(
+        self,
+        data: dict[str, Any],
+        events: Iterable[tuple[str, Any, Any]],
+        schema: Callable[[], dict[str, Any]] | None = None,
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Iterator[Any]:
+        """Validate a response one entry at a time and yield the entries of its
+        first object or array member
+
+        :arg data: the request
+        :arg events: the tuples of :class:`_JSONStream` for the response
+        :arg schema: function returning JSON schema to validate response
+        :arg check: function of the request and response to further validate it,
+          e.g. blocks
+        :return: iterator of the entries
+        """
+
+        def part(required: bool) -> dict[str, Any]:
+            "the required members in the schema, or the rest of it"
+            assert schema
+            return {k: v for k, v in schema().items() if (k == "anyOf") == required}
+
+        entry = required = None
+        if schema:
+            entry = functools.partial(part, False)
+            required = functools.partial(part, True)
+        members: dict[str, None] = {}
+        streamed = None
+        for member, key, value in events:
+            if member == "error":
+                raise RuntimeError(value)
+            c = None
+            if key is None:
+                members[member] = None
+                r = {member: value}
+                if streamed is None and isinstance(value, (dict, list)):
+                    streamed = member
+            elif isinstance(key, int):
+                r = {member: [value]}
+            else:
+                r = {member: {key: value}}
+                c = check
+            self._validate({"action": f"{data['action']} entry"}, r, entry, c)
+            if member == streamed and key is not None:
+                yield value if isinstance(key, int) else (key, value)
+        self._validate({"action": f"{data['action']} members"}, members, required)
+
+    def _paginate(
+        self,
+        fetch: Callable[..., Any],
+        params: dict[str, Any],
+        advance: Callable[[dict[str, Any], Any], dict[str, Any] | None],
+        entries: Callable[[Any], Iterable[Any]],
+    ) -> Any:
+        """Yield the entries of the pages of an action. The next page is
+        requested from a thread while the entries of the current one are
+        consumed.
+
+        :arg fetch: method of the action
+        :arg params: arguments of the first page
+        :arg advance: function of the arguments and response of a page returning
+          the arguments of the next page, None after the last page
+        :arg entries: function returning the entries of a response
+        :return: iterator of the entries
+        :raises RuntimeError: if the node returns an error
+        """
+        with concurrent.futures.ThreadPoolExecutor(1) as pool:
+            f: concurrent.futures.Future[Any] | None = pool.submit(fetch, **params)
+            while f:
+                r = f.result()
+                if "error" in r:
+                    raise RuntimeError(r["error"])
+                p = advance(params, r)
+                f = pool.submit(fetch, **p) if p else None
+                params = p or params
+                yield from entries(r)
+
+    @staticmethod
+    def _next_account(account: str) -> str:
+        "the account with the next public key"
+        n = npy.Network(prefix=account[:-60])
+        return n.from_pk(f"{int(n.to_pk(account), 16) + 1:064x}")
+
     def account_balance(self, account: str, include_only_confirmed: bool = True) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#account_balance"
         data: dict[str, Any] = {}
@@ -96,30 +1840,36 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["account"] = account
         if not include_only_confirmed:
             data["include_only_confirmed"] = False
-        s = RPC._Dict(
-            {
-                "balance": RPC._UInt,
-                "pending": RPC._UInt,
-                "receivable": RPC._UInt,
-            }
-        ) | RPC._Req(["balance", "pending", "receivable"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "balance": RPC._UInt,
+                    "pending": RPC._UInt,
+                    "receivable": RPC._UInt,
+                }
+            )
+            | RPC._Req(["balance", "pending", "receivable"]),
+        )
 
     def account_block_count(self, account: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#account_block_count"
         data: dict[str, Any] = {}
         data["action"] = "account_block_count"
         data["account"] = account
-        s = RPC._Dict({"block_count": RPC._UInt}) | RPC._Req(["block_count"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict({"block_count": RPC._UInt}) | RPC._Req(["block_count"]),
+        )
 
     def account_get(self, key: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#account_get"
         data: dict[str, Any] = {}
         data["action"] = "account_get"
         data["key"] = key
-        s = RPC._Dict({"account": RPC._Acc}) | RPC._Req(["account"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"account": RPC._Acc}) | RPC._Req(["account"])
+        )
 
     def account_history(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
@@ -149,26 +1899,29 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["reverse"] = reverse
         if account_filter:
             data["account_filter"] = account_filter
-        s = RPC._Dict(
-            {
-                "account": RPC._Acc,
-                "history": RPC._List(
-                    RPC._Dict(
-                        {
-                            "type": RPC._Type,
-                            "account": RPC._Acc,
-                            "amount": RPC._UInt,
-                            "local_timestamp": RPC._UInt,
-                            "height": RPC._UInt,
-                            "hash": RPC._H64,
-                            "confirmed": RPC._Bool,
-                        }
-                    )
-                ),
-                "previous": RPC._H64,
-            }
-        ) | RPC._Req(["account", "history"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "account": RPC._Acc,
+                    "history": RPC._List(
+                        RPC._Dict(
+                            {
+                                "type": RPC._Type,
+                                "account": RPC._Acc,
+                                "amount": RPC._UInt,
+                                "local_timestamp": RPC._UInt,
+                                "height": RPC._UInt,
+                                "hash": RPC._H64,
+                                "confirmed": RPC._Bool,
+                            }
+                        )
+                    ),
+                    "previous": RPC._H64,
+                }
+            )
+            | RPC._Req(["account", "history"]),
+        )
 
     def account_info(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
@@ -190,64 +1943,72 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["weight"] = True
         if pending:
             data["pending"] = True
-        s = RPC._Dict(
-            {
-                "frontier": RPC._H64,
-                "open_block": RPC._H64,
-                "representative_block": RPC._H64,
-                "balance": RPC._UInt,
-                "confirmed_balance": RPC._UInt,
-                "modified_timestamp": RPC._UInt,
-                "block_count": RPC._UInt,
-                "account_version": RPC._UInt,
-                "confirmation_height": RPC._UInt,
-                "confirmation_height_frontier": RPC._H64,
-                "representative": RPC._Acc,
-                "confirmed_representative": RPC._Acc,
-                "weight": RPC._UInt,
-                "pending": RPC._UInt,
-                "receivable": RPC._UInt,
-                "confirmed_pending": RPC._UInt,
-                "confirmed_receivable": RPC._UInt,
-            }
-        ) | RPC._Req(
-            [
-                "frontier",
-                "open_block",
-                "representative_block",
-                "balance",
-                "modified_timestamp",
-                "block_count",
-                "account_version",
-                "confirmation_height",
-                "confirmation_height_frontier",
-            ]
-        )
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "frontier": RPC._H64,
+                    "open_block": RPC._H64,
+                    "representative_block": RPC._H64,
+                    "balance": RPC._UInt,
+                    "confirmed_balance": RPC._UInt,
+                    "modified_timestamp": RPC._UInt,
+                    "block_count": RPC._UInt,
+                    "account_version": RPC._UInt,
+                    "confirmation_height": RPC._UInt,
+                    "confirmation_height_frontier": RPC._H64,
+                    "representative": RPC._Acc,
+                    "confirmed_representative": RPC._Acc,
+                    "weight": RPC._UInt,
+                    "pending": RPC._UInt,
+                    "receivable": RPC._UInt,
+                    "confirmed_pending": RPC._UInt,
+                    "confirmed_receivable": RPC._UInt,
+                }
+            )
+            | RPC._Req(
+                [
+                    "frontier",
+                    "open_block",
+                    "representative_block",
+                    "balance",
+                    "modified_timestamp",
+                    "block_count",
+                    "account_version",
+                    "confirmation_height",
+                    "confirmation_height_frontier",
+                ]
+            ),
+        )
 
     def account_key(self, account: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#account_key"
         data: dict[str, Any] = {}
         data["action"] = "account_key"
         data["account"] = account
-        s = RPC._Dict({"key": RPC._H64}) | RPC._Req(["key"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"key": RPC._H64}) | RPC._Req(["key"])
+        )
 
     def account_representative(self, account: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#account_representative"
         data: dict[str, Any] = {}
         data["action"] = "account_representative"
         data["account"] = account
-        s = RPC._Dict({"representative": RPC._Acc}) | RPC._Req(["representative"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict({"representative": RPC._Acc})
+            | RPC._Req(["representative"]),
+        )
 
     def account_weight(self, account: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#account_weight"
         data: dict[str, Any] = {}
         data["action"] = "account_weight"
         data["account"] = account
-        s = RPC._Dict({"weight": RPC._UInt}) | RPC._Req(["weight"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"weight": RPC._UInt}) | RPC._Req(["weight"])
+        )
 
     def accounts_balances(
         self, accounts: list[str], include_only_confirmed: bool = True
@@ -258,32 +2019,38 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["accounts"] = accounts
         if not include_only_confirmed:
             data["include_only_confirmed"] = False
-        s = RPC._Dict(
-            {
-                "balances": RPC._DictP(
-                    {
-                        RPC._AccP: RPC._Dict(
-                            {
-                                "balance": RPC._UInt,
-                                "pending": RPC._UInt,
-                                "receivable": RPC._UInt,
-                            }
-                        )
-                    }
-                )
-            }
-        ) | RPC._Req(["balances"])
-        return self._request(data, s)
+        return self._bulk(
+            data,
+            "accounts",
+            lambda: RPC._Dict(
+                {
+                    "balances": RPC._DictP(
+                        {
+                            RPC._AccP: RPC._Dict(
+                                {
+                                    "balance": RPC._UInt,
+                                    "pending": RPC._UInt,
+                                    "receivable": RPC._UInt,
+                                }
+                            )
+                        }
+                    )
+                }
+            )
+            | RPC._Req(["balances"]),
+        )
 
     def accounts_frontiers(self, accounts: list[str]) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#accounts_frontiers"
         data: dict[str, Any] = {}
         data["action"] = "accounts_frontiers"
         data["accounts"] = accounts
-        s = RPC._Dict({"frontiers": RPC._DictP({RPC._AccP: RPC._H64})}) | RPC._Req(
-            ["frontiers"]
+        return self._bulk(
+            data,
+            "accounts",
+            lambda: RPC._Dict({"frontiers": RPC._DictP({RPC._AccP: RPC._H64})})
+            | RPC._Req(["frontiers"]),
         )
-        return self._request(data, s)
 
     def accounts_receivable(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
@@ -310,68 +2077,77 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["sorting"] = True
         if not include_only_confirmed:
             data["include_only_confirmed"] = False
-        s = RPC._Dict(
-            {
-                "blocks": RPC._DictP(
-                    {
-                        RPC._AccP: {
-                            "anyOf": [
-                                RPC._List(RPC._H64),
-                                RPC._DictP(
-                                    {
-                                        RPC._H64P: {
-                                            "anyOf": [
-                                                RPC._UInt,
-                                                RPC._Dict(
-                                                    {
-                                                        "amount": RPC._UInt,
-                                                        "source": RPC._Acc,
-                                                    }
-                                                ),
-                                            ]
+        return self._bulk(
+            data,
+            "accounts",
+            lambda: RPC._Dict(
+                {
+                    "blocks": RPC._DictP(
+                        {
+                            RPC._AccP: {
+                                "anyOf": [
+                                    RPC._List(RPC._H64),
+                                    RPC._DictP(
+                                        {
+                                            RPC._H64P: {
+                                                "anyOf": [
+                                                    RPC._UInt,
+                                                    RPC._Dict(
+                                                        {
+                                                            "amount": RPC._UInt,
+                                                            "source": RPC._Acc,
+                                                        }
+                                                    ),
+                                                ]
+                                            }
                                         }
-                                    }
-                                ),
-                            ]
+                                    ),
+                                ]
+                            }
                         }
-                    }
-                )
-            }
-        ) | RPC._Req(["blocks"])
-        return self._request(data, s)
+                    )
+                }
+            )
+            | RPC._Req(["blocks"]),
+        )
 
     def accounts_representatives(self, accounts: list[str]) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#accounts_representatives"
         data: dict[str, Any] = {}
         data["action"] = "accounts_representatives"
         data["accounts"] = accounts
-        s = RPC._Dict(
-            {"representatives": RPC._DictP({RPC._AccP: RPC._Acc})}
-        ) | RPC._Req(["representatives"])
-        return self._request(data, s)
+        return self._bulk(
+            data,
+            "accounts",
+            lambda: RPC._Dict({"representatives": RPC._DictP({RPC._AccP: RPC._Acc})})
+            | RPC._Req(["representatives"]),
+        )
 
     def available_supply(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#available_supply"
         data: dict[str, Any] = {}
         data["action"] = "available_supply"
-        s = RPC._Dict({"available": RPC._UInt}) | RPC._Req(["available"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"available": RPC._UInt}) | RPC._Req(["available"])
+        )
 
     def block_account(self, hash_: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#block_account"
         data: dict[str, Any] = {}
         data["action"] = "block_account"
         data["hash"] = hash_
-        s = RPC._Dict({"account": RPC._Acc}) | RPC._Req(["account"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"account": RPC._Acc}) | RPC._Req(["account"])
+        )
 
     def block_confirm(self, hash_: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#block_confirm"
         data: dict[str, Any] = {}
         data["action"] = "block_confirm"
         data["hash"] = hash_
-        s = RPC._Dict({"started": RPC._Bool}) | RPC._Req(["started"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"started": RPC._Bool}) | RPC._Req(["started"])
+        )
 
     def block_count(self, include_cemented: bool = True) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#block_count"
@@ -379,10 +2155,13 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "block_count"
         if not include_cemented:
             data["include_cemented"] = False
-        s = RPC._Dict(
-            {"count": RPC._UInt, "unchecked": RPC._UInt, "cemented": RPC._UInt}
-        ) | RPC._Req(["count", "unchecked"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {"count": RPC._UInt, "unchecked": RPC._UInt, "cemented": RPC._UInt}
+            )
+            | RPC._Req(["count", "unchecked"]),
+        )
 
     def block_create(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
         self,
@@ -425,10 +2204,13 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         if version in ["work_1"]:
             data["version"] = version
         data["json_block"] = True
-        s = RPC._Dict(
-            {"hash": RPC._H64, "difficulty": RPC._H16, "block": RPC._Blk}
-        ) | RPC._Req(["hash", "difficulty", "block"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {"hash": RPC._H64, "difficulty": RPC._H16, "block": RPC._Blk}
+            )
+            | RPC._Req(["hash", "difficulty", "block"]),
+        )
 
     def block_hash(self, block: dict[str, str]) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#block_hash"
@@ -436,20 +2218,13 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "block_hash"
         data["block"] = block
         data["json_block"] = True
-        s = RPC._Dict({"hash": RPC._H64}) | RPC._Req(["hash"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"hash": RPC._H64}) | RPC._Req(["hash"])
+        )
 
     def _validate_block(self, hash_: str, block: dict[str, str]) -> None:
         "validate block content"
-        b = npy.StateBlock(
-            npy.Account(block["account"]),
-            npy.Account(block["representative"]),
-            int(block["balance"]),
-            block["previous"],
-            block["link"],
-            block["signature"],
-            block["work"],
-        )
+        b = npy.StateBlock.from_dict(block)
         assert b.hash_ == hash_.lower()
         assert b.verify_signature()
 
@@ -465,39 +2240,59 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["json_block"] = True
         if include_linked_account:
             data["include_linked_account"] = True
-        s = RPC._Dict(
-            {
-                "block_account": RPC._Acc,
-                "amount": RPC._UInt,
-                "balance": RPC._UInt,
-                "height": RPC._UInt,
-                "local_timestamp": RPC._UInt,
-                "successor": RPC._H64,
-                "confirmed": RPC._Bool,
-                "contents": RPC._Blk,
-                "subtype": RPC._Type,
-            }
-        ) | RPC._Req(
-            [
-                "block_account",
-                "amount",
-                "balance",
-                "height",
-                "local_timestamp",
-                "successor",
-                "confirmed",
-                "contents",
-                "subtype",
-            ]
-        )
-        r = self._request(data, s)
-        self._validate_block_info(hash_, r)
-        return r
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "block_account": RPC._Acc,
+                    "amount": RPC._UInt,
+                    "balance": RPC._UInt,
+                    "height": RPC._UInt,
+                    "local_timestamp": RPC._UInt,
+                    "successor": RPC._H64,
+                    "confirmed": RPC._Bool,
+                    "contents": RPC._Blk,
+                    "subtype": RPC._Type,
+                }
+            )
+            | RPC._Req(
+                [
+                    "block_account",
+                    "amount",
+                    "balance",
+                    "height",
+                    "local_timestamp",
+                    "successor",
+                    "confirmed",
+                    "contents",
+                    "subtype",
+                ]
+            ),
+            lambda _, r: self._validate_block_info(hash_, r),
+        )
+
+    @staticmethod
+    def _requested(data: dict[str, Any], r: Any) -> Iterator[tuple[str, Any]]:
+        """Blocks of a response of blocks or blocks_info, by requested hash
 
-    def _validate_blocks(self, hashes: list[str], r: Any) -> None:
+        :arg data: the request
+        :arg r: JSON response
+        :return: hashes and their blocks, skipping those not found
+        :raises AssertionError: if a block was not requested, or a requested
+          block is missing and not in ``blocks_not_found``
+        """
+        blocks = {h.lower(): b for h, b in r["blocks"].items()}
+        hashes = {h.lower() for h in data["hashes"]}
+        not_found = {h.lower() for h in r.get("blocks_not_found", [])}
+        assert blocks.keys() <= hashes
+        assert hashes <= blocks.keys() | not_found
+        for h in hashes & blocks.keys():
+            yield h, blocks[h]
+
+    def _validate_blocks(self, data: dict[str, Any], r: Any) -> None:
         "validate the response of blocks"
-        for h in hashes:
-            self._validate_block(h, r["blocks"][h])
+        for h, b in self._requested(data, r):
+            self._validate_block(h, b)
 
     def blocks(self, hashes: list[str]) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#blocks"
@@ -505,17 +2300,18 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "blocks"
         data["hashes"] = hashes
         data["json_block"] = True
-        s = RPC._Dict({"blocks": RPC._DictP({RPC._H64P: RPC._Blk})}) | RPC._Req(
-            ["blocks"]
+        return self._bulk(
+            data,
+            "hashes",
+            lambda: RPC._Dict({"blocks": RPC._DictP({RPC._H64P: RPC._Blk})})
+            | RPC._Req(["blocks"]),
+            self._validate_blocks,
         )
-        r = self._request(data, s)
-        self._validate_blocks(hashes, r)
-        return r
 
-    def _validate_blocks_info(self, hashes: list[str], r: Any) -> None:
+    def _validate_blocks_info(self, data: dict[str, Any], r: Any) -> None:
         "validate the response of blocks_info"
-        for h in hashes:
-            self._validate_block_info(h, r["blocks"][h])
+        for h, b in self._requested(data, r):
+            self._validate_block_info(h, b)
 
     def blocks_info(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
@@ -541,34 +2337,37 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["json_block"] = True
         if include_not_found:
             data["include_not_found"] = True
-        s = RPC._Dict(
-            {
-                "blocks": RPC._DictP(
-                    {
-                        RPC._H64P: RPC._Dict(
-                            {
-                                "block_account": RPC._Acc,
-                                "amount": RPC._UInt,
-                                "balance": RPC._UInt,
-                                "height": RPC._UInt,
-                                "local_timestamp": RPC._UInt,
-                                "successor": RPC._H64,
-                                "confirmed": RPC._Bool,
-                                "contents": RPC._Blk,
-                                "subtype": RPC._Type,
-                                "pending": RPC._Bool,
-                                "source_account": RPC._Acc,
-                                "receive_hash": RPC._H64,
-                            }
-                        )
-                    }
-                ),
-                "blocks_not_found": RPC._List(RPC._H64),
-            }
-        ) | RPC._Req(["blocks"])
-        r = self._request(data, s)
-        self._validate_blocks_info(hashes, r)
-        return r
+        return self._bulk(
+            data,
+            "hashes",
+            lambda: RPC._Dict(
+                {
+                    "blocks": RPC._DictP(
+                        {
+                            RPC._H64P: RPC._Dict(
+                                {
+                                    "block_account": RPC._Acc,
+                                    "amount": RPC._UInt,
+                                    "balance": RPC._UInt,
+                                    "height": RPC._UInt,
+                                    "local_timestamp": RPC._UInt,
+                                    "successor": RPC._H64,
+                                    "confirmed": RPC._Bool,
+                                    "contents": RPC._Blk,
+                                    "subtype": RPC._Type,
+                                    "pending": RPC._Bool,
+                                    "source_account": RPC._Acc,
+                                    "receive_hash": RPC._H64,
+                                }
+                            )
+                        }
+                    ),
+                    "blocks_not_found": RPC._List(RPC._H64),
+                }
+            )
+            | RPC._Req(["blocks"]),
+            self._validate_blocks_info,
+        )
 
     def bootstrap(
         self,
@@ -586,8 +2385,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["id"] = id_
         if bypass_frontier_confirmation:
             data["bypass_frontier_confirmation"] = True
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def bootstrap_any(
         self, force: bool = False, id_: str = "", account: str = ""
@@ -601,8 +2401,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["id"] = id_
         if account:
             data["account"] = account
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def bootstrap_lazy(self, hash_: str, force: bool = False, id_: str = "") -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#bootstrap_lazy"
@@ -613,8 +2414,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["force"] = True
         if id_:
             data["id"] = id_
-        s = RPC._Dict({"started": RPC._Bool}) | RPC._Req(["started"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"started": RPC._Bool}) | RPC._Req(["started"])
+        )
 
     def bootstrap_priorities(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#bootstrap_priorities"
@@ -646,8 +2448,10 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["offset"] = offset
         if reverse:
             data["reverse"] = True
-        s = RPC._Dict({"blocks": RPC._List(RPC._H64)}) | RPC._Req(["blocks"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict({"blocks": RPC._List(RPC._H64)}) | RPC._Req(["blocks"]),
+        )
 
     def confirmation_active(self, announcements: int = 0) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#confirmation_active"
@@ -655,14 +2459,17 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "confirmation_active"
         if announcements:
             data["announcements"] = announcements
-        s = RPC._Dict(
-            {
-                "confirmations": RPC._List(RPC._H128),
-                "unconfirmed": RPC._UInt,
-                "confirmed": RPC._UInt,
-            }
-        ) | RPC._Req(["confirmations", "unconfirmed", "confirmed"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "confirmations": RPC._List(RPC._H128),
+                    "unconfirmed": RPC._UInt,
+                    "confirmed": RPC._UInt,
+                }
+            )
+            | RPC._Req(["confirmations", "unconfirmed", "confirmed"]),
+        )
 
     def confirmation_history(self, hash_: str = "") -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#confirmation_history"
@@ -670,8 +2477,10 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "confirmation_history"
         if hash_:
             data["hash"] = hash_
-        s = RPC._Dict({}) | RPC._Req(["confirmation_stats", "confirmations"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict({}) | RPC._Req(["confirmation_stats", "confirmations"]),
+        )
 
     def confirmation_info(
         self,
@@ -688,15 +2497,18 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         if representatives:
             data["representatives"] = True
         data["json_block"] = True
-        s = RPC._Dict(
-            {
-                "announcements": RPC._UInt,
-                "last_winner": RPC._H64,
-                "total_tally": RPC._UInt,
-                "blocks": RPC._DictP({RPC._H64P: {}}),
-            }
-        ) | RPC._Req(["announcements", "last_winner", "total_tally", "blocks"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "announcements": RPC._UInt,
+                    "last_winner": RPC._H64,
+                    "total_tally": RPC._UInt,
+                    "blocks": RPC._DictP({RPC._H64P: {}}),
+                }
+            )
+            | RPC._Req(["announcements", "last_winner", "total_tally", "blocks"]),
+        )
 
     def confirmation_quorum(self, peer_details: bool = False) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#confirmation_quorum"
@@ -704,26 +2516,29 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "confirmation_quorum"
         if peer_details:
             data["peer_details"] = True
-        s = RPC._Dict(
-            {
-                "quorum_delta": RPC._UInt,
-                "online_weight_quorum_percent": RPC._UInt,
-                "online_weight_minimum": RPC._UInt,
-                "online_stake_total": RPC._UInt,
-                "peers_stake_total": RPC._UInt,
-                "trended_stake_total": RPC._UInt,
-            }
-        ) | RPC._Req(
-            [
-                "quorum_delta",
-                "online_weight_quorum_percent",
-                "online_weight_minimum",
-                "online_stake_total",
-                "peers_stake_total",
-                "trended_stake_total",
-            ]
-        )
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "quorum_delta": RPC._UInt,
+                    "online_weight_quorum_percent": RPC._UInt,
+                    "online_weight_minimum": RPC._UInt,
+                    "online_stake_total": RPC._UInt,
+                    "peers_stake_total": RPC._UInt,
+                    "trended_stake_total": RPC._UInt,
+                }
+            )
+            | RPC._Req(
+                [
+                    "quorum_delta",
+                    "online_weight_quorum_percent",
+                    "online_weight_minimum",
+                    "online_stake_total",
+                    "peers_stake_total",
+                    "trended_stake_total",
+                ]
+            ),
+        )
 
     def database_txn_tracker(self, min_read_time: int, min_write_time: int) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#database_txn_tracker"
@@ -746,18 +2561,20 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["count"] = count
         if start:
             data["start"] = start
-        s = RPC._Dict({"delegators": RPC._DictP({RPC._AccP: RPC._UInt})}) | RPC._Req(
-            ["delegators"]
+        return self._request(
+            data,
+            lambda: RPC._Dict({"delegators": RPC._DictP({RPC._AccP: RPC._UInt})})
+            | RPC._Req(["delegators"]),
         )
-        return self._request(data, s)
 
     def delegators_count(self, account: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#delegators_count"
         data: dict[str, Any] = {}
         data["action"] = "delegators_count"
         data["account"] = account
-        s = RPC._Dict({"count": RPC._UInt}) | RPC._Req(["count"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"count": RPC._UInt}) | RPC._Req(["count"])
+        )
 
     def deterministic_key(self, seed: str, index: int) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#deterministic_key"
@@ -765,39 +2582,45 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "deterministic_key"
         data["seed"] = seed
         data["index"] = index
-        s = RPC._Dict(
-            {"private": RPC._H64, "public": RPC._H64, "account": RPC._Acc}
-        ) | RPC._Req(["private", "public", "account"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {"private": RPC._H64, "public": RPC._H64, "account": RPC._Acc}
+            )
+            | RPC._Req(["private", "public", "account"]),
+        )
 
     def election_statistics(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#election_statistics"
         data: dict[str, Any] = {}
         data["action"] = "election_statistics"
-        s = RPC._Dict(
-            {
-                "normal": RPC._UInt,
-                "priority": RPC._UInt,
-                "hinted": RPC._UInt,
-                "optimistic": RPC._UInt,
-                "total": RPC._UInt,
-                "aec_utilization_percentage": RPC._UDbl,
-                "max_election_age": RPC._UInt,
-                "average_election_age": RPC._UInt,
-            }
-        ) | RPC._Req(
-            [
-                "normal",
-                "priority",
-                "hinted",
-                "optimistic",
-                "total",
-                "aec_utilization_percentage",
-                "max_election_age",
-                "average_election_age",
-            ]
-        )
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "normal": RPC._UInt,
+                    "priority": RPC._UInt,
+                    "hinted": RPC._UInt,
+                    "optimistic": RPC._UInt,
+                    "total": RPC._UInt,
+                    "aec_utilization_percentage": RPC._UDbl,
+                    "max_election_age": RPC._UInt,
+                    "average_election_age": RPC._UInt,
+                }
+            )
+            | RPC._Req(
+                [
+                    "normal",
+                    "priority",
+                    "hinted",
+                    "optimistic",
+                    "total",
+                    "aec_utilization_percentage",
+                    "max_election_age",
+                    "average_election_age",
+                ]
+            ),
+        )
 
     def epoch_upgrade(
         self, epoch: int, key: str, count: int = 0, threads: int = 0
@@ -811,15 +2634,17 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["count"] = count
         if threads:
             data["threads"] = threads
-        s = RPC._Dict({"started": RPC._Bool}) | RPC._Req(["started"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"started": RPC._Bool}) | RPC._Req(["started"])
+        )
 
     def frontier_count(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#frontier_count"
         data: dict[str, Any] = {}
         data["action"] = "frontier_count"
-        s = RPC._Dict({"count": RPC._UInt}) | RPC._Req(["count"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"count": RPC._UInt}) | RPC._Req(["count"])
+        )
 
     def frontiers(self, account: str, count: int = 1) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#frontiers"
@@ -827,10 +2652,11 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "frontiers"
         data["account"] = account
         data["count"] = count
-        s = RPC._Dict({"frontiers": RPC._DictP({RPC._AccP: RPC._H64})}) | RPC._Req(
-            ["frontiers"]
+        return self._request(
+            data,
+            lambda: RPC._Dict({"frontiers": RPC._DictP({RPC._AccP: RPC._H64})})
+            | RPC._Req(["frontiers"]),
         )
-        return self._request(data, s)
 
     def keepalive(self, address: str, port: int) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#keepalive"
@@ -838,27 +2664,34 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "keepalive"
         data["address"] = address
         data["port"] = port
-        s = RPC._Dict({"started": RPC._Bool}) | RPC._Req(["started"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"started": RPC._Bool}) | RPC._Req(["started"])
+        )
 
     def key_create(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#key_create"
         data: dict[str, Any] = {}
         data["action"] = "key_create"
-        s = RPC._Dict(
-            {"private": RPC._H64, "public": RPC._H64, "account": RPC._Acc}
-        ) | RPC._Req(["private", "public", "account"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {"private": RPC._H64, "public": RPC._H64, "account": RPC._Acc}
+            )
+            | RPC._Req(["private", "public", "account"]),
+        )
 
     def key_expand(self, key: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#key_expand"
         data: dict[str, Any] = {}
         data["action"] = "key_expand"
         data["key"] = key
-        s = RPC._Dict(
-            {"private": RPC._H64, "public": RPC._H64, "account": RPC._Acc}
-        ) | RPC._Req(["private", "public", "account"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {"private": RPC._H64, "public": RPC._H64, "account": RPC._Acc}
+            )
+            | RPC._Req(["private", "public", "account"]),
+        )
 
     def ledger(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
@@ -888,43 +2721,49 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["sorting"] = True
         if threshold:
             data["threshold"] = threshold
-        s = RPC._Dict(
-            {
-                "accounts": RPC._DictP(
-                    {
-                        RPC._AccP: RPC._Dict(
-                            {
-                                "frontier": RPC._H64,
-                                "open_block": RPC._H64,
-                                "representative_block": RPC._H64,
-                                "balance": RPC._UInt,
-                                "modified_timestamp": RPC._UInt,
-                                "block_count": RPC._UInt,
-                                "representative": RPC._Acc,
-                                "weight": RPC._UInt,
-                                "pending": RPC._UInt,
-                                "receivable": RPC._UInt,
-                            }
-                        )
-                    }
-                )
-            }
-        ) | RPC._Req(["accounts"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "accounts": RPC._DictP(
+                        {
+                            RPC._AccP: RPC._Dict(
+                                {
+                                    "frontier": RPC._H64,
+                                    "open_block": RPC._H64,
+                                    "representative_block": RPC._H64,
+                                    "balance": RPC._UInt,
+                                    "modified_timestamp": RPC._UInt,
+                                    "block_count": RPC._UInt,
+                                    "representative": RPC._Acc,
+                                    "weight": RPC._UInt,
+                                    "pending": RPC._UInt,
+                                    "receivable": RPC._UInt,
+                                }
+                            )
+                        }
+                    )
+                }
+            )
+            | RPC._Req(["accounts"]),
+        )
 
     def node_id(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#node_id"
         data: dict[str, Any] = {}
         data["action"] = "node_id"
-        s = RPC._Dict(
-            {
-                "private": RPC._H64,
-                "public": RPC._H64,
-                "as_account": RPC._Acc,
-                "node_id": RPC._Acc,
-            }
-        ) | RPC._Req(["private", "public", "as_account", "node_id"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "private": RPC._H64,
+                    "public": RPC._H64,
+                    "as_account": RPC._Acc,
+                    "node_id": RPC._Acc,
+                }
+            )
+            | RPC._Req(["private", "public", "as_account", "node_id"]),
+        )
 
     def peers(self, peer_details: bool = False) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#peers"
@@ -932,34 +2771,38 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "peers"
         if peer_details:
             data["peer_details"] = True
-        s = RPC._Dict(
-            {
-                "peers": {
-                    "anyOf": [
-                        RPC._DictP({RPC._IPP: RPC._UInt}),
-                        RPC._DictP(
-                            {
-                                RPC._IPP: RPC._Dict(
-                                    {
-                                        "protocol_version": RPC._UInt,
-                                        "node_id": RPC._Acc,
-                                        "type": {"const": "tcp"},
-                                    }
-                                )
-                            }
-                        ),
-                    ]
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "peers": {
+                        "anyOf": [
+                            RPC._DictP({RPC._IPP: RPC._UInt}),
+                            RPC._DictP(
+                                {
+                                    RPC._IPP: RPC._Dict(
+                                        {
+                                            "protocol_version": RPC._UInt,
+                                            "node_id": RPC._Acc,
+                                            "type": {"const": "tcp"},
+                                        }
+                                    )
+                                }
+                            ),
+                        ]
+                    }
                 }
-            }
-        ) | RPC._Req(["peers"])
-        return self._request(data, s)
+            )
+            | RPC._Req(["peers"]),
+        )
 
     def populate_backlog(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#populate_backlog"
         data: dict[str, Any] = {}
         data["action"] = "populate_backlog"
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def process(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
@@ -982,8 +2825,11 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["watch_work"] = False
         if async_:
             data["async"] = True
-        s = RPC._Dict({"hash": RPC._H64}) | RPC._Req(["hash"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict({"hash": RPC._H64, "started": RPC._Bool})
+            | {"anyOf": [*RPC._Req(["hash"])["anyOf"], {"required": ["started"]}]},
+        )
 
     def receivable(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
@@ -1014,31 +2860,34 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["sorting"] = True
         if not include_only_confirmed:
             data["include_only_confirmed"] = False
-        s = RPC._Dict(
-            {
-                "blocks": {
-                    "anyOf": [
-                        RPC._List(RPC._H64),
-                        RPC._DictP(
-                            {
-                                RPC._H64P: {
-                                    "anyOf": [
-                                        RPC._UInt,
-                                        RPC._Dict(
-                                            {
-                                                "amount": RPC._UInt,
-                                                "source": RPC._Acc,
-                                            }
-                                        ),
-                                    ]
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "blocks": {
+                        "anyOf": [
+                            RPC._List(RPC._H64),
+                            RPC._DictP(
+                                {
+                                    RPC._H64P: {
+                                        "anyOf": [
+                                            RPC._UInt,
+                                            RPC._Dict(
+                                                {
+                                                    "amount": RPC._UInt,
+                                                    "source": RPC._Acc,
+                                                }
+                                            ),
+                                        ]
+                                    }
                                 }
-                            }
-                        ),
-                    ]
+                            ),
+                        ]
+                    }
                 }
-            }
-        ) | RPC._Req(["blocks"])
-        return self._request(data, s)
+            )
+            | RPC._Req(["blocks"]),
+        )
 
     def receivable_exists(
         self,
@@ -1054,8 +2903,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["include_active"] = True
         if not include_only_confirmed:
             data["include_only_confirmed"] = False
-        s = RPC._Dict({"exists": RPC._Bool}) | RPC._Req(["exists"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"exists": RPC._Bool}) | RPC._Req(["exists"])
+        )
 
     def representatives(self, count: int = 1, sorting: bool = False) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#representatives"
@@ -1064,10 +2914,11 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["count"] = count
         if sorting:
             data["sorting"] = True
-        s = RPC._Dict(
-            {"representatives": RPC._DictP({RPC._AccP: RPC._UInt})}
-        ) | RPC._Req(["representatives"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict({"representatives": RPC._DictP({RPC._AccP: RPC._UInt})})
+            | RPC._Req(["representatives"]),
+        )
 
     def representatives_online(
         self, weight: bool = False, accounts: list[str] | None = None
@@ -1079,17 +2930,20 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["weight"] = True
         if accounts:
             data["accounts"] = accounts
-        s = RPC._Dict(
-            {
-                "representatives": {
-                    "anyOf": [
-                        RPC._List(RPC._Acc),
-                        RPC._DictP({RPC._AccP: RPC._Dict({"weight": RPC._UInt})}),
-                    ]
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "representatives": {
+                        "anyOf": [
+                            RPC._List(RPC._Acc),
+                            RPC._DictP({RPC._AccP: RPC._Dict({"weight": RPC._UInt})}),
+                        ]
+                    }
                 }
-            }
-        ) | RPC._Req(["representatives"])
-        return self._request(data, s)
+            )
+            | RPC._Req(["representatives"]),
+        )
 
     def republish(
         self, hash_: str, count: int = 1, sources: int = 0, destinations: int = 0
@@ -1104,10 +2958,11 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         if destinations:
             data["destinations"] = destinations
             data["count"] = count
-        s = RPC._Dict({"success": RPC._Bool, "blocks": RPC._List(RPC._H64)}) | RPC._Req(
-            ["blocks"]
+        return self._request(
+            data,
+            lambda: RPC._Dict({"success": RPC._Bool, "blocks": RPC._List(RPC._H64)})
+            | RPC._Req(["blocks"]),
         )
-        return self._request(data, s)
 
     def sign(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
@@ -1131,10 +2986,11 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         elif hash_:
             data["hash"] = hash_
         data["json_block"] = True
-        s = RPC._Dict({"signature": RPC._H128, "block": RPC._Blk}) | RPC._Req(
-            ["signature"]
+        return self._request(
+            data,
+            lambda: RPC._Dict({"signature": RPC._H128, "block": RPC._Blk})
+            | RPC._Req(["signature"]),
         )
-        return self._request(data, s)
 
     def stats(self, type_: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#stats"
@@ -1147,15 +3003,17 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         "https://docs.nano.org/commands/rpc-protocol/#stats_clear"
         data: dict[str, Any] = {}
         data["action"] = "stats_clear"
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def stop(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#stop"
         data: dict[str, Any] = {}
         data["action"] = "stop"
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def successors(
         self, block: str, count: int = 1, offset: int = 0, reverse: bool = False
@@ -1169,8 +3027,10 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["offset"] = offset
         if reverse:
             data["reverse"] = True
-        s = RPC._Dict({"blocks": RPC._List(RPC._H64)}) | RPC._Req(["blocks"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict({"blocks": RPC._List(RPC._H64)}) | RPC._Req(["blocks"]),
+        )
 
     def telemetry(self, raw: bool = False, address: int = 0, port: int = 7075) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#telemetry"
@@ -1188,37 +3048,41 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data: dict[str, Any] = {}
         data["action"] = "validate_account_number"
         data["account"] = account
-        s = RPC._Dict({"valid": RPC._Bool}) | RPC._Req(["valid"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"valid": RPC._Bool}) | RPC._Req(["valid"])
+        )
 
     def version(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#version"
         data: dict[str, Any] = {}
         data["action"] = "version"
-        s = RPC._Dict(
-            {
-                "rpc_version": RPC._UInt,
-                "store_version": RPC._UInt,
-                "protocol_version": RPC._UInt,
-                "node_vendor": {"type": "string"},
-                "store_vendor": {"type": "string"},
-                "network": {"type": "string"},
-                "network_identifier": RPC._H64,
-                "build_info": {"type": "string"},
-            }
-        ) | RPC._Req(
-            [
-                "rpc_version",
-                "store_version",
-                "protocol_version",
-                "node_vendor",
-                "store_vendor",
-                "network",
-                "network_identifier",
-                "build_info",
-            ]
-        )
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "rpc_version": RPC._UInt,
+                    "store_version": RPC._UInt,
+                    "protocol_version": RPC._UInt,
+                    "node_vendor": {"type": "string"},
+                    "store_vendor": {"type": "string"},
+                    "network": {"type": "string"},
+                    "network_identifier": RPC._H64,
+                    "build_info": {"type": "string"},
+                }
+            )
+            | RPC._Req(
+                [
+                    "rpc_version",
+                    "store_version",
+                    "protocol_version",
+                    "node_vendor",
+                    "store_vendor",
+                    "network",
+                    "network_identifier",
+                    "build_info",
+                ]
+            ),
+        )
 
     def unchecked(self, count: int = 1) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#unchecked"
@@ -1226,17 +3090,19 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "unchecked"
         data["json_block"] = True
         data["count"] = count
-        s = RPC._Dict({"blocks": RPC._DictP({RPC._H64P: RPC._Blk})}) | RPC._Req(
-            ["blocks"]
+        return self._request(
+            data,
+            lambda: RPC._Dict({"blocks": RPC._DictP({RPC._H64P: RPC._Blk})})
+            | RPC._Req(["blocks"]),
         )
-        return self._request(data, s)
 
     def unchecked_clear(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#unchecked_clear"
         data: dict[str, Any] = {}
         data["action"] = "unchecked_clear"
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def unchecked_get(self, hash_: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#unchecked_get"
@@ -1244,13 +3110,16 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "unchecked_get"
         data["hash"] = hash_
         data["json_block"] = True
-        s = RPC._Dict(
-            {
-                "modified_timestamp": RPC._UInt,
-                "contents": RPC._DictP({RPC._H64P: RPC._Blk}),
-            }
-        ) | RPC._Req(["modified_timestamp", "contents"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "modified_timestamp": RPC._UInt,
+                    "contents": RPC._DictP({RPC._H64P: RPC._Blk}),
+                }
+            )
+            | RPC._Req(["modified_timestamp", "contents"]),
+        )
 
     def unchecked_keys(self, key: str, count: int = 1) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#unchecked_keys"
@@ -1259,15 +3128,18 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["key"] = key
         data["count"] = count
         data["json_block"] = True
-        s = RPC._Dict(
-            {
-                "key": RPC._H64,
-                "hash": RPC._H64,
-                "modified_timestamp": RPC._UInt,
-                "contents": RPC._DictP({RPC._H64P: RPC._Blk}),
-            }
-        ) | RPC._Req(["key", "hash", "modified_timestamp", "contents"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "key": RPC._H64,
+                    "hash": RPC._H64,
+                    "modified_timestamp": RPC._UInt,
+                    "contents": RPC._DictP({RPC._H64P: RPC._Blk}),
+                }
+            )
+            | RPC._Req(["key", "hash", "modified_timestamp", "contents"]),
+        )
 
     def unopened(self, account: str = "", count: int = 1, threshold: int = 0) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#unopened"
@@ -1279,25 +3151,28 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["count"] = count
         if threshold:
             data["threshold"] = threshold
-        s = RPC._Dict({"accounts": RPC._DictP({RPC._AccP: RPC._UInt})}) | RPC._Req(
-            ["accounts"]
+        return self._request(
+            data,
+            lambda: RPC._Dict({"accounts": RPC._DictP({RPC._AccP: RPC._UInt})})
+            | RPC._Req(["accounts"]),
         )
-        return self._request(data, s)
 
     def uptime(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#uptime"
         data: dict[str, Any] = {}
         data["action"] = "uptime"
-        s = RPC._Dict({"seconds": RPC._UInt}) | RPC._Req(["seconds"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"seconds": RPC._UInt}) | RPC._Req(["seconds"])
+        )
 
     def work_cancel(self, hash_: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#work_cancel"
         data: dict[str, Any] = {}
         data["action"] = "work_cancel"
         data["hash"] = hash_
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def work_generate(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
@@ -1325,16 +3200,19 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["version"] = version
         if block:
             data["block"] = block
-        data["json_block"] = True
-        s = RPC._Dict(
-            {
-                "work": RPC._H16,
-                "difficulty": RPC._H16,
-                "multiplier": RPC._UDbl,
-                "hash": RPC._H64,
-            }
-        ) | RPC._Req(["work", "difficulty", "multiplier", "hash"])
-        return self._request(data, s)
+        data["json_block"] = True
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "work": RPC._H16,
+                    "difficulty": RPC._H16,
+                    "multiplier": RPC._UDbl,
+                    "hash": RPC._H64,
+                }
+            )
+            | RPC._Req(["work", "difficulty", "multiplier", "hash"]),
+        )
 
     def work_peer_add(self, address: str, port: int) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#work_peer_add"
@@ -1342,22 +3220,27 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "work_peer_add"
         data["address"] = address
         data["port"] = port
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def work_peers(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#work_peers"
         data: dict[str, Any] = {}
         data["action"] = "work_peers"
-        s = RPC._Dict({"work_peers": RPC._List(RPC._IP)}) | RPC._Req(["work_peers"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict({"work_peers": RPC._List(RPC._IP)})
+            | RPC._Req(["work_peers"]),
+        )
 
     def work_peers_clear(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#work_peers_clear"
         data: dict[str, Any] = {}
         data["action"] = "work_peers_clear"
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def work_validate(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
@@ -1378,15 +3261,18 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["difficulty"] = difficulty
         if version in ["work_1"]:
             data["version"] = version
-        s = RPC._Dict(
-            {
-                "valid_all": RPC._Bool,
-                "valid_receive": RPC._Bool,
-                "difficulty": RPC._H16,
-                "multiplier": RPC._UDbl,
-            }
-        ) | RPC._Req(["valid_all", "valid_receive", "difficulty", "multiplier"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "valid_all": RPC._Bool,
+                    "valid_receive": RPC._Bool,
+                    "difficulty": RPC._H16,
+                    "multiplier": RPC._UDbl,
+                }
+            )
+            | RPC._Req(["valid_all", "valid_receive", "difficulty", "multiplier"]),
+        )
 
     def account_create(self, wallet: str, index: int = 0, work: bool = True) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#account_create"
@@ -1397,16 +3283,20 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["index"] = index
         if not work:
             data["work"] = False
-        s = RPC._Dict({"account": RPC._Acc}) | RPC._Req(["account"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"account": RPC._Acc}) | RPC._Req(["account"])
+        )
 
     def account_list(self, wallet: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#account_list"
         data: dict[str, Any] = {}
         data["action"] = "account_list"
         data["wallet"] = wallet
-        s = RPC._Dict({"accounts": RPC._List(RPC._Acc)}) | RPC._Req(["accounts"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict({"accounts": RPC._List(RPC._Acc)})
+            | RPC._Req(["accounts"]),
+        )
 
     def account_move(self, wallet: str, source: str, accounts: list[str]) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#account_move"
@@ -1415,8 +3305,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["wallet"] = wallet
         data["source"] = source
         data["accounts"] = accounts
-        s = RPC._Dict({"moved": RPC._Bool}) | RPC._Req(["moved"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"moved": RPC._Bool}) | RPC._Req(["moved"])
+        )
 
     def account_remove(self, wallet: str, account: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#account_remove"
@@ -1424,8 +3315,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "account_remove"
         data["wallet"] = wallet
         data["account"] = account
-        s = RPC._Dict({"removed": RPC._Bool}) | RPC._Req(["removed"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"removed": RPC._Bool}) | RPC._Req(["removed"])
+        )
 
     def account_representative_set(
         self, wallet: str, account: str, representative: str, work: str = ""
@@ -1438,8 +3330,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["representative"] = representative
         if work:
             data["work"] = work
-        s = RPC._Dict({"block": RPC._H64}) | RPC._Req(["block"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"block": RPC._H64}) | RPC._Req(["block"])
+        )
 
     def accounts_create(self, wallet: str, count: int = 1, work: bool = True) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#accounts_create"
@@ -1449,8 +3342,11 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["count"] = count
         if not work:
             data["work"] = False
-        s = RPC._Dict({"accounts": RPC._List(RPC._Acc)}) | RPC._Req(["accounts"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict({"accounts": RPC._List(RPC._Acc)})
+            | RPC._Req(["accounts"]),
+        )
 
     def password_change(self, wallet: str, password: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#password_change"
@@ -1458,8 +3354,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "password_change"
         data["wallet"] = wallet
         data["password"] = password
-        s = RPC._Dict({"changed": RPC._Bool}) | RPC._Req(["changed"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"changed": RPC._Bool}) | RPC._Req(["changed"])
+        )
 
     def password_enter(self, wallet: str, password: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#password_enter"
@@ -1467,16 +3364,18 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "password_enter"
         data["wallet"] = wallet
         data["password"] = password
-        s = RPC._Dict({"valid": RPC._Bool}) | RPC._Req(["valid"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"valid": RPC._Bool}) | RPC._Req(["valid"])
+        )
 
     def password_valid(self, wallet: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#password_valid"
         data: dict[str, Any] = {}
         data["action"] = "password_valid"
         data["wallet"] = wallet
-        s = RPC._Dict({"valid": RPC._Bool}) | RPC._Req(["valid"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"valid": RPC._Bool}) | RPC._Req(["valid"])
+        )
 
     def receive(self, wallet: str, account: str, block: str, work: str = "") -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#receive"
@@ -1487,38 +3386,43 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["block"] = block
         if work:
             data["work"] = work
-        s = RPC._Dict({"block": RPC._H64}) | RPC._Req(["block"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"block": RPC._H64}) | RPC._Req(["block"])
+        )
 
     def receive_minimum(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#receive_minimum"
         data: dict[str, Any] = {}
         data["action"] = "receive_minimum"
-        s = RPC._Dict({"amount": RPC._UInt}) | RPC._Req(["amount"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"amount": RPC._UInt}) | RPC._Req(["amount"])
+        )
 
     def receive_minimum_set(self, amount: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#receive_minimum_set"
         data: dict[str, Any] = {}
         data["action"] = "receive_minimum_set"
         data["amount"] = amount
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def search_receivable(self, wallet: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#search_receivable"
         data: dict[str, Any] = {}
         data["action"] = "search_receivable"
         data["wallet"] = wallet
-        s = RPC._Dict({"started": RPC._Bool}) | RPC._Req(["started"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"started": RPC._Bool}) | RPC._Req(["started"])
+        )
 
     def search_receivable_all(self) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#search_receivable_all"
         data: dict[str, Any] = {}
         data["action"] = "search_receivable_all"
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def send(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
@@ -1540,8 +3444,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["id"] = id_
         if work:
             data["work"] = work
-        s = RPC._Dict({"block": RPC._H64}) | RPC._Req(["block"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"block": RPC._H64}) | RPC._Req(["block"])
+        )
 
     def wallet_add(self, wallet: str, key: str, work: bool = False) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_add"
@@ -1551,8 +3456,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["key"] = key
         if work:
             data["work"] = True
-        s = RPC._Dict({"account": RPC._Acc}) | RPC._Req(["account"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"account": RPC._Acc}) | RPC._Req(["account"])
+        )
 
     def wallet_add_watch(self, wallet: str, accounts: list[str]) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_add_watch"
@@ -1560,8 +3466,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "wallet_add_watch"
         data["wallet"] = wallet
         data["accounts"] = accounts
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def wallet_balances(self, wallet: str, threshold: int = 0) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_balances"
@@ -1570,22 +3477,25 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["wallet"] = wallet
         if threshold:
             data["threshold"] = threshold
-        s = RPC._Dict(
-            {
-                "balances": RPC._DictP(
-                    {
-                        RPC._AccP: RPC._Dict(
-                            {
-                                "balance": RPC._UInt,
-                                "pending": RPC._UInt,
-                                "receivable": RPC._UInt,
-                            }
-                        )
-                    }
-                )
-            }
-        ) | RPC._Req(["balances"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "balances": RPC._DictP(
+                        {
+                            RPC._AccP: RPC._Dict(
+                                {
+                                    "balance": RPC._UInt,
+                                    "pending": RPC._UInt,
+                                    "receivable": RPC._UInt,
+                                }
+                            )
+                        }
+                    )
+                }
+            )
+            | RPC._Req(["balances"]),
+        )
 
     def wallet_change_seed(self, wallet: str, seed: str, count: int = 0) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_change_seed"
@@ -1595,8 +3505,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["seed"] = seed
         if count:
             data["count"] = count
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def wallet_contains(self, wallet: str, account: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_contains"
@@ -1604,8 +3515,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "wallet_contains"
         data["wallet"] = wallet
         data["account"] = account
-        s = RPC._Dict({"exists": RPC._Bool}) | RPC._Req(["exists"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"exists": RPC._Bool}) | RPC._Req(["exists"])
+        )
 
     def wallet_create(self, seed: str = "") -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_create"
@@ -1613,16 +3525,18 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "wallet_create"
         if seed:
             data["seed"] = seed
-        s = RPC._Dict({"wallet": RPC._H64}) | RPC._Req(["wallet"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"wallet": RPC._H64}) | RPC._Req(["wallet"])
+        )
 
     def wallet_destroy(self, wallet: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_destroy"
         data: dict[str, Any] = {}
         data["action"] = "wallet_destroy"
         data["wallet"] = wallet
-        s = RPC._Dict({"destroyed": RPC._Bool}) | RPC._Req(["destroyed"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"destroyed": RPC._Bool}) | RPC._Req(["destroyed"])
+        )
 
     def wallet_export(self, wallet: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_export"
@@ -1636,10 +3550,11 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data: dict[str, Any] = {}
         data["action"] = "wallet_frontiers"
         data["wallet"] = wallet
-        s = RPC._Dict({"frontiers": RPC._DictP({RPC._AccP: RPC._H64})}) | RPC._Req(
-            ["frontiers"]
+        return self._request(
+            data,
+            lambda: RPC._Dict({"frontiers": RPC._DictP({RPC._AccP: RPC._H64})})
+            | RPC._Req(["frontiers"]),
         )
-        return self._request(data, s)
 
     def wallet_history(self, wallet: str, modified_since: int = 0) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_history"
@@ -1648,55 +3563,61 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["wallet"] = wallet
         if modified_since:
             data["modified_since"] = modified_since
-        s = RPC._Dict(
-            {
-                "history": RPC._List(
-                    RPC._Dict(
-                        {
-                            "type": RPC._Type,
-                            "account": RPC._Acc,
-                            "amount": RPC._UInt,
-                            "block_account": RPC._Acc,
-                            "hash": RPC._H64,
-                            "local_timestamp": RPC._UInt,
-                        }
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "history": RPC._List(
+                        RPC._Dict(
+                            {
+                                "type": RPC._Type,
+                                "account": RPC._Acc,
+                                "amount": RPC._UInt,
+                                "block_account": RPC._Acc,
+                                "hash": RPC._H64,
+                                "local_timestamp": RPC._UInt,
+                            }
+                        )
                     )
-                )
-            }
-        ) | RPC._Req(["history"])
-        return self._request(data, s)
+                }
+            )
+            | RPC._Req(["history"]),
+        )
 
     def wallet_info(self, wallet: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_info"
         data: dict[str, Any] = {}
         data["action"] = "wallet_info"
         data["wallet"] = wallet
-        s = RPC._Dict(
-            {
-                "balance": RPC._UInt,
-                "pending": RPC._UInt,
-                "receivable": RPC._UInt,
-                "accounts_count": RPC._UInt,
-                "adhoc_count": RPC._UInt,
-                "deterministic_count": RPC._UInt,
-                "deterministic_index": RPC._UInt,
-                "accounts_block_count": RPC._UInt,
-                "accounts_cemented_block_count": RPC._UInt,
-            }
-        ) | RPC._Req(
-            [
-                "balance",
-                "pending",
-                "receivable",
-                "accounts_count",
-                "adhoc_count",
-                "deterministic_count",
-                "deterministic_index",
-                "accounts_block_count",
-                "accounts_cemented_block_count",
-            ]
-        )
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "balance": RPC._UInt,
+                    "pending": RPC._UInt,
+                    "receivable": RPC._UInt,
+                    "accounts_count": RPC._UInt,
+                    "adhoc_count": RPC._UInt,
+                    "deterministic_count": RPC._UInt,
+                    "deterministic_index": RPC._UInt,
+                    "accounts_block_count": RPC._UInt,
+                    "accounts_cemented_block_count": RPC._UInt,
+                }
+            )
+            | RPC._Req(
+                [
+                    "balance",
+                    "pending",
+                    "receivable",
+                    "accounts_count",
+                    "adhoc_count",
+                    "deterministic_count",
+                    "deterministic_index",
+                    "accounts_block_count",
+                    "accounts_cemented_block_count",
+                ]
+            ),
+        )
 
     def wallet_ledger(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
@@ -1718,41 +3639,46 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["receivable"] = True
         if modified_since:
             data["modified_since"] = modified_since
-        s = RPC._Dict(
-            {
-                "accounts": RPC._DictP(
-                    {
-                        RPC._AccP: RPC._Dict(
-                            {
-                                "frontier": RPC._H64,
-                                "open_block": RPC._H64,
-                                "representative_block": RPC._H64,
-                                "balance": RPC._UInt,
-                                "modified_timestamp": RPC._UInt,
-                                "block_count": RPC._UInt,
-                            }
-                        )
-                    }
-                )
-            }
-        ) | RPC._Req(["accounts"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "accounts": RPC._DictP(
+                        {
+                            RPC._AccP: RPC._Dict(
+                                {
+                                    "frontier": RPC._H64,
+                                    "open_block": RPC._H64,
+                                    "representative_block": RPC._H64,
+                                    "balance": RPC._UInt,
+                                    "modified_timestamp": RPC._UInt,
+                                    "block_count": RPC._UInt,
+                                }
+                            )
+                        }
+                    )
+                }
+            )
+            | RPC._Req(["accounts"]),
+        )
 
     def wallet_lock(self, wallet: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_lock"
         data: dict[str, Any] = {}
         data["action"] = "wallet_lock"
         data["wallet"] = wallet
-        s = RPC._Dict({"locked": RPC._Bool}) | RPC._Req(["locked"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"locked": RPC._Bool}) | RPC._Req(["locked"])
+        )
 
     def wallet_locked(self, wallet: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_locked"
         data: dict[str, Any] = {}
         data["action"] = "wallet_locked"
         data["wallet"] = wallet
-        s = RPC._Dict({"locked": RPC._Bool}) | RPC._Req(["locked"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"locked": RPC._Bool}) | RPC._Req(["locked"])
+        )
 
     def wallet_receivable(  # pylint: disable=too-many-arguments,too-many-positional-arguments
         self,
@@ -1779,43 +3705,49 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
             data["min_version"] = True
         if not include_only_confirmed:
             data["include_only_confirmed"] = False
-        s = RPC._Dict(
-            {
-                "blocks": RPC._DictP(
-                    {
-                        RPC._AccP: {
-                            "anyOf": [
-                                RPC._List(RPC._H64),
-                                RPC._DictP(
-                                    {
-                                        RPC._H64P: {
-                                            "anyOf": [
-                                                RPC._UInt,
-                                                RPC._Dict(
-                                                    {
-                                                        "amount": RPC._UInt,
-                                                        "source": RPC._Acc,
-                                                    }
-                                                ),
-                                            ]
+        return self._request(
+            data,
+            lambda: RPC._Dict(
+                {
+                    "blocks": RPC._DictP(
+                        {
+                            RPC._AccP: {
+                                "anyOf": [
+                                    RPC._List(RPC._H64),
+                                    RPC._DictP(
+                                        {
+                                            RPC._H64P: {
+                                                "anyOf": [
+                                                    RPC._UInt,
+                                                    RPC._Dict(
+                                                        {
+                                                            "amount": RPC._UInt,
+                                                            "source": RPC._Acc,
+                                                        }
+                                                    ),
+                                                ]
+                                            }
                                         }
-                                    }
-                                ),
-                            ]
+                                    ),
+                                ]
+                            }
                         }
-                    }
-                )
-            }
-        ) | RPC._Req(["blocks"])
-        return self._request(data, s)
+                    )
+                }
+            )
+            | RPC._Req(["blocks"]),
+        )
 
     def wallet_representative(self, wallet: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_representative"
         data: dict[str, Any] = {}
         data["action"] = "wallet_representative"
         data["wallet"] = wallet
-        s = RPC._Dict({"representative": RPC._Acc}) | RPC._Req(["representative"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict({"representative": RPC._Acc})
+            | RPC._Req(["representative"]),
+        )
 
     def wallet_representative_set(
         self, wallet: str, representative: str, update_existing_accounts: bool = False
@@ -1827,8 +3759,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["representative"] = representative
         if update_existing_accounts:
             data["update_existing_accounts"] = True
-        s = RPC._Dict({"set": RPC._Bool}) | RPC._Req(["set"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"set": RPC._Bool}) | RPC._Req(["set"])
+        )
 
     def wallet_republish(self, wallet: str, count: int = 1) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_republish"
@@ -1836,18 +3769,21 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "wallet_republish"
         data["wallet"] = wallet
         data["count"] = count
-        s = RPC._Dict({"blocks": RPC._List(RPC._H64)}) | RPC._Req(["blocks"])
-        return self._request(data, s)
+        return self._request(
+            data,
+            lambda: RPC._Dict({"blocks": RPC._List(RPC._H64)}) | RPC._Req(["blocks"]),
+        )
 
     def wallet_work_get(self, wallet: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#wallet_work_get"
         data: dict[str, Any] = {}
         data["action"] = "wallet_workget"
         data["wallet"] = wallet
-        s = RPC._Dict({"works": RPC._DictP({RPC._AccP: RPC._H16})}) | RPC._Req(
-            ["works"]
+        return self._request(
+            data,
+            lambda: RPC._Dict({"works": RPC._DictP({RPC._AccP: RPC._H16})})
+            | RPC._Req(["works"]),
         )
-        return self._request(data, s)
 
     def work_get(self, wallet: str, account: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#workget"
@@ -1855,8 +3791,9 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["action"] = "workget"
         data["wallet"] = wallet
         data["account"] = account
-        s = RPC._Dict({"work": RPC._H16}) | RPC._Req(["work"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"work": RPC._H16}) | RPC._Req(["work"])
+        )
 
     def work_set(self, wallet: str, account: str, work: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#work_set"
@@ -1865,55 +3802,1436 @@ class RPC(ABC):  # pylint: disable=too-many-public-methods
         data["wallet"] = wallet
         data["account"] = account
         data["work"] = work
-        s = RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"success": RPC._Bool}) | RPC._Req(["success"])
+        )
 
     def nano_to_raw(self, amount: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#nano_to_raw"
         data: dict[str, Any] = {}
         data["action"] = "nano_to_raw"
         data["amount"] = amount
-        s = RPC._Dict({"amount": RPC._UInt}) | RPC._Req(["amount"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"amount": RPC._UInt}) | RPC._Req(["amount"])
+        )
 
     def raw_to_nano(self, amount: str) -> Any:
         "https://docs.nano.org/commands/rpc-protocol/#raw_to_nano"
         data: dict[str, Any] = {}
         data["action"] = "raw_to_nano"
         data["amount"] = amount
-        s = RPC._Dict({"amount": RPC._UInt}) | RPC._Req(["amount"])
-        return self._request(data, s)
+        return self._request(
+            data, lambda: RPC._Dict({"amount": RPC._UDbl}) | RPC._Req(["amount"])
+        )
+
+    def iter_account_history(  # pylint: disable=too-many-arguments
+        self,
+        account: str,
+        page_size: int = 1000,
+        *,
+        raw: bool = False,
+        head: str = "",
+        include_linked_account: bool = False,
+        offset: int = 0,
+        reverse: bool = False,
+        account_filter: list[str] | None = None,
+    ) -> Any:
+        """Iterate over the history of an account with :meth:`account_history`,
+        ``page_size`` blocks per request, following ``previous`` (``next`` if
+        reverse) from page to page
+
+        :return: iterator of history entries, asynchronous in async clients
+        """
+
+        def advance(p: dict[str, Any], r: Any) -> dict[str, Any] | None:
+            cursor = r.get("next" if reverse else "previous")
+            return (
+                p | {"head": cursor, "offset": 0} if cursor and r["history"] else None
+            )
+
+        return self._paginate(
+            self.account_history,
+            {
+                "account": account,
+                "count": page_size,
+                "raw": raw,
+                "head": head,
+                "include_linked_account": include_linked_account,
+                "offset": offset,
+                "reverse": reverse,
+                "account_filter": account_filter,
+            },
+            advance,
+            lambda r: r["history"],
+        )
+
+    def iter_delegators(
+        self,
+        account: str,
+        page_size: int = 1000,
+        *,
+        threshold: int = 0,
+        start: str = "",
+    ) -> Any:
+        """Iterate over the delegators of a representative with
+        :meth:`delegators`, ``page_size`` accounts per request, starting each
+        page after the last account of the previous one
+
+        :return: iterator of (account, balance) tuples, asynchronous in async
+          clients
+        """
+
+        def advance(p: dict[str, Any], r: Any) -> dict[str, Any] | None:
+            d = r["delegators"]
+            return p | {"start": next(reversed(d))} if len(d) >= page_size else None
+
+        return self._paginate(
+            self.delegators,
+            {
+                "account": account,
+                "threshold": threshold,
+                "count": page_size,
+                "start": start,
+            },
+            advance,
+            lambda r: r["delegators"].items(),
+        )
+
+    def iter_ledger(  # pylint: disable=too-many-arguments
+        self,
+        account: str = "",
+        page_size: int = 1000,
+        *,
+        representative: bool = False,
+        weight: bool = False,
+        receivable: bool = False,
+        modified_since: int = 0,
+        threshold: int = 0,
+    ) -> Any:
+        """Iterate over the accounts in the ledger with :meth:`ledger`,
+        ``page_size`` accounts per request, starting each page at the account
+        following the last account of the previous one
+
+        :arg account: account to start from, the first account if empty
+        :return: iterator of (account, info) tuples, asynchronous in async clients
+        """
+
+        def advance(p: dict[str, Any], r: Any) -> dict[str, Any] | None:
+            a = r["accounts"]
+            if len(a) < page_size:
+                return None
+            return p | {"account": self._next_account(next(reversed(a)))}
+
+        return self._paginate(
+            self.ledger,
+            {
+                "account": account or npy.Account(pk="0" * 64).addr,
+                "count": page_size,
+                "representative": representative,
+                "weight": weight,
+                "receivable": receivable,
+                "modified_since": modified_since,
+                "threshold": threshold,
+            },
+            advance,
+            lambda r: r["accounts"].items(),
+        )
+
+    def iter_unopened(
+        self, account: str = "", page_size: int = 1000, *, threshold: int = 0
+    ) -> Any:
+        """Iterate over the unopened accounts with :meth:`unopened`,
+        ``page_size`` accounts per request, starting each page at the account
+        following the last account of the previous one
+
+        :arg account: account to start from, the first account if empty
+        :return: iterator of (account, receivable amount) tuples, asynchronous in
+          async clients
+        """
+
+        def advance(p: dict[str, Any], r: Any) -> dict[str, Any] | None:
+            a = r["accounts"]
+            if len(a) < page_size:
+                return None
+            return p | {"account": self._next_account(next(reversed(a)))}
+
+        return self._paginate(
+            self.unopened,
+            {"account": account, "count": page_size, "threshold": threshold},
+            advance,
+            lambda r: r["accounts"].items(),
+        )
 
 
-class HTTP(RPC):
-    """HTTP RPC class
+class HTTP(RPC):  # pylint: disable=too-many-instance-attributes
+    """HTTP RPC class. Actions in ``reads``, and in ``safe``, are retried after
+    a lost connection, a timeout, or a 429, 502, 503 or 504 status, waiting a
+    random time up to a back-off doubling with each attempt.
 
     :arg url: URL of the nano node
+    :arg validation: response validation mode, *full*, *sampled* or *off*
+    :arg timeout: seconds to wait to connect and for a response, or a
+      (connect, read) tuple
+    :arg pool_size: maximum number of connections kept open, as many threads
+      can make requests at once without waiting for a new connection
+    :arg keep_alive: whether to keep connections open between requests
+    :arg retries: maximum number of retries of a request
+    :arg deadline: seconds a request may take in all, retries included, None
+      for no limit
+    :arg safe: further actions safe to retry, e.g. ``process``, whose block is
+      rejected as old if the node already processed it
     """
 
-    def __init__(self, url: str = "http://localhost:7076"):
+    backoff = 0.1
+    "seconds of the first back-off"
+    max_backoff = 2.0
+    "maximum seconds of a back-off"
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        url: str = "http://localhost:7076",
+        validation: str = "full",
+        *,
+        timeout: float | tuple[float, float] = (5, 30),
+        pool_size: int = 10,
+        keep_alive: bool = True,
+        retries: int = 2,
+        deadline: float | None = None,
+        safe: Iterable[str] = (),
+    ):
+        self.validation = validation
         self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.deadline = deadline
+        self.safe = frozenset(safe)
         self.api = requests.session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size
+        )
+        self.api.mount("http://", adapter)
+        self.api.mount("https://", adapter)
+        if not keep_alive:
+            self.api.headers["Connection"] = "close"
 
     def request(self, data: dict[str, Any]) -> Any:
-        r = self.api.post(self.url, json=data)
-        r.raise_for_status()
-        return r.json()
+        action = data["action"]
+        retries = self.retries if action in self.reads or action in self.safe else 0
+        end = None if self.deadline is None else time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                with self._span(action, "network"):
+                    r = self.api.post(self.url, json=data, timeout=self._timeout(end))
+                    r.raise_for_status()
+                with self._span(action, "decode") as s:
+                    s.size = len(r.content)
+                    return r.json()
+            except requests.RequestException as e:
+                delay = random.uniform(
+                    0, min(self.max_backoff, self.backoff * 2**attempt)
+                )
+                if (
+                    attempt >= retries
+                    or not self._retryable(e)
+                    or end is not None
+                    and time.monotonic() + delay >= end
+                ):
+                    raise
+                time.sleep(delay)
+                attempt += 1
+
+    def _timeout(self, end: float | None) -> float | tuple[float, float]:
+        """Timeouts of an attempt
+
+        :arg end: monotonic time the request must end by, None for no limit
+        :return: (connect, read) timeouts, within the time left
+        :raises requests.Timeout: if no time is left
+        """
+        if end is None:
+            return self.timeout
+        left = end - time.monotonic()
+        if left <= 0:
+            raise requests.Timeout("Deadline exceeded")
+        t = self.timeout if isinstance(self.timeout, tuple) else (self.timeout,) * 2
+        return min(t[0], left), min(t[1], left)
+
+    @staticmethod
+    def _retryable(e: requests.RequestException) -> bool:
+        "whether a request failed in a way worth retrying"
+        if isinstance(e, (requests.ConnectionError, requests.Timeout)):
+            return True
+        return e.response is not None and e.response.status_code in (
+            429,
+            502,
+            503,
+            504,
+        )
 
+    def _events(self, data: dict[str, Any]) -> Iterator[tuple[str, Any, Any]]:
+        with self.api.post(self.url, json=data, stream=True, timeout=self.timeout) as r:
+            r.raise_for_status()
+            yield from _JSONStream(r.iter_content(1 << 16))
 
-class WS(RPC):
-    """WebSocket RPC class
+
+class WS(RPC):  # pylint: disable=too-many-instance-attributes
+    """WebSocket RPC class. Requests are tagged with an ``id`` and replies are
+    matched by a background reader, so many requests can be in flight over the
+    connection at once, from several threads. Messages that are not replies are
+    passed to ``subscribers``. A lost connection is reopened and the requests in
+    flight fail with :class:`ConnectionError`, and the functions in
+    ``reconnected`` are called from the reader.
 
     :arg url: URL of the nano node
+    :arg validation: response validation mode, *full*, *sampled* or *off*
+    :arg max_in_flight: maximum number of requests awaiting a reply, further
+      requests block until a reply arrives
+    :arg timeout: seconds to wait for a reply
     """
 
-    def __init__(self, url: str = "ws://localhost:7078"):
+    def __init__(
+        self,
+        url: str = "ws://localhost:7078",
+        validation: str = "full",
+        max_in_flight: int = 64,
+        timeout: float = 30,
+    ):
+        self.validation = validation
+        self.url = url
+        self.timeout = timeout
+        self.subscribers: list[Callable[[Any], None]] = []
+        self.reconnected: list[Callable[[], None]] = []
+        self._ids = itertools.count()
+        self._pending: dict[str, concurrent.futures.Future[Any]] = {}
+        self._actions: dict[str, str] = {}
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
         self.api = websocket.create_connection(url)
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
 
     def __del__(self) -> None:
-        self.api.close()
+        if hasattr(self, "api"):
+            self.close()
+
+    def close(self) -> None:
+        "Close the connection and stop the reader"
+        self._closed.set()
+        with self._lock:
+            self.api.abort()  # type: ignore[no-untyped-call]
+        if threading.current_thread() is not self._reader:
+            self._reader.join()
+        self.api.shutdown()  # type: ignore[no-untyped-call]
+        self._fail(ConnectionError("WebSocket closed"))
+
+    def _fail(self, e: Exception) -> None:
+        "fail the requests in flight"
+        for i in list(self._pending):
+            f = self._pending.pop(i, None)
+            if f and f.set_running_or_notify_cancel():
+                f.set_exception(e)
+
+    def _read(self) -> None:
+        "match replies to requests and pass other messages to subscribers"
+        delay = 0.1
+        while not self._closed.is_set():
+            try:
+                m = self._decode(self.api.recv())
+            except (OSError, ValueError, websocket.WebSocketException):
+                self._fail(ConnectionError("WebSocket connection lost"))
+                if self._closed.wait(delay):
+                    return
+                try:
+                    api = websocket.create_connection(self.url)
+                except (OSError, websocket.WebSocketException):
+                    delay = min(2 * delay, 5)
+                    continue
+                with self._lock:
+                    self.api = api
+                    if self._closed.is_set():
+                        api.abort()  # type: ignore[no-untyped-call]
+                delay = 0.1
+                for c in list(self.reconnected):
+                    c()
+                continue
+            if isinstance(m, dict) and "id" in m:
+                f = self._pending.pop(m.pop("id"), None)
+                if f and f.set_running_or_notify_cancel():
+                    f.set_result(m)
+            else:
+                for s in list(self.subscribers):
+                    s(m)
+
+    def _decode(self, message: str | bytes) -> Any:
+        """Parse a message, timed as the decode phase of the request it answers,
+        or of its topic
+
+        :arg message: JSON message
+        :return: the message
+        """
+        with self._span("", "decode") as s:
+            m = json.loads(message)
+            s.size = len(message)
+            if isinstance(m, dict):
+                s.action = self._actions.get(str(m.get("id")), str(m.get("topic", "")))
+        return m
+
+    def post(self, data: dict[str, Any]) -> None:
+        """Send a message not expecting a reply
+
+        :arg data: dict like object
+        """
+        with self._lock:
+            self.api.send(json.dumps(data))
+
+    def submit(self, data: dict[str, Any]) -> concurrent.futures.Future[Any]:
+        """Send a request without waiting for the reply
+
+        :arg data: dict like object
+        :return: future of the JSON response
+        """
+        self._slots.acquire()  # pylint: disable=consider-using-with
+        i = str(next(self._ids))
+        f: concurrent.futures.Future[Any] = concurrent.futures.Future()
+        f.add_done_callback(lambda _: self._done(i))
+        self._actions[i] = str(data.get("action", ""))
+        self._pending[i] = f
+        try:
+            with self._lock:
+                self.api.send(json.dumps(data | {"id": i}))
+        except (OSError, websocket.WebSocketException) as e:
+            if self._pending.pop(i, None) and f.set_running_or_notify_cancel():
+                f.set_exception(ConnectionError(e))
+        return f
+
+    def _done(self, i: str) -> None:
+        "forget a settled or cancelled request and free its slot"
+        self._pending.pop(i, None)
+        self._actions.pop(i, None)
+        self._slots.release()
 
     def request(self, data: dict[str, Any]) -> Any:
-        self.api.send(json.dumps(data))
-        r = json.loads(self.api.recv())
+        with self._span(data["action"], "network"):
+            f = self.submit(data)
+            try:
+                return f.result(self.timeout)
+            except concurrent.futures.TimeoutError:
+                f.cancel()
+                raise
+
+
+class _Async(RPC):  # pylint: disable=abstract-method
+    "base of the asynchronous clients, whose methods return coroutines"
+
+    async def _request(  # pylint: disable=invalid-overridden-method
+        self,
+        data: dict[str, Any],
+        schema: Callable[[], dict[str, Any]] | None = None,
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Any:
+        with self._span(data["action"], "request") as s:
+            r = None if self.offline is None else self.offline.answer(data)
+            if r is None and (
+                self.cache is None or not self.cache.caches(data["action"])
+            ):
+                r = await self._fetch(data, schema, check)
+            elif r is None:
+                rest, r = self._cached(data)
+                if rest is not None:
+                    r = self._store(data, await self._fetch(rest, schema, check), r)
+            s.error = str(r.get("error", "")) if isinstance(r, dict) else ""
+        return r
+
+    async def _fetch(  # pylint: disable=invalid-overridden-method
+        self,
+        data: dict[str, Any],
+        schema: Callable[[], dict[str, Any]] | None = None,
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Any:
+        async def fetch() -> Any:
+            return self._validate(data, await self._limited(data), schema, check)
+
+        if self.coalesce is None or data["action"] not in RPC.reads:
+            return await fetch()
+        return await self.coalesce.acall(self._flight(data), fetch)
+
+    async def _limited(  # pylint: disable=invalid-overridden-method
+        self, data: dict[str, Any]
+    ) -> Any:
+        if self.limiter is None:
+            return await self.request(data)
+        with self._span(data["action"], "throttle"):
+            started = await self.limiter.aacquire(data["action"])
+        self._gauge()
+        error = True
+        try:
+            r = await self.request(data)
+            error = False
+        finally:
+            self.limiter.release(started, error)
+            self._gauge()
+        return r
+
+    async def _gather(  # pylint: disable=invalid-overridden-method
+        self, calls: list[Callable[[], Any]], merge: Callable[[list[Any]], Any]
+    ) -> Any:
+        """Make requests concurrently, ``chunk_concurrency`` at a time
+
+        :arg calls: functions making a request each
+        :arg merge: function combining the responses, or exceptions, of the calls
+        :return: merged response
+        """
+        limit = asyncio.Semaphore(self.chunk_concurrency)
+
+        async def call(c: Callable[[], Any]) -> Any:
+            async with limit:
+                return await c()
+
+        return merge(
+            await asyncio.gather(*(call(c) for c in calls), return_exceptions=True)
+        )
+
+    async def _paginate(  # pylint: disable=invalid-overridden-method
+        self,
+        fetch: Callable[..., Any],
+        params: dict[str, Any],
+        advance: Callable[[dict[str, Any], Any], dict[str, Any] | None],
+        entries: Callable[[Any], Iterable[Any]],
+    ) -> Any:
+        t: asyncio.Future[Any] | None = asyncio.ensure_future(fetch(**params))
+        try:
+            while t:
+                r = await t
+                if "error" in r:
+                    raise RuntimeError(r["error"])
+                p = advance(params, r)
+                t = asyncio.ensure_future(fetch(**p)) if p else None
+                params = p or params
+                for e in entries(r):
+                    yield e
+        finally:
+            if t:
+                t.cancel()
+
+    async def _events(  # pylint: disable=invalid-overridden-method
+        self, data: dict[str, Any]
+    ) -> Any:
+        return _members(await self._limited(data))
+
+    async def _stream(  # pylint: disable=invalid-overridden-method
+        self,
+        data: dict[str, Any],
+        schema: Callable[[], dict[str, Any]] | None = None,
+        check: Callable[[dict[str, Any], Any], None] | None = None,
+    ) -> Any:
+        for e in self._entries(data, await self._events(data), schema, check):
+            yield e
+
+
+class AsyncWS(_Async, WS):
+    """Asynchronous WebSocket RPC class. It has the same methods as :class:`WS`,
+    which return coroutines instead.
+
+    :arg url: URL of the nano node
+    :arg validation: response validation mode, *full*, *sampled* or *off*
+    :arg max_in_flight: maximum number of requests awaiting a reply, further
+      requests wait until a reply arrives
+    :arg timeout: seconds to wait for a reply
+    """
+
+    def __init__(
+        self,
+        url: str = "ws://localhost:7078",
+        validation: str = "full",
+        max_in_flight: int = 64,
+        timeout: float = 30,
+    ):
+        super().__init__(url, validation, max_in_flight, timeout)
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def request(  # pylint: disable=invalid-overridden-method
+        self, data: dict[str, Any]
+    ) -> Any:
+        async with self._semaphore:
+            with self._span(data["action"], "network"):
+                f = asyncio.wrap_future(self.submit(data))
+                return await asyncio.wait_for(f, self.timeout)
+
+
+class AsyncHTTP(_Async):  # pylint: disable=too-many-instance-attributes
+    """Asynchronous HTTP RPC class. It has the same methods as :class:`HTTP`,
+    which return coroutines instead. Requests are sent over a pool of keep-alive
+    connections. Actions in ``reads``, and in ``safe``, are sent again on a new
+    connection if the idle one they were sent on was closed by the node.
+
+    :arg url: URL of the nano node
+    :arg validation: response validation mode, *full*, *sampled* or *off*
+    :arg max_connections: maximum number of concurrent requests and connections
+    :arg timeout: seconds to wait for a response
+    :arg safe: further actions safe to send again, e.g. ``process``
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        url: str = "http://localhost:7076",
+        validation: str = "full",
+        max_connections: int = 10,
+        timeout: float = 30,
+        safe: Iterable[str] = (),
+    ):
+        self.validation = validation
+        self.url = url
+        self.safe = frozenset(safe)
+        u = urllib.parse.urlsplit(url)
+        self._addr = (
+            u.hostname or "localhost",
+            u.port or (443 if u.scheme == "https" else 80),
+        )
+        self._ssl = u.scheme == "https"
+        self._head = (
+            f"POST {u.path or '/'}{'?' if u.query else ''}{u.query} HTTP/1.1\r\n"
+            f"Host: {u.netloc}\r\nContent-Type: application/json\r\n"
+        ).encode()
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._semaphore = asyncio.Semaphore(max_connections)
+        self.timeout = timeout
+
+    async def __aenter__(self) -> "AsyncHTTP":
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        "Close idle connections"
+        while self._idle:
+            self._idle.pop()[1].close()
+
+    async def request(  # pylint: disable=invalid-overridden-method
+        self, data: dict[str, Any]
+    ) -> Any:
+        with self._span(data["action"], "network"):
+            body = await self._send(data)
+        with self._span(data["action"], "decode") as s:
+            s.size = len(body)
+            return json.loads(body)
+
+    async def _events(  # pylint: disable=invalid-overridden-method
+        self, data: dict[str, Any]
+    ) -> Any:
+        return _JSONStream([await self._send(data)])
+
+    async def _send(self, data: dict[str, Any]) -> bytes:
+        """Make a request
+
+        :arg data: dict like object
+        :return: body of the response
+        """
+        body = json.dumps(data).encode()
+        req = self._head + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        retry = data["action"] in self.reads or data["action"] in self.safe
+        async with self._semaphore:
+            return await asyncio.wait_for(self._post(req, retry), self.timeout)
+
+    async def _post(self, req: bytes, retry: bool) -> bytes:
+        """Send a request on an idle connection or a new one. A request on an
+        idle connection, which the node closed meanwhile, is sent again on a new
+        connection if retry, as the node may have processed it otherwise.
+
+        :arg req: HTTP request
+        :arg retry: whether the request is safe to send again
+        :return: body of the response
+        """
+        while True:
+            reused = bool(self._idle)
+            if reused:
+                reader, writer = self._idle.pop()
+            else:
+                reader, writer = await asyncio.open_connection(
+                    *self._addr, ssl=self._ssl or None
+                )
+            try:
+                writer.write(req)
+                await writer.drain()
+                line = await reader.readline()
+            except ConnectionError:
+                writer.close()
+                if reused and retry:
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            if not line:
+                writer.close()
+                if reused and retry:
+                    continue
+                raise ConnectionError("Connection closed by the node")
+            try:
+                status, keep_alive, body = await self._response(line, reader)
+            except BaseException:
+                writer.close()
+                raise
+            if keep_alive:
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+            if not 200 <= status < 300:
+                raise requests.HTTPError(f"{status} Error for url: {self.url}")
+            return body
+
+    @staticmethod
+    async def _response(
+        line: bytes, reader: asyncio.StreamReader
+    ) -> tuple[int, bool, bytes]:
+        """Read an HTTP response
+
+        :arg line: status line of the response
+        :arg reader: stream of the rest of the response
+        :return: status code, whether the connection can be reused, and body
+        """
+        version, status = line.split()[:2]
+        headers = {}
+        while (h := await reader.readline()).strip():
+            k, _, v = h.decode("latin-1").partition(":")
+            headers[k.strip().lower()] = v.strip().lower()
+        conn = headers.get("connection", "")
+        keep_alive = conn == "keep-alive" or version == b"HTTP/1.1" and conn != "close"
+        if headers.get("transfer-encoding") == "chunked":
+            body = b""
+            while size := int((await reader.readline()).split(b";")[0], 16):
+                body += (await reader.readexactly(size + 2))[:-2]
+            while (await reader.readline()).strip():
+                pass
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return int(status), keep_alive, body
+
+
+_FAILURES = (
+    OSError,
+    ValueError,
+    concurrent.futures.TimeoutError,
+    websocket.WebSocketException,
+)
+"errors of a node failing to answer a request"
+
+
+class _Node:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    "a node of a pool, with its recent latencies and health"
+
+    def __init__(self, rpc: RPC, window: int):
+        self.rpc = rpc
+        self.latency: collections.deque[float] = collections.deque(maxlen=window)
+        self.ewma = 0.0
+        self.in_flight = 0
+        self.failures = 0
+        self.down_until = 0.0
+        self.blocks = 0
+        self.lagging = False
+
+    def p95(self, default: float) -> float:
+        "95th percentile of the recent latencies, default until there are 20"
+        if len(self.latency) < 20:
+            return default
+        s = sorted(self.latency)
+        return s[int(0.95 * (len(s) - 1))]
+
+
+class Pool(RPC):  # pylint: disable=too-many-instance-attributes
+    """RPC class fronting several nodes. Actions in ``reads``, which do not
+    change any state, go to the healthy node with the lowest latency. If it has
+    not answered within its 95th percentile latency, the request is hedged: it
+    is sent to the next node as well and the first answer wins. Other actions,
+    e.g. ``process``, go to the nodes in the given order, healthy nodes first,
+    moving to the next node only when a node fails to answer. A node that fails
+    is skipped for a back-off, doubling with each consecutive failure, and
+    :meth:`check` marks the nodes trailing the highest block count as lagging.
+
+    :arg nodes: RPC clients, or URLs of the nodes, HTTP or WebSocket
+    :arg validation: response validation mode, *full*, *sampled* or *off*
+    :arg hedge: whether to hedge reads
+    :arg max_lag: number of blocks a node may trail the highest block count by
+    :arg interval: seconds between health checks from a background thread, 0 to
+      only check on :meth:`check`
+    """
+
+    hedge_delay = 0.1
+    "seconds to wait before hedging until a node has 20 recent latencies"
+    backoff = 0.5
+    "seconds a node is skipped for after its first consecutive failure"
+    max_backoff = 30.0
+    "maximum seconds a node is skipped for"
+    check_timeout = 5.0
+    "seconds a node has to answer a health check"
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        nodes: Iterable[RPC | str],
+        validation: str = "full",
+        hedge: bool = True,
+        max_lag: int = 1000,
+        interval: float = 0,
+    ):
+        clients = [
+            (
+                (WS(n) if n.startswith("ws") else HTTP(n, retries=0))
+                if isinstance(n, str)
+                else n
+            )
+            for n in nodes
+        ]
+        if not clients:
+            raise ValueError("A pool needs at least one node")
+        self.validation = validation
+        self.hedge = hedge
+        self.max_lag = max_lag
+        self.hedges = 0
+        self.nodes = [_Node(c, 100) for c in clients]
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(4 * len(clients) + 4)
+        self._closed = threading.Event()
+        if interval:
+            threading.Thread(target=self._watch, args=(interval,), daemon=True).start()
+
+    def close(self) -> None:
+        "Stop the health checks and close the nodes"
+        self._closed.set()
+        self._executor.shutdown(wait=False)
+        for n in self.nodes:
+            if isinstance(n.rpc, WS):
+                n.rpc.close()
+
+    def _watch(self, interval: float) -> None:
+        "check the nodes every interval seconds until closed"
+        while not self._closed.wait(interval):
+            self.check()
+
+    def _call(self, node: _Node, data: dict[str, Any]) -> Any:
+        """Make a request to a node, recording its latency or failure
+
+        :arg node: node of the pool
+        :arg data: dict like object
+        :return: JSON reponse as dict
+        """
+        with self._lock:
+            node.in_flight += 1
+        t0 = time.perf_counter()
+        try:
+            r = node.rpc.request(data)
+        except _FAILURES:
+            with self._lock:
+                node.in_flight -= 1
+                node.failures += 1
+                backoff = self.backoff * 2 ** (node.failures - 1)
+                node.down_until = time.monotonic() + min(backoff, self.max_backoff)
+            raise
+        t = time.perf_counter() - t0
+        with self._lock:
+            node.in_flight -= 1
+            node.failures = 0
+            node.down_until = 0
+            node.latency.append(t)
+            node.ewma = node.ewma + 0.2 * (t - node.ewma) if node.ewma else t
         return r
+
+    def _ordered(self) -> list[_Node]:
+        "the nodes in the given order, healthy, then lagging, then down"
+        now = time.monotonic()
+        return sorted(self.nodes, key=lambda n: (n.down_until > now, n.lagging))
+
+    def _ranked(self) -> list[_Node]:
+        "the nodes by health, then by latency weighed by the requests in flight"
+        now = time.monotonic()
+        return sorted(
+            self.nodes,
+            key=lambda n: (
+                n.down_until > now,
+                n.lagging,
+                n.ewma * (1 + n.in_flight),
+            ),
+        )
+
+    def request(self, data: dict[str, Any]) -> Any:
+        if data["action"] in self.reads:
+            return self._race(data)
+        return self._failover(data)
+
+    def _failover(self, data: dict[str, Any]) -> Any:
+        """Make a request to the nodes in order until one answers
+
+        :arg data: dict like object
+        :return: JSON reponse as dict
+        """
+        error: Exception | None = None
+        for n in self._ordered():
+            try:
+                return self._call(n, data)
+            except _FAILURES as e:
+                error = e
+        assert error
+        raise error
+
+    def _race(self, data: dict[str, Any]) -> Any:
+        """Make a request to the best node, and to the next one if the best
+        node is slower than usual or fails
+
+        :arg data: dict like object
+        :return: the first JSON reponse as dict
+        """
+        nodes = self._ranked()
+        pending: dict[concurrent.futures.Future[Any], _Node] = {}
+
+        def launch() -> None:
+            n = nodes.pop(0)
+            pending[self._executor.submit(self._call, n, data)] = n
+
+        launch()
+        delay = next(iter(pending.values())).p95(self.hedge_delay)
+        hedged = not self.hedge
+        error: Exception | None = None
+        while pending:
+            done, _ = concurrent.futures.wait(
+                pending,
+                None if hedged or not nodes else delay,
+                concurrent.futures.FIRST_COMPLETED,
+            )
+            if not done:
+                self.hedges += 1
+                hedged = True
+                launch()
+                continue
+            for f in done:
+                del pending[f]
+                try:
+                    return f.result()
+                except _FAILURES as e:
+                    error = e
+                    if nodes:
+                        launch()
+        assert error
+        raise error
+
+    def check(self) -> list[dict[str, Any]]:
+        """Ask every node for its block count. Nodes which fail to answer within
+        ``check_timeout`` are down for a back-off, and nodes trailing the highest
+        count by more than ``max_lag`` blocks are lagging until the next check.
+
+        :return: :meth:`status` of the nodes
+        """
+        futures = [
+            self._executor.submit(self._call, n, {"action": "block_count"})
+            for n in self.nodes
+        ]
+        concurrent.futures.wait(futures, self.check_timeout)
+        for n, f in zip(self.nodes, futures):
+            try:
+                n.blocks = int(f.result(0)["count"])
+            except (*_FAILURES, KeyError, TypeError):
+                n.blocks = -1
+        top = max(n.blocks for n in self.nodes)
+        now = time.monotonic()
+        for n in self.nodes:
+            n.lagging = n.blocks < top - self.max_lag
+            if n.blocks < 0:
+                n.down_until = max(n.down_until, now + self.backoff)
+        return self.status()
+
+    def status(self) -> list[dict[str, Any]]:
+        """Health of the nodes
+
+        :return: per node, whether it is up and not lagging, its block count at
+          the last check, its latency (an exponential moving average) and 95th
+          percentile latency in seconds, and its consecutive failures
+        """
+        now = time.monotonic()
+        return [
+            {
+                "healthy": n.down_until <= now and not n.lagging,
+                "blocks": n.blocks,
+                "latency": n.ewma,
+                "p95": n.p95(math.nan),
+                "failures": n.failures,
+            }
+            for n in self.nodes
+        ]
+
+
+class Subscription:  # pylint: disable=too-many-instance-attributes
+    """Confirmations of the blocks of a set of accounts, pushed by a node over
+    WebSocket, in place of polling the accounts for receivable blocks. Iterating
+    over it, with ``for`` or ``async for``, gives a :class:`nanopy.StateBlock`
+    for each confirmed block of a watched account or sending to one. The
+    confirmations which arrived meanwhile are decoded and verified as a batch.
+    The subscription is renewed when the connection is reopened, but the
+    confirmations pushed while it was lost are not replayed.
+
+    :arg url: URL of the node WebSocket
+    :arg accounts: accounts to watch, every account if None
+    :arg verify: whether to drop blocks with an invalid hash or signature
+    :arg batch: maximum number of confirmations decoded and verified at once
+    :arg timeout: seconds to wait for the node to acknowledge a request
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        url: str = "ws://localhost:7078",
+        accounts: Iterable[str] | None = None,
+        verify: bool = True,
+        batch: int = 1024,
+        timeout: float = 30,
+    ):
+        self.accounts = None if accounts is None else set(accounts)
+        self.verify = verify
+        self.batch = batch
+        self.invalid = 0
+        self.reconnects = 0
+        self._messages: collections.deque[Any] = collections.deque()
+        self._cond = threading.Condition()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = []
+        self._closed = False
+        self.ws = WS(url, timeout=timeout)
+        self.ws.subscribers.append(self._push)
+        self.ws.reconnected.append(self._resubscribe)
+        self.ws.request(self._subscribe() | {"ack": True})
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        "Close the connection and end the iterations once they are through"
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            waiters, self._waiters = self._waiters, []
+        for loop, f in waiters:
+            loop.call_soon_threadsafe(self._wake, f)
+        self.ws.close()
+
+    def add(self, accounts: Iterable[str]) -> None:
+        """Watch more accounts
+
+        :arg accounts: accounts to add
+        """
+        self._update("accounts_add", accounts)
+
+    def remove(self, accounts: Iterable[str]) -> None:
+        """Stop watching accounts
+
+        :arg accounts: accounts to remove
+        """
+        self._update("accounts_del", accounts)
+
+    def _update(self, key: str, accounts: Iterable[str]) -> None:
+        """change the watched accounts, replacing the set rather than changing it
+        while the reader thread may be iterating over it"""
+        if self.accounts is None:
+            raise ValueError("Every account is watched")
+        a = set(accounts)
+        if key == "accounts_add":
+            self.accounts = self.accounts | a
+        else:
+            self.accounts = self.accounts - a
+        self.ws.request(
+            {
+                "action": "update",
+                "topic": "confirmation",
+                "ack": True,
+                "options": {key: sorted(a)},
+            }
+        )
+
+    def _subscribe(self) -> dict[str, Any]:
+        "subscription to the confirmations of the watched accounts"
+        data: dict[str, Any] = {"action": "subscribe", "topic": "confirmation"}
+        if self.accounts is not None:
+            data["options"] = {"accounts": sorted(self.accounts)}
+        return data
+
+    def _resubscribe(self) -> None:
+        "renew the subscription on a reopened connection"
+        self.reconnects += 1
+        try:
+            self.ws.post(self._subscribe())
+        except (OSError, websocket.WebSocketException):
+            pass
+
+    def _push(self, m: Any) -> None:
+        "queue a confirmation and wake the iterations waiting for one"
+        if not isinstance(m, dict) or m.get("topic") != "confirmation":
+            return
+        with self._cond:
+            self._messages.append(m.get("message"))
+            self._cond.notify()
+            waiters, self._waiters = self._waiters, []
+        for loop, f in waiters:
+            loop.call_soon_threadsafe(self._wake, f)
+
+    @staticmethod
+    def _wake(f: "asyncio.Future[None]") -> None:
+        "wake an iteration waiting for a confirmation"
+        if not f.done():
+            f.set_result(None)
+
+    def _take(self) -> list[Any]:
+        "dequeue a batch of confirmations, with the condition held"
+        n = min(self.batch, len(self._messages))
+        return [self._messages.popleft() for _ in range(n)]
+
+    def _decode(self, messages: list[Any]) -> list[npy.StateBlock]:
+        """Decode confirmations of the watched accounts into blocks, dropping
+        invalid ones if verifying
+
+        :arg messages: confirmations
+        :return: blocks
+        """
+        blocks, hashes = [], []
+        for m in messages:
+            try:
+                b = m["block"]
+                if self.accounts is not None and not (
+                    b["account"] in self.accounts
+                    or b.get("link_as_account") in self.accounts
+                ):
+                    continue
+                blocks.append(npy.StateBlock.from_dict(b))
+                hashes.append(m["hash"].lower())
+            except (KeyError, TypeError, ValueError):
+                self.invalid += 1
+        if not self.verify:
+            return blocks
+        valid = [
+            b
+            for b, h, v in zip(blocks, hashes, npy.verify_signatures(blocks))
+            if v and b.hash_ == h
+        ]
+        self.invalid += len(blocks) - len(valid)
+        return valid
+
+    def __iter__(self) -> Iterator[npy.StateBlock]:
+        while True:
+            with self._cond:
+                while not self._messages and not self._closed:
+                    self._cond.wait()
+                if not self._messages:
+                    return
+                messages = self._take()
+            yield from self._decode(messages)
+
+    async def __aiter__(self) -> AsyncIterator[npy.StateBlock]:
+        loop = asyncio.get_running_loop()
+        while True:
+            f, messages = None, []
+            with self._cond:
+                if self._messages:
+                    messages = self._take()
+                elif self._closed:
+                    return
+                else:
+                    f = loop.create_future()
+                    self._waiters.append((loop, f))
+            if f:
+                await f
+                continue
+            for b in self._decode(messages):
+                yield b
+
+
+class Tracker:  # pylint: disable=too-many-instance-attributes
+    """Broadcast blocks and track them until they are confirmed. Confirmations
+    come from a :class:`Subscription` to the accounts of the tracked blocks, if
+    given the URL of the node WebSocket, and from polling the unconfirmed blocks
+    with one :meth:`RPC.blocks_info` request every ``poll`` seconds, which also
+    catches confirmations missed while the WebSocket was reconnecting. Accounts
+    stay subscribed to while the tracker is open, and blocks time out as soon
+    as their timeout passes, even when shorter than ``poll``.
+
+    :arg rpc: RPC client, e.g. :class:`HTTP`
+    :arg url: URL of the node WebSocket, empty to only poll
+    :arg poll: seconds between polls
+    :arg timeout: default seconds to wait for a confirmation
+    """
+
+    def __init__(self, rpc: RPC, url: str = "", poll: float = 5, timeout: float = 300):
+        self.rpc = rpc
+        self.poll = poll
+        self.timeout = timeout
+        self.url = url
+        self.sub: Subscription | None = None
+        self._pending: dict[str, tuple[concurrent.futures.Future[str], float]] = {}
+        self._lock = threading.Lock()
+        self._subscribing = threading.Lock()
+        self._closed = threading.Event()
+        self._wake = threading.Event()
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    def __enter__(self) -> "Tracker":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def close(self) -> None:
+        "Stop tracking, cancelling the futures of unconfirmed blocks"
+        self._closed.set()
+        self._wake.set()
+        if self.sub:
+            self.sub.close()
+        for f, _ in list(self._pending.values()):
+            f.cancel()
+
+    def process(
+        self, block: npy.StateBlock, timeout: float | None = None
+    ) -> concurrent.futures.Future[str]:
+        """Broadcast a block with :meth:`RPC.process` and track it
+
+        :arg block: signed state block with work
+        :arg timeout: seconds to wait for the confirmation, ``timeout`` if None
+        :return: future of the block hash, set once the block is confirmed,
+          failing with :class:`RuntimeError` if the node rejects the block or
+          :class:`TimeoutError` if it is not confirmed in time
+        """
+        f = self.track(block.hash_, block.acc.addr, timeout)
+        try:
+            r = self.rpc.process(block.dict_)
+        except BaseException:
+            f.cancel()
+            raise
+        if "error" in r:
+            self._settle(block.hash_, RuntimeError(r["error"]))
+        return f
+
+    def track(
+        self, hash_: str, account: str = "", timeout: float | None = None
+    ) -> concurrent.futures.Future[str]:
+        """Track a block broadcast already
+
+        :arg hash_: 64 hex char block hash
+        :arg account: account of the block, to subscribe to its confirmations
+        :arg timeout: seconds to wait for the confirmation, ``timeout`` if None
+        :return: future of the block hash, set once the block is confirmed
+        """
+        if account and self.url:
+            self._subscribe(account)
+        hash_ = hash_.lower()
+        with self._lock:
+            if hash_ in self._pending:
+                return self._pending[hash_][0]
+            f: concurrent.futures.Future[str] = concurrent.futures.Future()
+            end = time.monotonic() + (self.timeout if timeout is None else timeout)
+            self._pending[hash_] = (f, end)
+        self._wake.set()
+        f.add_done_callback(lambda _: self._pending.pop(hash_, None))
+        return f
+
+    def _subscribe(self, account: str) -> None:
+        "subscribe to the confirmations of an account"
+        with self._subscribing:
+            if self.sub is None:
+                self.sub = Subscription(self.url, [account], verify=False)
+                threading.Thread(target=self._listen, daemon=True).start()
+            elif account not in (self.sub.accounts or ()):
+                self.sub.add([account])
+
+    def _settle(self, hash_: str, error: Exception | None = None) -> None:
+        "set the result of a tracked block"
+        with self._lock:
+            f, _ = self._pending.pop(hash_, (None, 0))
+        if f and f.set_running_or_notify_cancel():
+            if error:
+                f.set_exception(error)
+            else:
+                f.set_result(hash_)
+
+    def _listen(self) -> None:
+        "settle the blocks whose confirmations are pushed"
+        for b in self.sub or ():
+            self._settle(b.hash_)
+
+    def _watch(self) -> None:
+        "poll the unconfirmed blocks and time out the late ones"
+        next_poll = time.monotonic() + self.poll
+        while True:
+            with self._lock:
+                ends = [end for _, end in self._pending.values()]
+            self._wake.wait(max(0, min([next_poll, *ends]) - time.monotonic()))
+            self._wake.clear()
+            if self._closed.is_set():
+                return
+            now = time.monotonic()
+            with self._lock:
+                late = [h for h, (_, end) in self._pending.items() if end <= now]
+            for h in late:
+                self._settle(h, TimeoutError(f"Block {h} not confirmed in time"))
+            if now >= next_poll:
+                self._confirmed()
+                next_poll = time.monotonic() + self.poll
+
+    def _confirmed(self) -> None:
+        "ask the node which tracked blocks are confirmed"
+        hashes = list(self._pending)
+        if not hashes:
+            return
+        try:
+            r = self.rpc.blocks_info(hashes, include_not_found=True)
+        except (
+            *_FAILURES,
+            AssertionError,
+            ChunkError,
+            RuntimeError,
+            jsonschema.exceptions.ValidationError,
+        ):
+            return
+        for h, info in r.get("blocks", {}).items():
+            if info.get("confirmed") == "true":
+                self._settle(h.lower())
+
+
+class Broadcaster:  # pylint: disable=too-many-instance-attributes
+    """Broadcast many signed blocks of many accounts with :meth:`RPC.process`.
+    The blocks of an account are broadcast one at a time in the given order,
+    while different accounts are broadcast concurrently. Blocks rejected with
+    an error in ``retryable``, e.g. a receive broadcast before its send reached
+    the node, are retried after a back-off doubling with each attempt, and the
+    blocks of an account following a block that fails are not broadcast. With
+    ``async_``, the node queues the blocks without waiting for them to be
+    processed, its ledger is polled for them for up to ``settle`` seconds, and
+    the blocks still missing are broadcast again synchronously to learn their
+    errors.
+
+    :arg rpc: RPC client, e.g. :class:`HTTP`
+    :arg concurrency: maximum number of accounts broadcast concurrently
+    :arg async_: whether the node processes the blocks asynchronously
+    :arg retries: maximum number of retries of a block
+    """
+
+    backoff = 0.1
+    "seconds before the first retry of a block"
+    max_backoff = 5.0
+    "maximum seconds between retries of a block"
+    retryable = frozenset({"Fork", "Gap previous block", "Gap source block"})
+    "errors of blocks which the node may accept later"
+    settle = 5.0
+    "maximum seconds to wait for queued blocks to reach the ledger"
+
+    def __init__(
+        self, rpc: RPC, concurrency: int = 16, async_: bool = False, retries: int = 5
+    ):
+        self.rpc = rpc
+        self.concurrency = concurrency
+        self.async_ = async_
+        self.retries = retries
+        self.processed = 0
+        "number of blocks broadcast by the last :meth:`run`"
+        self.retried = 0
+        "number of retries made by the last :meth:`run`"
+        self.seconds = 0.0
+        "duration of the last :meth:`run`"
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        "blocks broadcast per second by the last :meth:`run`"
+        return self.processed / self.seconds if self.seconds else 0.0
+
+    def run(self, blocks: Iterable[npy.StateBlock]) -> dict[str, str]:
+        """Broadcast blocks
+
+        :arg blocks: signed state blocks with work, in chain order per account
+        :return: error of each block not broadcast by hash, empty if all were
+        """
+        chains: dict[str, list[npy.StateBlock]] = {}
+        for b in blocks:
+            chains.setdefault(b.acc.pk, []).append(b)
+        self.processed = self.retried = 0
+        t0 = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(self.concurrency) as pool:
+            if self.async_:
+                list(pool.map(self._queue, chains.values()))
+                hashes = [b.hash_ for c in chains.values() for b in c]
+                missing = self._settle(hashes) if hashes else set()
+                self.processed = len(hashes) - len(missing)
+                for a, c in chains.items():
+                    chains[a] = [b for b in c if b.hash_ in missing]
+            errors: dict[str, str] = {}
+            for e in pool.map(self._chain, chains.values()):
+                errors |= e
+        self.seconds = time.perf_counter() - t0
+        return errors
+
+    def _process(self, block: npy.StateBlock, async_: bool = False) -> str:
+        "broadcast a block, returning its error, empty if the node has it"
+        try:
+            r = self.rpc.process(block.dict_, async_=async_)
+        except (
+            *_FAILURES,
+            AssertionError,
+            RuntimeError,
+            jsonschema.exceptions.ValidationError,
+        ) as e:
+            return repr(e)
+        error = str(r.get("error", ""))
+        return "" if error == "Old block" else error
+
+    def _queue(self, chain: list[npy.StateBlock]) -> None:
+        "queue the blocks of an account for asynchronous processing"
+        for b in chain:
+            self._process(b, True)
+
+    def _settle(self, hashes: list[str]) -> set[str]:
+        """poll the ledger of the node, with back-off, until it has the queued
+        blocks or ``settle`` seconds have passed, returning the missing hashes"""
+        end = time.monotonic() + self.settle
+        missing = self._missing(hashes)
+        attempt = 0
+        while missing and (left := end - time.monotonic()) > 0:
+            time.sleep(min(self.max_backoff, self.backoff * 2**attempt, left))
+            attempt += 1
+            missing = self._missing([h for h in hashes if h in missing])
+        return missing
+
+    def _missing(self, hashes: list[str]) -> set[str]:
+        "hashes of the blocks missing from the ledger of the node"
+        try:
+            r = self.rpc.blocks_info(hashes, include_not_found=True)
+        except (
+            *_FAILURES,
+            AssertionError,
+            ChunkError,
+            RuntimeError,
+            jsonschema.exceptions.ValidationError,
+        ):
+            return set(hashes)
+        if "error" in r:
+            return set(hashes)
+        return {h.lower() for h in r.get("blocks_not_found", [])}
+
+    def _chain(self, chain: list[npy.StateBlock]) -> dict[str, str]:
+        "broadcast the blocks of an account in order, returning their errors"
+        for i, b in enumerate(chain):
+            error = self._process(b)
+            attempt = 0
+            while error in self.retryable and attempt < self.retries:
+                time.sleep(min(self.max_backoff, self.backoff * 2**attempt))
+                attempt += 1
+                with self._lock:
+                    self.retried += 1
+                error = self._process(b)
+            if error:
+                errors = {b.hash_: error}
+                for c in chain[i + 1 :]:
+                    errors[c.hash_] = f"Previous block {b.hash_} failed"
+                return errors
+            with self._lock:
+                self.processed += 1
+        return {}
@@ -0,0 +1,649 @@
+"""
+nanopy.stub
+###########
+A local stand-in for a node, answering RPC requests over HTTP and WebSocket, for
+tests and benchmarks.
+"""
+
+import asyncio
+import base64
+import collections
+import dataclasses
+import hashlib
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable
+
+import nanopy as npy
+from nanopy.rpc import Offline
+
+Z64 = "0" * 64
+
+
+class Stub:
+    """asyncio server answering RPC requests over HTTP and WebSocket on one port.
+    Replies to WebSocket requests carry the ``id`` of the request, and requests
+    which are not JSON are answered with an error, as a node does.
+
+    :arg handler: function or coroutine function mapping a request to a response
+    """
+
+    _GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+    _unparsable = {"error": "Unable to parse JSON"}
+
+    def __init__(self, handler: Callable[[dict[str, Any]], Any]) -> None:
+        self.handler = handler
+        self.server: asyncio.Server | None = None
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.port = 0
+        self._ws: set[asyncio.StreamWriter] = set()
+        self._tasks: set[asyncio.Task[Any]] = set()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving
+
+        :arg host: address to listen on
+        :arg port: port to listen on, any free port if 0
+        :return: port
+        """
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self._handle, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    def start_thread(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving from an event loop on a daemon thread
+
+        :arg host: address to listen on
+        :arg port: port to listen on, any free port if 0
+        :return: port
+        """
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(self.start(host, port), loop).result()
+
+    def call(self, coro: Any) -> Any:
+        """Run a coroutine on the loop of the stub from another thread
+
+        :arg coro: coroutine
+        :return: its result
+        """
+        assert self.loop
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def stop(self) -> None:
+        "Stop serving, close the connections and wait for their tasks to end"
+        if self.server:
+            self.server.close()
+        await self.disconnect()
+        tasks = self._tasks - {asyncio.current_task()}
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.server:
+            await self.server.wait_closed()
+
+    async def disconnect(self) -> None:
+        "Close WebSocket connections"
+        for w in list(self._ws):
+            w.close()
+
+    async def publish(self, message: Any) -> None:
+        """Send a message to every WebSocket connection
+
+        :arg message: JSON serialisable message
+        """
+        for w in list(self._ws):
+            self._send(w, json.dumps(message).encode())
+            await w.drain()
+
+    async def _reply(self, data: dict[str, Any]) -> Any:
+        "response of the handler to a request"
+        r = self.handler(data)
+        return await r if inspect.isawaitable(r) else r
+
+    def _track(self, t: "asyncio.Task[Any] | None") -> None:
+        "keep a task until it ends, to cancel it on :meth:`stop`"
+        assert t
+        self._tasks.add(t)
+        t.add_done_callback(self._tasks.discard)
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        "serve a connection"
+        self._track(asyncio.current_task())
+        try:
+            while await reader.readline():
+                headers = {}
+                while (h := await reader.readline()).strip():
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self._websocket(headers, reader, writer)
+                    break
+                n = int(headers.get("content-length", 0))
+                body = json.dumps(await self._parse(await reader.readexactly(n)))
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n{body}".encode()
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # by stop, and the server logs connection tasks ending cancelled
+        finally:
+            writer.close()
+
+    async def _parse(self, body: bytes) -> Any:
+        "response to the body of an HTTP request"
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError:
+            return self._unparsable
+        return await self._reply(data)
+
+    async def _websocket(
+        self,
+        headers: dict[str, str],
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        "complete the WebSocket handshake and answer messages"
+        key = headers["sec-websocket-key"].encode()
+        accept = base64.b64encode(hashlib.sha1(key + self._GUID).digest()).decode()
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+            + f"Connection: Upgrade\r\nSec-WebSocket-Accept: {accept}\r\n\r\n".encode()
+        )
+        self._ws.add(writer)
+        try:
+            while (m := await self._recv(reader, writer)) is not None:
+                try:
+                    data = json.loads(m)
+                except json.JSONDecodeError:
+                    self._send(writer, json.dumps(self._unparsable).encode())
+                    await writer.drain()
+                    continue
+                self._track(asyncio.create_task(self._answer(writer, data)))
+        finally:
+            self._ws.discard(writer)
+
+    async def _answer(self, writer: asyncio.StreamWriter, data: dict[str, Any]) -> None:
+        "answer a WebSocket request"
+        i = data.pop("id", None)
+        r = await self._reply(data)
+        if i is not None:
+            r = r | {"id": i}
+        if writer in self._ws:
+            self._send(writer, json.dumps(r).encode())
+            await writer.drain()
+
+    @staticmethod
+    def _send(writer: asyncio.StreamWriter, payload: bytes, opcode: int = 1) -> None:
+        "write an unmasked frame"
+        n = len(payload)
+        if n < 126:
+            head = bytes([0x80 | opcode, n])
+        elif n < 1 << 16:
+            head = bytes([0x80 | opcode, 126]) + n.to_bytes(2, "big")
+        else:
+            head = bytes([0x80 | opcode, 127]) + n.to_bytes(8, "big")
+        writer.write(head + payload)
+
+    @classmethod
+    async def _recv(
+        cls, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> bytes | None:
+        "read a message, answering pings, None when the connection is closed"
+        message = b""
+        while True:
+            b0, b1 = await reader.readexactly(2)
+            n = b1 & 0x7F
+            if n >= 126:
+                n = int.from_bytes(
+                    await reader.readexactly(2 if n == 126 else 8), "big"
+                )
+            mask = await reader.readexactly(4) if b1 & 0x80 else b"\0" * 4
+            p = await reader.readexactly(n)
+            m = int.from_bytes(mask * ((n + 3) // 4), "big") >> (8 * (-n % 4))
+            p = (int.from_bytes(p, "big") ^ m).to_bytes(n, "big")
+            opcode = b0 & 0x0F
+            if opcode == 8:
+                cls._send(writer, p[:2], 8)
+                return None
+            if opcode == 9:
+                cls._send(writer, p, 10)
+            elif opcode != 10:
+                message += p
+                if b0 & 0x80:
+                    return message
+
+
+@dataclasses.dataclass
+class _Entry:
+    "a block of the ledger and what the node knows about it"
+
+    block: npy.StateBlock
+    height: int
+    subtype: str
+    amount: int
+    timestamp: int
+    successor: str = Z64
+    confirmed: bool = False
+
+
+@dataclasses.dataclass
+class _Chain:
+    "the blocks of an account"
+
+    open_block: str
+    frontier: str
+    representative_block: str
+    modified: int
+
+
+class Node(Stub):  # pylint: disable=too-many-instance-attributes
+    """Fake node with an in-memory ledger of state blocks, served over HTTP and
+    WebSocket. It answers the common actions of ``actions``, including those
+    computable offline with :class:`nanopy.rpc.Offline`, checks processed blocks
+    as a node does for signature, work, gaps, forks and balance, and pushes the
+    confirmations of the blocks to WebSocket subscribers of the
+    ``confirmation`` topic. The genesis account holds the supply in its open
+    block, and sends from it fund other accounts.
+
+    :arg genesis: genesis account, with a private key to sign its sends, a
+      random one if None
+    :arg supply: raw balance of the genesis account
+    :arg work: whether to check the work of processed blocks against the
+      thresholds of ``Account.network``
+    :arg confirmed: whether processed blocks are confirmed at once, else on
+      :meth:`confirm`
+    :arg latency: seconds to wait before answering a request
+    :arg error_rate: fraction of requests answered with an error
+    :arg drop_rate: fraction of requests whose connection is dropped
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        genesis: npy.Account | None = None,
+        supply: int = (1 << 128) - 1,
+        *,
+        work: bool = True,
+        confirmed: bool = True,
+        latency: float = 0,
+        error_rate: float = 0,
+        drop_rate: float = 0,
+    ):
+        super().__init__(self.request)
+        self.genesis = genesis or npy.Account(sk=os.urandom(32).hex())
+        self.work = work
+        self.confirmed = confirmed
+        self.latency = latency
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.requests: collections.Counter[str] = collections.Counter()
+        self.blocks: dict[str, _Entry] = {}
+        self.chains: dict[str, _Chain] = {}
+        self.receivable: dict[str, dict[str, int]] = {}
+        self.cemented = 0
+        self._subscribers: dict[asyncio.StreamWriter, set[str] | None] = {}
+        self.offline = Offline()
+        self.actions: dict[str, Callable[[dict[str, Any]], Any]] = {
+            "account_balance": self._account_balance,
+            "account_block_count": self._account_block_count,
+            "account_info": self._account_info,
+            "account_representative": self._account_representative,
+            "accounts_balances": self._accounts_balances,
+            "accounts_frontiers": self._accounts_frontiers,
+            "accounts_receivable": self._accounts_receivable,
+            "block_account": self._block_account,
+            "block_count": self._block_count,
+            "block_info": self._block_info,
+            "blocks": self._blocks,
+            "blocks_info": self._blocks_info,
+            "process": self._process,
+            "receivable": self._receivable,
+            "receivable_exists": self._receivable_exists,
+            "version": self._version,
+        } | dict.fromkeys(Offline.actions, self._offline)
+        "functions answering each action, by action"
+        b = self.genesis.receive(self.genesis.pk, supply, work="0" * 16)
+        self._insert(b, "receive", supply)
+
+    async def request(self, data: dict[str, Any]) -> Any:
+        """Answer a request
+
+        :arg data: the request
+        :return: JSON response
+        :raises ConnectionResetError: to drop the connection
+        """
+        self.requests[data.get("action", "")] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.drop_rate and random.random() < self.drop_rate:
+            raise ConnectionResetError
+        if self.error_rate and random.random() < self.error_rate:
+            return {"error": "Injected error"}
+        action = self.actions.get(data.get("action", ""))
+        if action is None:
+            return {"error": "Unknown command"}
+        try:
+            return action(data)
+        except (KeyError, TypeError, ValueError, AssertionError):
+            return {"error": "Invalid request"}
+
+    async def confirm(self, hash_: str) -> bool:
+        """Confirm a block and push its confirmation
+
+        :arg hash_: 64 hex char block hash
+        :return: whether the block was not confirmed yet
+        """
+        e = self.blocks.get(hash_.lower())
+        if e is None or e.confirmed:
+            return False
+        self._confirm(e)
+        return True
+
+    def _insert(self, b: npy.StateBlock, subtype: str, amount: int) -> _Entry:
+        "add a checked block to the ledger"
+        h, acc, now = b.hash_, b.acc.addr, int(time.time())
+        chain = self.chains.get(acc)
+        if chain is None:
+            e = _Entry(b, 1, subtype, amount, now)
+            self.chains[acc] = _Chain(h, h, h, now)
+        else:
+            prev = self.blocks[chain.frontier]
+            prev.successor = h
+            e = _Entry(b, prev.height + 1, subtype, amount, now)
+            if b.rep != prev.block.rep:
+                chain.representative_block = h
+            chain.frontier, chain.modified = h, now
+        self.blocks[h] = e
+        if subtype == "send":
+            dest = npy.Account(pk=b.link).addr
+            self.receivable.setdefault(dest, {})[h] = amount
+        elif subtype == "receive" and b.link.lower() in self.blocks:
+            del self.receivable[acc][b.link.lower()]
+        if self.confirmed:
+            self._confirm(e)
+        return e
+
+    def _confirm(self, e: _Entry) -> None:
+        "confirm a block and push its confirmation to the subscribers"
+        e.confirmed = True
+        self.cemented += 1
+        b = e.block
+        link_as_account = npy.Account(pk=b.link).addr
+        message = json.dumps(
+            {
+                "topic": "confirmation",
+                "time": str(int(time.time() * 1000)),
+                "message": {
+                    "account": b.acc.addr,
+                    "amount": str(e.amount),
+                    "hash": b.hash_.upper(),
+                    "confirmation_type": "active_quorum",
+                    "block": b.dict_
+                    | {"link_as_account": link_as_account, "subtype": e.subtype},
+                },
+            }
+        ).encode()
+        for w, accounts in list(self._subscribers.items()):
+            if w not in self._ws:
+                del self._subscribers[w]
+            elif (
+                accounts is None
+                or b.acc.addr in accounts
+                or link_as_account in accounts
+            ):
+                self._send(w, message)
+
+    def _check(  # pylint: disable=too-many-return-statements
+        self, b: npy.StateBlock
+    ) -> tuple[str, str, int]:
+        """Check a block against the ledger
+
+        :arg b: state block
+        :return: error, empty if the block is valid, its subtype and amount
+        """
+        h, acc = b.hash_, b.acc.addr
+        if h in self.blocks:
+            return "Old block", "", 0
+        if not b.verify_signature():
+            return "Bad signature", "", 0
+        chain = self.chains.get(acc)
+        if (chain.frontier if chain else Z64) != b.prev.lower():
+            if b.prev.lower() in self.blocks or b.prev == Z64:
+                return "Fork", "", 0
+            return "Gap previous block", "", 0
+        balance = self.blocks[chain.frontier].block.bal if chain else 0
+        if b.bal < balance:
+            return "", "send", balance - b.bal
+        if b.bal == balance:
+            return ("", "change", 0) if chain else ("Block is invalid", "", 0)
+        amount = self.receivable.get(acc, {}).get(b.link.lower())
+        if amount is None:
+            if b.link.lower() in self.blocks:
+                return "Unreceivable", "", 0
+            return "Gap source block", "", 0
+        if amount != b.bal - balance:
+            return "Balance and amount delta do not match", "", 0
+        return "", "receive", amount
+
+    @staticmethod
+    def _threshold(subtype: str) -> str:
+        "minimum work difficulty of a block of a subtype"
+        n = npy.Account.network
+        return n.receive_difficulty if subtype == "receive" else n.send_difficulty
+
+    def _process(self, data: dict[str, Any]) -> Any:
+        block = data["block"]
+        if isinstance(block, str):
+            block = json.loads(block)
+        try:
+            b = npy.StateBlock.from_dict(block)
+        except (KeyError, ValueError):
+            return {"error": "Block is invalid"}
+        error, subtype, amount = self._check(b)
+        if not error and self.work and not b.work_validate(self._threshold(subtype)):
+            error = "Block work is insufficient"
+        if error:
+            return {"started": "1"} if data.get("async") else {"error": error}
+        self._insert(b, subtype, amount)
+        return {"started": "1"} if data.get("async") else {"hash": b.hash_.upper()}
+
+    def _balance(self, account: str) -> dict[str, str]:
+        "balance and receivable amount of an account"
+        chain = self.chains.get(account)
+        balance = self.blocks[chain.frontier].block.bal if chain else 0
+        receivable = str(sum(self.receivable.get(account, {}).values()))
+        return {
+            "balance": str(balance),
+            "pending": receivable,
+            "receivable": receivable,
+        }
+
+    def _account_balance(self, data: dict[str, Any]) -> Any:
+        return self._balance(data["account"])
+
+    def _accounts_balances(self, data: dict[str, Any]) -> Any:
+        return {"balances": {a: self._balance(a) for a in data["accounts"]}}
+
+    def _account_block_count(self, data: dict[str, Any]) -> Any:
+        chain = self.chains.get(data["account"])
+        if chain is None:
+            return {"error": "Account not found"}
+        return {"block_count": str(self.blocks[chain.frontier].height)}
+
+    def _account_info(self, data: dict[str, Any]) -> Any:
+        chain = self.chains.get(data["account"])
+        if chain is None:
+            return {"error": "Account not found"}
+        e = self.blocks[chain.frontier]
+        r = {
+            "frontier": chain.frontier.upper(),
+            "open_block": chain.open_block.upper(),
+            "representative_block": chain.representative_block.upper(),
+            "balance": str(e.block.bal),
+            "modified_timestamp": str(chain.modified),
+            "block_count": str(e.height),
+            "account_version": "2",
+            "confirmation_height": str(e.height),
+            "confirmation_height_frontier": chain.frontier.upper(),
+        }
+        if data.get("representative"):
+            r["representative"] = e.block.rep.addr
+        if data.get("pending") or data.get("receivable"):
+            receivable = self._balance(data["account"])["receivable"]
+            r |= {"pending": receivable, "receivable": receivable}
+        return r
+
+    def _account_representative(self, data: dict[str, Any]) -> Any:
+        chain = self.chains.get(data["account"])
+        if chain is None:
+            return {"error": "Account not found"}
+        return {"representative": self.blocks[chain.frontier].block.rep.addr}
+
+    def _accounts_frontiers(self, data: dict[str, Any]) -> Any:
+        return {
+            "frontiers": {
+                a: self.chains[a].frontier.upper()
+                for a in data["accounts"]
+                if a in self.chains
+            }
+        }
+
+    def _receivable_of(self, account: str, data: dict[str, Any]) -> Any:
+        "receivable blocks of an account, in the format the request asks for"
+        count = int(data.get("count", 0)) or None
+        threshold = int(data.get("threshold", 0))
+        confirmed = data.get("include_only_confirmed", True) is not False
+        blocks = [
+            (h.upper(), amount)
+            for h, amount in self.receivable.get(account, {}).items()
+            if amount >= threshold and (self.blocks[h].confirmed or not confirmed)
+        ][:count]
+        if data.get("source"):
+            return {
+                h: {"amount": str(a), "source": self.blocks[h.lower()].block.acc.addr}
+                for h, a in blocks
+            }
+        if threshold:
+            return {h: str(a) for h, a in blocks}
+        return [h for h, _ in blocks]
+
+    def _receivable(self, data: dict[str, Any]) -> Any:
+        return {"blocks": self._receivable_of(data["account"], data)}
+
+    def _accounts_receivable(self, data: dict[str, Any]) -> Any:
+        blocks = {a: self._receivable_of(a, data) for a in data["accounts"]}
+        return {"blocks": {a: b for a, b in blocks.items() if b}}
+
+    def _receivable_exists(self, data: dict[str, Any]) -> Any:
+        e = self.blocks.get(data["hash"].lower())
+        if e is None:
+            return {"error": "Block not found"}
+        dest = npy.Account(pk=e.block.link).addr
+        exists = e.subtype == "send" and e.block.hash_ in self.receivable.get(dest, {})
+        return {"exists": "1" if exists else "0"}
+
+    def _block_account(self, data: dict[str, Any]) -> Any:
+        e = self.blocks.get(data["hash"].lower())
+        if e is None:
+            return {"error": "Block not found"}
+        return {"account": e.block.acc.addr}
+
+    def _block_count(self, _: dict[str, Any]) -> Any:
+        return {
+            "count": str(len(self.blocks)),
+            "unchecked": "0",
+            "cemented": str(self.cemented),
+        }
+
+    @staticmethod
+    def _info(e: _Entry) -> dict[str, Any]:
+        "block_info of a block"
+        return {
+            "block_account": e.block.acc.addr,
+            "amount": str(e.amount),
+            "balance": str(e.block.bal),
+            "height": str(e.height),
+            "local_timestamp": str(e.timestamp),
+            "successor": e.successor.upper(),
+            "confirmed": "true" if e.confirmed else "false",
+            "contents": e.block.dict_,
+            "subtype": e.subtype,
+        }
+
+    def _block_info(self, data: dict[str, Any]) -> Any:
+        e = self.blocks.get(data["hash"].lower())
+        return {"error": "Block not found"} if e is None else self._info(e)
+
+    def _blocks_info(self, data: dict[str, Any]) -> Any:
+        found = {h: self.blocks.get(h.lower()) for h in data["hashes"]}
+        missing = [h for h, e in found.items() if e is None]
+        if missing and not data.get("include_not_found"):
+            return {"error": "Block not found"}
+        r: dict[str, Any] = {
+            "blocks": {h: self._info(e) for h, e in found.items() if e is not None}
+        }
+        if data.get("include_not_found"):
+            r["blocks_not_found"] = missing
+        return r
+
+    def _blocks(self, data: dict[str, Any]) -> Any:
+        info = self._blocks_info(data)
+        if "error" in info:
+            return info
+        return {"blocks": {h: i["contents"] for h, i in info["blocks"].items()}}
+
+    def _offline(self, data: dict[str, Any]) -> Any:
+        r = self.offline.answer(data)
+        if r is None:
+            raise ValueError(f"{data['action']} is not computable offline")
+        return r
+
+    def _version(self, _: dict[str, Any]) -> Any:
+        return {
+            "rpc_version": "1",
+            "store_version": "0",
+            "protocol_version": "21",
+            "node_vendor": "nanopy fake node",
+            "store_vendor": "memory",
+            "network": npy.Account.network.name,
+            "network_identifier": self.chains[self.genesis.addr].open_block.upper(),
+            "build_info": "nanopy",
+        }
+
+    async def _answer(self, writer: asyncio.StreamWriter, data: dict[str, Any]) -> None:
+        "answer a WebSocket request, or keep track of its subscription"
+        action = data.get("action")
+        if action not in ("subscribe", "update", "unsubscribe"):
+            try:
+                await super()._answer(writer, data)
+            except ConnectionResetError:
+                writer.close()
+            return
+        options = data.get("options", {})
+        if data.get("topic") == "confirmation":
+            if action == "subscribe":
+                accounts = options.get("accounts")
+                self._subscribers[writer] = None if accounts is None else set(accounts)
+            elif action == "unsubscribe":
+                self._subscribers.pop(writer, None)
+            elif self._subscribers.get(writer) is not None:
+                s = self._subscribers[writer]
+                assert s is not None
+                s |= set(options.get("accounts_add", []))
+                s -= set(options.get("accounts_del", []))
+        if data.get("ack"):
+            ack = {"ack": action, "time": str(int(time.time() * 1000))}
+            if "id" in data:
+                ack["id"] = data["id"]
+            self._send(writer, json.dumps(ack).encode())
@@ -1,10 +1,15 @@
 # pylint: disable=missing-module-docstring,missing-class-docstring,missing-function-docstring
+import fractions
 import hashlib
 import json
+import math
 import os
 import random
 import re
+from io import StringIO
+from typing import Any
 from unittest import TestCase
+from unittest.mock import Mock, patch
 
 import nanopy as npy
 
@@ -76,6 +81,65 @@ class TestModuleLevel(TestCase):
             == "3be4fc2ef3f3b7374e6fc4fb6e7bb153f8a2998b3b3dab50853eabe128024143"
         )
 
+    def test_verify_signatures(self) -> None:
+        acc = npy.Account(sk=R64)
+        blocks = [acc.receive(os.urandom(32).hex(), 1, work=R16) for _ in range(70)]
+        blocks[3].sig = blocks[4].sig
+        expected = [i != 3 for i in range(70)]
+        assert npy.verify_signatures(blocks) == expected
+        assert npy.verify_signatures(iter(blocks[:2])) == [True, True]
+        assert not npy.verify_signatures([])
+
+    def test_cpu_count(self) -> None:
+        def cgroup(files: dict[str, str]) -> Any:
+            def o(f: str, **_: Any) -> StringIO:
+                if f not in files:
+                    raise FileNotFoundError(f)
+                return StringIO(files[f])
+
+            return o
+
+        fs = [
+            ({}, 8),
+            ({"/sys/fs/cgroup/cpu.max": "max 100000"}, 8),
+            ({"/sys/fs/cgroup/cpu.max": "150000 100000"}, 2),
+            ({"/sys/fs/cgroup/cpu.max": "1000 100000"}, 1),
+            ({"/sys/fs/cgroup/cpu.max": "1600000 100000"}, 8),
+            (
+                {
+                    "/sys/fs/cgroup/cpu/cpu.cfs_quota_us": "300000",
+                    "/sys/fs/cgroup/cpu/cpu.cfs_period_us": "100000",
+                },
+                3,
+            ),
+            ({"/sys/fs/cgroup/cpu/cpu.cfs_quota_us": "-1"}, 8),
+        ]
+        with patch.object(os, "sched_getaffinity", create=True) as a:
+            a.return_value = set(range(8))
+            for f, n in fs:
+                with patch("builtins.open", cgroup(f)):
+                    assert npy._cpu_count() == n  # pylint: disable=protected-access
+
+    @patch("nanopy.ext.work_config")
+    def test_work_config(self, wc: Mock) -> None:
+        with (
+            patch.dict(os.environ, {}, clear=True),
+            patch.object(npy, "_cpu_count", return_value=4),
+        ):
+            npy.work_config()
+            wc.assert_called_with(4, [], 0)
+            npy.work_config(threads=2, cpus=[1], nice=5)
+            wc.assert_called_with(2, [1], 5)
+            npy.work_config(cpus=range(8))
+            wc.assert_called_with(4, [0, 1, 2, 3, 4, 5, 6, 7], 0)
+            os.environ["NANOPY_WORK_CPUS"] = "0-1,4"
+            os.environ["NANOPY_WORK_NICE"] = "10"
+            npy.work_config()
+            wc.assert_called_with(3, [0, 1, 4], 10)
+            os.environ["NANOPY_WORK_THREADS"] = "6"
+            npy.work_config(nice=0)
+            wc.assert_called_with(6, [0, 1, 4], 0)
+
 
 class TestAccount(TestCase):
     def test_init(self) -> None:
@@ -205,7 +269,8 @@ class TestAccount(TestCase):
             acc.change_rep(acc)
         acc.network.send_difficulty = "fffffe0000000000"
         acc = npy.Account(sk=Z64)
-        acc.change_rep(acc)
+        b = acc.change_rep(acc, multiplier=2)
+        assert b.work_validate("fffffe0000000000", 2)
         b = acc.change_rep(acc, work="f" * 16)
         assert b.verify_signature()
         assert acc.frontier == b.hash_
@@ -257,17 +322,61 @@ class TestAccount(TestCase):
         assert acc.rep == to
         acc.set_network()
 
+    def test_chain(self) -> None:
+        acc = npy.Account(sk=Z64)
+        to = npy.Account(addr=PACC0)
+        acc.network.send_difficulty = "fffff00000000000"
+        acc.network.receive_difficulty = "ffff000000000000"
+        with self.assertRaisesRegex(ValueError, "Unknown operation: open"):
+            acc.chain([("receive", Z64, 2), ("open", Z64)])
+        with self.assertRaisesRegex(ValueError, "Raw balance after send cannot be"):
+            acc.chain([("receive", Z64, 2), ("send", to, 3)])
+        assert acc.state == (Z64, 0, acc)
+        with patch("nanopy.ext.work_generate_many", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                acc.chain([("receive", Z64, 2)])
+        assert acc.state == (Z64, 0, acc)
+        ops = [("receive", Z64, 2), ("send", to, 1), ("change_rep", to)]
+        blocks = acc.chain(ops + [("send", to, 1, acc)], 2)
+        assert [b.bal for b in blocks] == [2, 1, 1, 0]
+        assert blocks[0].work_validate("ffff000000000000", 2)
+        for prev, b in zip(blocks, blocks[1:]):
+            assert b.prev == prev.hash_
+            assert b.verify_signature()
+            assert b.work_validate("fffff00000000000", 2)
+        assert acc.state == (blocks[-1].hash_, 0, acc)
+        acc.set_network()
+
 
 class TestNetwork(TestCase):
     n = npy.Account.network
 
     def test_from_multiplier(self) -> None:
+        for m in (0, math.inf, -math.inf, math.nan):
+            with self.assertRaisesRegex(ValueError, "Multiplier should be positive"):
+                self.n.from_multiplier(m)
         assert "fffffe0000000000" == self.n.from_multiplier(1 / 8)
+        assert "fffffff800000000" == self.n.from_multiplier(8)
+        assert "fffffff800000000" == self.n.from_multiplier(1, "fffffff800000000")
+        assert "fffffff800000000" == self.n.from_multiplier(64, "fffffe0000000000")
+        assert "ffffffeaaaaaaaab" == self.n.from_multiplier(3)
+        assert "fffffffa00000000" == self.n.from_multiplier(fractions.Fraction(32, 3))
+        assert "ffffffffffffffff" == self.n.from_multiplier(1 << 64)
+        assert "0000000000000000" == self.n.from_multiplier(
+            fractions.Fraction(1, 1 << 40)
+        )
 
     def test_to_multiplier(self) -> None:
         with self.assertRaisesRegex(ValueError, "Difficulty should be 16 hex char"):
             self.n.to_multiplier("0")
         assert 0.125 == self.n.to_multiplier("fffffe0000000000")
+        assert 1 == self.n.to_multiplier("fffffe0000000000", "fffffe0000000000")
+        assert 64 == self.n.to_multiplier("fffffff800000000", "fffffe0000000000")
+        rng = random.Random(0)
+        for _ in range(1000):
+            d, base = f"{rng.getrandbits(64):016x}", f"{rng.getrandbits(64):016x}"
+            assert self.n.from_multiplier(self.n.to_multiplier(d)) == d
+            assert self.n.from_multiplier(self.n.to_multiplier(d, base), base) == d
 
     def test_from_pk(self) -> None:
         with self.assertRaisesRegex(ValueError, "Public key should be 64 hex char"):
@@ -320,17 +429,28 @@ class TestStateBlock(TestCase):
             "signature": "",
         }
         assert self.b.dict_ == d
+        assert npy.StateBlock.from_dict(d) == self.b
 
     def test_verify_signature(self) -> None:
         self.b.sig = SIG
         assert self.b.verify_signature()
 
     def test_work_generate(self) -> None:
-        self.b.work_generate(self.acc.network.receive_difficulty)
+        d, m = self.b.work_generate(self.acc.network.receive_difficulty)
         assert work_validate(self.b, self.acc.network.receive_difficulty)
+        assert work_validate(self.b, d)
+        assert d == self.b.difficulty
+        assert m == self.acc.network.to_multiplier(d, "fffffe0000000000") >= 1
+        d, m = self.b.work_generate(self.acc.network.receive_difficulty, 4)
+        assert work_validate(self.b, "ffffff8000000000")
+        assert m >= 4
 
     def test_work_validate(self) -> None:
         self.b.work = "0" * 16
         assert not self.b.work_validate(self.acc.network.receive_difficulty)
         self.b.work = "e1c6427755027448"
         assert self.b.work_validate(self.acc.network.receive_difficulty)
+        assert self.b.difficulty == "ffffff66326b3ae8"
+        assert self.b.work_validate("fffffe0000000000", fractions.Fraction(1, 4))
+        assert self.b.work_validate("fffffe0000000000", 2)
+        assert not self.b.work_validate("fffffe0000000000", 4)
@@ -1,5 +1,8 @@
 # pylint: disable=missing-module-docstring,missing-class-docstring,missing-function-docstring
+import json
+import os
 import sys
+import tempfile
 from contextlib import contextmanager
 from io import StringIO
 from typing import Iterator
@@ -8,8 +11,24 @@ from unittest.mock import Mock, call, patch
 
 import nanopy as npy
 from nanopy import cli
+from nanopy.rpc import Pool
 
-from . import O64, ONER, OR, PACC0, PACC1, R64, SACC0, TR, Z64, ZACC0, ZACC1, ZEROR, ZR
+from . import (
+    O64,
+    ONER,
+    OR,
+    PACC0,
+    PACC1,
+    R16,
+    R64,
+    SACC0,
+    TR,
+    Z64,
+    ZACC0,
+    ZACC1,
+    ZEROR,
+    ZR,
+)
 
 
 @contextmanager
@@ -203,6 +222,55 @@ class TestSession(TestCase):
         assert len(bytes.fromhex(b1.work)) == 8
         acc.set_network()
 
+    def test_broadcast(self) -> None:
+        acc = npy.Account(sk=R64)
+        acc.state = (O64, 10, acc)
+        blocks = [acc.send(acc, 1, work=R16) for _ in range(3)]
+        rpc = Mock()
+        rpc.process.side_effect = [
+            {"hash": blocks[0].hash_},
+            {"error": "Fork"},
+            {"error": "Bad signature"},
+        ]
+        s = cli.Session(rpc)
+        with tempfile.TemporaryDirectory() as d:
+            f = os.path.join(d, "blocks")
+            with open(f, "w", encoding="utf-8") as fp:
+                fp.writelines(json.dumps(b.dict_) + "\n\n" for b in blocks)
+            with stdout() as out, patch("nanopy.rpc.Broadcaster.backoff", 0):
+                s.broadcast(f, 1)
+        assert [c.args[0] for c in rpc.process.call_args_list] == [
+            blocks[0].dict_,
+            blocks[1].dict_,
+            blocks[1].dict_,
+        ]
+        lines = out.getvalue().splitlines()  # pylint: disable=no-member
+        assert lines[:2] == [
+            f"{blocks[1].hash_} Bad signature",
+            f"{blocks[2].hash_} Previous block {blocks[1].hash_} failed",
+        ]
+        assert lines[2].startswith("Sent: 1/3 in ")
+
+    def test_process(self) -> None:
+        rpc = Mock()
+        rpc.process.return_value = {"hash": R64}
+        s = cli.Session(rpc)
+        b = Mock(hash_=Z64)
+        assert s.process(b) == R64
+        s.wait()
+        s.tracker = Mock()
+        s.tracker.process.return_value.result.return_value = Z64
+        with stdout() as out:
+            assert s.process(b) == Z64
+            s.wait()
+        assert out.getvalue() == f"Confirmed {Z64}\n"  # pylint: disable=no-member
+        s.tracker.close.assert_called_once_with()
+        s.tracker = Mock()
+        s.confirmations = [Mock(**{"result.side_effect": TimeoutError})]
+        with self.assertRaises(TimeoutError):
+            s.wait()
+        s.tracker.close.assert_called_once_with()
+
 
 class TestModuleLevel(TestCase):
     @patch("nanopy.cli.Session")
@@ -229,6 +297,8 @@ class TestModuleLevel(TestCase):
                 ["nanopy", "open", "f", "k", "-r", R64],
                 ["nanopy", "open", "f", "k", "-R"],
                 ["nanopy", "open", "f", "k", "--rep", PACC0],
+                ["nanopy", "broadcast", "f"],
+                ["nanopy", "broadcast", "f", "-j", "2", "--async"],
             ]
             for sys.argv in cases:
                 cli.main()
@@ -257,3 +327,29 @@ class TestModuleLevel(TestCase):
             call(ZACC0, R64, None),
         ]
         assert s.change_rep.call_args_list == [call(ZACC0, PACC0)]
+        assert s.broadcast.call_args_list == [call("f", 16, False), call("f", 2, True)]
+
+    def test_connect(self) -> None:
+        assert cli.connect("http://a:7076").url == "http://a:7076"  # type: ignore
+        pool = cli.connect("http://a:7076, http://b:7076")
+        assert isinstance(pool, Pool) and len(pool.nodes) == 2
+        pool.close()
+
+    @patch("nanopy.cli.Tracker")
+    @patch("nanopy.cli.Session")
+    @patch("configparser.ConfigParser")
+    def test_main_confirm(
+        self, _: Mock, mock_session: Mock, mock_tracker: Mock
+    ) -> None:
+        s = mock_session.return_value
+        s.get_key.return_value = Z64
+        s.rpc.receivable.return_value = {"blocks": [Z64, R64]}
+        with (
+            stdout(),
+            patch.object(sys, "argv", ["nanopy", "open", "f", "k", "-R", "-c"]),
+        ):
+            cli.main()
+        assert s.tracker == mock_tracker.return_value
+        assert mock_tracker.call_args[0][0] == s.rpc
+        assert len(s.process.call_args_list) == 2
+        s.wait.assert_called_once_with()
@@ -1,8 +1,15 @@
 # pylint: disable=missing-module-docstring,missing-class-docstring,missing-function-docstring
+import array
+import concurrent.futures
 import csv
 import os
-from unittest import TestCase
+import re
+import signal
+import time
+from typing import Any
+from unittest import TestCase, skipUnless
 
+import nanopy as npy
 from nanopy import ext  # type: ignore
 
 
@@ -18,12 +25,148 @@ class TestModuleLevel(TestCase):
                 work = int(e[1], 16)
                 assert ext.work_validate(work, h, difficulty)
 
+    def test_work_validate_many(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Works must be a multiple of 8 bytes"):
+            ext.work_validate_many(b"0", b"", 0)
+        with self.assertRaisesRegex(ValueError, "Hashes must be 32 bytes per work"):
+            ext.work_validate_many(b"0" * 8, b"", 0)
+        with self.assertRaisesRegex(ValueError, "Difficulties must be 8 bytes per"):
+            ext.work_validate_many(b"0" * 8, b"0" * 32, b"")
+        with self.assertRaises(OverflowError):
+            ext.work_validate_many(b"", b"", -1)
+        with self.assertRaises(TypeError):
+            ext.work_validate_many(0, b"", 0)
+        with self.assertRaises(TypeError):
+            ext.work_validate_many(b"", 0, 0)
+        with self.assertRaises(TypeError):
+            ext.work_validate_many(b"", b"", "")
+        assert ext.work_validate_many(b"", b"", 0) == (b"", b"")
+        with open("tests/work.csv", encoding="ascii") as f:
+            e = list(csv.reader(f))
+        works = array.array("Q", [int(w, 16) for _, w in e])
+        roots = bytearray(b"".join(bytes.fromhex(h) for h, _ in e))
+        difficulty = int("fffffe0000000000", 16)
+        valid, achieved = ext.work_validate_many(works, roots, difficulty)
+        assert valid == b"\x01" * len(e)
+        assert min(array.array("Q", achieved)) >= difficulty
+        difficulties = array.array("Q", achieved)
+        difficulties[0] += 1
+        valid, _ = ext.work_validate_many(works, memoryview(roots), difficulties)
+        assert valid == b"\x00" + b"\x01" * (len(e) - 1)
+        works = array.array("Q", range(10000))
+        h = os.urandom(32 * len(works))
+        valid, achieved = ext.work_validate_many(works, h, 1 << 63)
+        for i in range(0, len(works), 97):
+            r = h[32 * i : 32 * i + 32]
+            assert valid[i] == ext.work_validate(i, r, 1 << 63)
+            assert ext.work_validate(i, r, array.array("Q", achieved)[i])
+
     def test_work_generate(self) -> None:
         with self.assertRaisesRegex(ValueError, "Hash must be 32 bytes"):
             ext.work_generate(b"", 0, b"")
         with self.assertRaisesRegex(ValueError, "Random must be 128 bytes"):
             ext.work_generate(b"0" * 32, 0, b"")
+        h = os.urandom(32)
+        work, d = ext.work_generate(h, int("fffff00000000000", 16), os.urandom(128))
+        assert d >= int("fffff00000000000", 16)
+        assert ext.work_validate(work, h, d)
+        assert not ext.work_validate(work, h, d + 1)
+
+    def test_work_generate_many(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Hashes must be a multiple of 32"):
+            ext.work_generate_many(b"0", b"", b"")
+        with self.assertRaisesRegex(ValueError, "Difficulties must be 8 bytes per"):
+            ext.work_generate_many(b"0" * 32, b"", b"")
+        with self.assertRaisesRegex(ValueError, "Random must be 128 bytes"):
+            ext.work_generate_many(b"0" * 32, b"0" * 8, b"")
+        assert ext.work_generate_many(b"", b"", os.urandom(128)) == (b"", b"")
+        h = os.urandom(32 * 5)
+        d = array.array("Q", [int("ffff000000000000", 16)] * 4)
+        d.append(int("fffff00000000000", 16))
+        works, achieved = ext.work_generate_many(h, d.tobytes(), os.urandom(128))
+        valid, difficulties = ext.work_validate_many(works, h, d)
+        assert valid == b"\x01" * 5
+        assert difficulties == achieved
+        ext.stats(True)
+        t0 = time.perf_counter()
+        ext.work_generate_many(h, d.tobytes(), os.urandom(128))
+        s = ext.stats(True)
+        assert s["solves"] == 5
+        assert s["time"] <= time.perf_counter() - t0
+
+    @skipUnless(ext.stats()["backend"] == "cpu", "needs the cpu backend")
+    def test_work_generate_concurrent(self) -> None:
+        ext.work_config(1, [], 0)
+        h, d = os.urandom(32), int("fffff80000000000", 16)
+        seeds = [os.urandom(128) for _ in range(8)]
+        expected = [ext.work_generate(h, d, r) for r in seeds]
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            assert list(pool.map(lambda r: ext.work_generate(h, d, r), seeds)) == (
+                expected
+            )
+        npy.work_config()
+
+    def test_work_difficulty(self) -> None:
+        with self.assertRaisesRegex(ValueError, "Hash must be 32 bytes"):
+            ext.work_difficulty(0, b"")
+        with open("tests/work.csv", encoding="ascii") as f:
+            for h, w in csv.reader(f):
+                d = ext.work_difficulty(int(w, 16), bytes.fromhex(h))
+                assert ext.work_validate(int(w, 16), bytes.fromhex(h), d)
+                assert not ext.work_validate(int(w, 16), bytes.fromhex(h), d + 1)
+
+    def test_stats(self) -> None:
+        with self.assertRaisesRegex(TypeError, "Callback must be callable or None"):
+            ext.work_callback(0)
+        ext.stats(True)
+        info: list[dict[str, Any]] = []
+        ext.work_callback(info.append)
+        work, d = ext.work_generate(
+            b"0" * 32, int("fffff00000000000", 16), os.urandom(128)
+        )
+        ext.work_callback(None)
         ext.work_generate(b"0" * 32, 0, os.urandom(128))
+        assert len(info) == 1
+        assert info[0]["work"] == work
+        assert info[0]["difficulty"] == d
+        assert info[0]["nonces"] > 0
+        s = ext.stats(True)
+        assert s["backend"] in ["cpu", "opencl"]
+        assert s["solves"] == 2
+        assert s["cancellations"] == 0
+        assert s["nonces"] == sum(w["nonces"] for w in s["workers"])
+        assert s["nonces"] >= info[0]["nonces"] + 1
+        assert s["time"] >= info[0]["time"]
+        assert ext.stats()["solves"] == 0
+
+    @skipUnless(hasattr(signal, "setitimer"), "needs setitimer")
+    def test_cancel(self) -> None:
+        def interrupt(*_: Any) -> None:
+            raise KeyboardInterrupt
+
+        h = signal.signal(signal.SIGALRM, interrupt)
+        signal.setitimer(signal.ITIMER_REAL, 0.1)
+        with self.assertRaises(KeyboardInterrupt):
+            ext.work_generate(b"0" * 32, (1 << 64) - 1, os.urandom(128))
+        signal.signal(signal.SIGALRM, h)
+        assert ext.stats(True)["cancellations"] == 1
+
+    def test_work_config(self) -> None:
+        with self.assertRaisesRegex(ValueError, re.escape("Threads must be >= 0")):
+            ext.work_config(-1, [], 0)
+        with self.assertRaisesRegex(ValueError, re.escape("Nice must be within")):
+            ext.work_config(1, [], 20)
+        with self.assertRaisesRegex(ValueError, re.escape("CPU must be within")):
+            ext.work_config(1, [-1], 0)
+        with self.assertRaises(TypeError):
+            ext.work_config(1, ["0"], 0)
+        with self.assertRaises(TypeError):
+            ext.work_config(1, 0, 0)
+        ext.work_config(2, [0], 1)
+        d = int("fffff00000000000", 16)
+        h = os.urandom(32)
+        assert ext.work_validate(ext.work_generate(h, d, os.urandom(128))[0], h, d)
+        npy.work_config()
 
     def test_publickey(self) -> None:
         with self.assertRaisesRegex(ValueError, "Secret key must be 32 bytes"):
@@ -61,3 +204,24 @@ class TestModuleLevel(TestCase):
                 m = bytes.fromhex(e[2])
                 sig = bytes.fromhex(e[4])
                 assert ext.verify_signature(sig, pk, m)
+
+    def test_verify_signature_many(self) -> None:
+        with self.assertRaisesRegex(ValueError, "multiple of 64 bytes"):
+            ext.verify_signature_many(b"0", b"", b"", b"")
+        with self.assertRaisesRegex(ValueError, "Public keys must be 32 bytes"):
+            ext.verify_signature_many(b"0" * 64, b"", b"", b"")
+        with self.assertRaisesRegex(ValueError, "Messages must be 32 bytes"):
+            ext.verify_signature_many(b"0" * 64, b"0" * 32, b"", b"")
+        with self.assertRaisesRegex(ValueError, "Random must be 16 bytes"):
+            ext.verify_signature_many(b"0" * 64, b"0" * 32, b"0" * 32, b"")
+        with open("tests/ed25519.csv", encoding="ascii") as f:
+            e = [r for r in csv.reader(f) if len(bytes.fromhex(r[2])) == 32][:200]
+        sig = b"".join(bytes.fromhex(r[4]) for r in e)
+        pk = b"".join(bytes.fromhex(r[1]) for r in e)
+        m = b"".join(bytes.fromhex(r[2]) for r in e)
+        assert ext.verify_signature_many(sig, pk, m, os.urandom(16 * len(e))) == (
+            b"\1" * len(e)
+        )
+        m = m[:32] + bytes(32) + m[64:]
+        v = ext.verify_signature_many(sig, pk, m, os.urandom(16 * len(e)))
+        assert v == b"\1" + b"\0" + b"\1" * (len(e) - 2)
@@ -1,15 +1,32 @@
-# pylint: disable=missing-module-docstring,missing-class-docstring,missing-function-docstring
+# pylint: disable=too-many-lines,missing-module-docstring,missing-class-docstring,missing-function-docstring
+import asyncio
+import concurrent.futures
+import contextlib
 import copy
+import decimal
+import hashlib
 import inspect
-from typing import Any
-from unittest import TestCase
-from unittest.mock import Mock, patch
+import itertools
+import json
+import math
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Callable
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import ANY, Mock, patch
 
+import requests
+from jsonschema import Draft202012Validator
 from jsonschema.exceptions import ValidationError
 
 import nanopy.rpc
+from nanopy.stub import Stub
 
-from . import PACC0, PACC1, R16, R64, R128, RB, RD, RI, RIP, Z64
+from . import O64, PACC0, PACC1, R16, R64, R128, RB, RD, RI, RIP, Z64, ZACC0
 
 rpc = nanopy.rpc.HTTP()
 R: dict[str, list[Any]] = {
@@ -316,6 +333,59 @@ R: dict[str, list[Any]] = {
 }
 
 
+def mutations(x: Any) -> Any:
+    "yield x and variations of it with one value or key changed"
+    yield x
+    yield from [None, 1, True, "", "x", "g" * 64, [], {}]
+    if isinstance(x, str):
+        yield from [x + "\n", "\n" + x, x[:-1], x.upper()]
+    if isinstance(x, list):
+        for i, v in enumerate(x):
+            for m in mutations(v):
+                yield x[:i] + [m] + x[i + 1 :]
+    if isinstance(x, dict):
+        for k, v in x.items():
+            d = {kk: vv for kk, vv in x.items() if kk != k}
+            yield d
+            for m in mutations(k):
+                if isinstance(m, str):
+                    yield d | {m: v}
+            for m in mutations(v):
+                yield x | {k: m}
+
+
+class StubCase(TestCase):
+    """Base of the cases of a ``client`` of a stub node answering with
+    ``handler`` and recording the requests. Async cases also derive from
+    IsolatedAsyncioTestCase, with an async client."""
+
+    client: Callable[..., Any] = nanopy.rpc.HTTP
+
+    def setUp(self) -> None:
+        self.requests: list[Any] = []
+        self.stub = Stub(self.record)
+        self.port = self.stub.start_thread()
+        ws = self.client in (nanopy.rpc.WS, nanopy.rpc.AsyncWS)
+        self.rpc = self.client(f"{'ws' if ws else 'http'}://127.0.0.1:{self.port}")
+
+    def tearDown(self) -> None:
+        if isinstance(self.rpc, nanopy.rpc.WS):
+            self.rpc.close()
+        self.stub.call(self.stub.stop())
+
+    async def asyncTearDown(self) -> None:  # pylint: disable=invalid-name
+        if isinstance(self.rpc, nanopy.rpc.AsyncHTTP):
+            await self.rpc.close()
+
+    def record(self, data: dict[str, Any]) -> Any:
+        "record a request and answer it"
+        self.requests.append(data)
+        return self.handler(data)
+
+    def handler(self, data: dict[str, Any]) -> Any:
+        return R[data["action"]][0]
+
+
 @patch.object(nanopy.rpc.HTTP, "request")
 class TestRPC(TestCase):
 
@@ -327,7 +397,7 @@ class TestRPC(TestCase):
             patch.object(rpc, "_validate_blocks_info"),
         ):
             for n, m in inspect.getmembers(rpc, predicate=inspect.ismethod):
-                if n.startswith("_"):
+                if n.startswith(("_", "iter_")) or n in ("stream", "typed"):
                     continue
                 params = inspect.signature(m).parameters
                 args = [v.default for p, v in params.items() if p != "self"]
@@ -336,6 +406,40 @@ class TestRPC(TestCase):
                         mr.return_value = r
                         m(*args)
 
+    def test_request(self, _: Mock) -> None:
+        with self.assertRaisesRegex(NotImplementedError, "derived class"):
+            nanopy.rpc.RPC.request(rpc, {})
+
+    def test_options(self, mr: Mock) -> None:
+        def flip(v: inspect.Parameter) -> Any:
+            "a value of an option which changes the request"
+            if isinstance(v.default, bool):
+                return not v.default
+            if v.default is None:
+                return ["1"] if "list" in str(v.annotation) else {"1": "1"}
+            return type(v.default)(1)
+
+        with (
+            patch.object(rpc, "_validate_block"),
+            patch.object(rpc, "_validate_block_info"),
+            patch.object(rpc, "_validate_blocks"),
+            patch.object(rpc, "_validate_blocks_info"),
+        ):
+            for n, m in inspect.getmembers(rpc, predicate=inspect.ismethod):
+                if n.startswith(("_", "iter_")) or n in ("stream", "typed"):
+                    continue
+                params = inspect.signature(m).parameters
+                args = {p: v.default for p, v in params.items() if p != "self"}
+                mr.return_value = R[n][0]
+                m(**args)
+                default = mr.call_args.args[0]
+                for p, v in params.items():
+                    if v.default is v.empty or v.default and v.default is not True:
+                        continue
+                    with self.subTest(n, option=p):
+                        m(**args | {p: flip(v)})
+                        assert mr.call_args.args[0] != default
+
     def test_account_block_count(self, mr: Mock) -> None:
         se = [
             {"test": "x"},
@@ -368,3 +472,1754 @@ class TestRPC(TestCase):
             rpc.block_info(
                 "1f5bc8e8c4b862fdc5d01857325dade3561349505f4a4d478610e3394d2105f3"
             )
+
+    def test_validation(self, mr: Mock) -> None:
+        with self.assertRaisesRegex(
+            ValueError, "Validation must be one of full, sampled, off"
+        ):
+            nanopy.rpc.HTTP(validation="none")
+        r = nanopy.rpc.HTTP(validation="off")
+        mr.return_value = {"block_count": "a"}
+        assert r.account_block_count(PACC0) == mr.return_value
+        r.validation = "sampled"
+        with patch("random.random", return_value=r.sample_rate):
+            r.account_block_count(PACC0)
+        with patch("random.random", return_value=0):
+            with self.assertRaises(ValidationError):
+                r.account_block_count(PACC0)
+        r.validation = "full"
+        with patch("jsonschema.Draft202012Validator.check_schema") as cs:
+            with self.assertRaises(ValidationError):
+                r.account_block_count(PACC0)
+            cs.assert_not_called()
+
+    def test_compiled_validators(self, _: Mock) -> None:
+        compile_ = nanopy.rpc._Compiler.compile  # pylint: disable=protected-access
+        with (
+            patch.object(nanopy.rpc.HTTP, "_request") as mr,
+            patch.object(rpc, "_validate_block_info"),
+            patch.object(rpc, "_validate_blocks"),
+            patch.object(rpc, "_validate_blocks_info"),
+        ):
+            for n, m in inspect.getmembers(rpc, predicate=inspect.ismethod):
+                if n.startswith(("_", "iter_")) or n in ("stream", "typed"):
+                    continue
+                params = inspect.signature(m).parameters
+                m(*[v.default for p, v in params.items() if p != "self"])
+                if len(mr.call_args.args) < 2:
+                    continue
+                s = mr.call_args.args[1]()
+                f = compile_(s)
+                v = Draft202012Validator(s)
+                with self.subTest(n):
+                    for r in R[n]:
+                        for x in mutations(r):
+                            assert f(x) == v.is_valid(x), x
+        instances = ["a", "b", 1, None, [], ["a"], [1], {}, {"a": "1"}, {"a": 1}]
+        for s in (
+            {"pattern": "^a"},
+            {"items": {"type": "string"}},
+            {"properties": {"a": {"type": "string"}}},
+            {"properties": {"a": {"const": "1"}}, "required": ["a"]},
+            {"type": "object", "required": []},
+        ):
+            f, v = compile_(s), Draft202012Validator(s)
+            with self.subTest(s):
+                for x in instances:
+                    assert f(x) == v.is_valid(x), x
+        with self.assertRaisesRegex(ValueError, "Unsupported keywords"):
+            compile_({"minimum": 1})
+
+
+LINGER0 = struct.pack("ii", 1, 0)
+
+
+class HTTPStub:  # pylint: disable=too-many-instance-attributes
+    "asyncio HTTP server replying with the first R fixture of the action"
+
+    def __init__(self) -> None:
+        self.server: asyncio.Server
+        self.connections = self.active = self.max_active = 0
+        self.delay = 0.0
+        self.head = "HTTP/1.1 200 OK\r\n"
+        self.framing = "length"
+        self.close = self.drop = self.reset = False
+        self.response: Any = None
+        self.replies: list[Any] = []
+        self.tasks: set[asyncio.Task[Any]] = set()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}/"
+
+    async def stop(self) -> None:
+        self.server.close()
+        for t in self.tasks:
+            t.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        assert task
+        self.tasks.add(task)
+        self.connections += 1
+        try:
+            while await reader.readline():
+                headers = {}
+                while (h := await reader.readline()).strip():
+                    k, _, v = h.decode().partition(":")
+                    headers[k.lower()] = v.strip()
+                data = json.loads(
+                    await reader.readexactly(int(headers["content-length"]))
+                )
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                await asyncio.sleep(self.delay)
+                self.active -= 1
+                if self.close:
+                    break
+                if self.reset:
+                    self.reset = False
+                    sock = writer.get_extra_info("socket")
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, LINGER0)
+                    break
+                r = self.response or R.get(data["action"], [{"error": "Unknown"}])[0]
+                self.replies.append(r)
+                body = json.dumps(r).encode()
+                if self.framing == "length":
+                    writer.write(
+                        f"{self.head}Content-Length: {len(body)}\r\n\r\n".encode()
+                    )
+                    writer.write(body)
+                    if self.drop:
+                        await writer.drain()
+                        break
+                elif self.framing == "chunked":
+                    writer.write(
+                        f"{self.head}Transfer-Encoding: chunked\r\n\r\n".encode()
+                    )
+                    for i in range(0, len(body), 7):
+                        writer.write(f"{len(body[i:i + 7]):x};x=y\r\n".encode())
+                        writer.write(body[i : i + 7] + b"\r\n")
+                    writer.write(b"0\r\nX-Trailer: 1\r\n\r\n")
+                else:
+                    writer.write(f"{self.head}\r\n".encode() + body)
+                    break
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.tasks.discard(task)
+            writer.close()
+
+
+class TestHTTP(TestCase):
+    def setUp(self) -> None:
+        self.calls = 0
+        self.failures = 0
+        self.delay = 0.0
+        self.stub = Stub(self.handler)
+        self.url = f"http://127.0.0.1:{self.stub.start_thread()}"
+        self.rpc = nanopy.rpc.HTTP(self.url, timeout=1)
+        self.rpc.backoff = 0.01
+
+    def tearDown(self) -> None:
+        self.stub.call(self.stub.stop())
+
+    async def handler(self, data: dict[str, Any]) -> Any:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionResetError
+        await asyncio.sleep(self.delay)
+        return R[data["action"]][0]
+
+    def test_retry(self) -> None:
+        self.failures = 2
+        assert self.rpc.account_balance(PACC0) == R["account_balance"][0]
+        assert self.calls == 3
+        self.calls, self.failures = 0, 3
+        with self.assertRaises(requests.ConnectionError):
+            self.rpc.account_balance(PACC0)
+        assert self.calls == 3
+
+    def test_process(self) -> None:
+        self.failures = 1
+        with self.assertRaises(requests.ConnectionError):
+            self.rpc.process(RB)
+        assert self.calls == 1
+        self.calls = 0
+        self.rpc.safe = frozenset({"process"})
+        assert self.rpc.process(RB) == R["process"][0]
+        assert self.calls == 2
+
+    def test_deadline(self) -> None:
+        self.delay = 0.3
+        self.rpc.deadline = 0.1
+        t0 = time.perf_counter()
+        with self.assertRaises(requests.Timeout):
+            self.rpc.block_count()
+        assert time.perf_counter() - t0 < 0.3
+        self.calls = 0
+        self.rpc.deadline = 0.15
+        self.rpc.timeout = (1, 0.1)
+        self.rpc.retries = 5
+        self.rpc.backoff = 0.001
+        t0 = time.perf_counter()
+        with self.assertRaises(requests.Timeout):
+            self.rpc.block_count()
+        assert time.perf_counter() - t0 < 0.3
+        assert self.calls == 2
+        timeout = self.rpc._timeout  # pylint: disable=protected-access
+        assert timeout(time.monotonic() + 10) == (1, 0.1)
+        with self.assertRaisesRegex(requests.Timeout, "Deadline exceeded"):
+            timeout(time.monotonic())
+
+    def test_retryable(self) -> None:
+        retryable = nanopy.rpc.HTTP._retryable  # pylint: disable=protected-access
+        for status, expected in ((503, True), (429, True), (500, False)):
+            r = requests.Response()
+            r.status_code = status
+            assert retryable(requests.HTTPError(response=r)) == expected
+        assert not retryable(requests.RequestException())
+
+    def test_pool(self) -> None:
+        r = nanopy.rpc.HTTP(self.url, pool_size=4, keep_alive=False)
+        assert r.api.headers["Connection"] == "close"
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            assert len(list(pool.map(lambda _: r.version(), range(16)))) == 16
+        adapter = r.api.get_adapter(self.url)
+        assert adapter._pool_maxsize == 4  # type: ignore # pylint: disable=protected-access
+
+
+class TestAsyncHTTP(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.stub = HTTPStub()
+        self.rpc = nanopy.rpc.AsyncHTTP(await self.stub.start(), max_connections=2)
+
+    async def asyncTearDown(self) -> None:
+        await self.rpc.close()
+        await self.stub.stop()
+
+    async def test_methods(self) -> None:
+        with (
+            patch.object(self.rpc, "_validate_block_info"),
+            patch.object(self.rpc, "_validate_blocks"),
+            patch.object(self.rpc, "_validate_blocks_info"),
+        ):
+            for n, m in inspect.getmembers(self.rpc, predicate=inspect.ismethod):
+                if n.startswith(("_", "iter_")) or n in (
+                    "close",
+                    "request",
+                    "stream",
+                    "typed",
+                ):
+                    continue
+                params = inspect.signature(m).parameters
+                args = [
+                    None if v.default is inspect.Parameter.empty else v.default
+                    for p, v in params.items()
+                    if p != "self"
+                ]
+                with self.subTest(n):
+                    assert await m(*args) == self.stub.replies[-1]
+        assert self.stub.connections == 1
+
+    async def test_validation(self) -> None:
+        self.stub.response = {"block_count": "a"}
+        with self.assertRaises(ValidationError):
+            await self.rpc.account_block_count(PACC0)
+        self.stub.response = copy.deepcopy(R["block_info"][0])
+        self.stub.response["contents"]["signature"] = R128
+        with self.assertRaises(AssertionError):
+            await self.rpc.block_info(
+                "1f5bc8e8c4b862fdc5d01857325dade3561349505f4a4d478610e3394d2105f3"
+            )
+
+    async def test_concurrency(self) -> None:
+        self.stub.delay = 0.01
+        c = [self.rpc.block_count() for _ in range(8)]
+        assert await asyncio.gather(*c) == [R["block_count"][0]] * 8
+        assert self.stub.max_active == 2
+        assert self.stub.connections == 2
+
+    async def test_timeout(self) -> None:
+        self.stub.delay = 1
+        self.rpc.timeout = 0.01
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.rpc.block_count()
+
+    async def test_framing(self) -> None:
+        for head, framing, connections in [
+            ("HTTP/1.1 200 OK\r\n", "chunked", 1),
+            ("HTTP/1.1 200 OK\r\nConnection: close\r\n", "length", 2),
+            ("HTTP/1.0 200 OK\r\n", "length", 2),
+            ("HTTP/1.0 200 OK\r\nConnection: keep-alive\r\n", "length", 1),
+            ("HTTP/1.1 200 OK\r\n", "eof", 2),
+        ]:
+            self.stub.head, self.stub.framing = head, framing
+            self.stub.connections = 0
+            async with nanopy.rpc.AsyncHTTP(self.rpc.url) as r:
+                for _ in range(2):
+                    assert await r.block_count() == R["block_count"][0]
+            assert self.stub.connections == connections, head
+
+    async def test_errors(self) -> None:
+        self.stub.head = "HTTP/1.1 500 Internal Server Error\r\n"
+        with self.assertRaisesRegex(requests.HTTPError, "500 Error"):
+            await self.rpc.block_count()
+        self.stub.close = True
+        with self.assertRaisesRegex(ConnectionError, "Connection closed by the node"):
+            await self.rpc.block_count()
+        self.stub.head = "garbage\r\n"
+        self.stub.close = False
+        with self.assertRaises(ValueError):
+            await self.rpc.block_count()
+
+    async def test_reset(self) -> None:
+        assert await self.rpc.block_count() == R["block_count"][0]
+        self.stub.reset = True
+        assert await self.rpc.block_count() == R["block_count"][0]
+        assert self.stub.connections == 2
+        self.stub.reset = True
+        with self.assertRaises(ConnectionResetError):
+            await self.rpc.request({"action": "process", "block": {}})
+
+    async def test_stale_connection(self) -> None:
+        self.stub.drop = True
+        for _ in range(3):
+            assert await self.rpc.block_count() == R["block_count"][0]
+        assert self.stub.connections == 3
+        data = {"action": "process", "block": {}}
+        with self.assertRaisesRegex(ConnectionError, "Connection closed by the node"):
+            await self.rpc.request(data)
+        assert await self.rpc.request(data) == R["process"][0]
+        async with nanopy.rpc.AsyncHTTP(self.rpc.url, safe=["process"]) as r:
+            for _ in range(2):
+                assert await r.request(data) == R["process"][0]
+        assert self.stub.connections == 6
+
+
+async def ws_handler(data: dict[str, Any]) -> Any:
+    await asyncio.sleep(data.get("delay", 0))
+    return R[data["action"]][0] if data["action"] in R else data
+
+
+class TestWS(TestCase):
+    def setUp(self) -> None:
+        self.stub = Stub(ws_handler)
+        self.url = f"ws://127.0.0.1:{self.stub.start_thread()}"
+        self.rpc = nanopy.rpc.WS(self.url, max_in_flight=4, timeout=5)
+
+    def tearDown(self) -> None:
+        self.rpc.close()
+        self.stub.call(self.stub.stop())
+
+    def test_multiplex(self) -> None:
+        assert self.rpc.block_count() == R["block_count"][0]
+
+        def request(i: int) -> Any:
+            return self.rpc.request({"action": "x", "n": i, "delay": i % 3 / 100})
+
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            for i, r in enumerate(pool.map(request, range(64))):
+                assert r["n"] == i
+        f = [self.rpc.submit({"action": "x", "n": i}) for i in range(4)]
+        assert [g.result()["n"] for g in f] == list(range(4))
+
+    def test_backpressure(self) -> None:
+        f = [self.rpc.submit({"action": "x", "delay": 0.1}) for _ in range(4)]
+        t0 = time.perf_counter()
+        self.rpc.request({"action": "x"})
+        assert time.perf_counter() - t0 > 0.05
+        assert any(g.done() for g in f)
+
+    def test_timeout(self) -> None:
+        self.rpc.timeout = 0.01
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            self.rpc.request({"action": "x", "delay": 0.05})
+        self.rpc.timeout = 5
+        for _ in range(4):
+            self.rpc.submit({"action": "x"})
+        time.sleep(0.1)
+        assert self.rpc.request({"action": "x"}) == {"action": "x"}
+
+    def test_subscribers(self) -> None:
+        messages: list[Any] = []
+        self.rpc.subscribers.append(messages.append)
+        self.stub.call(self.stub.publish({"topic": "confirmation"}))
+        self.rpc.block_count()
+        assert messages == [{"topic": "confirmation"}]
+
+    def test_reconnect(self) -> None:
+        f = self.rpc.submit({"action": "x", "delay": 1})
+        self.stub.call(self.stub.stop())
+        with self.assertRaisesRegex(ConnectionError, "WebSocket connection lost"):
+            f.result()
+        time.sleep(0.4)
+        self.stub.call(self.stub.start(port=int(self.url.split(":")[2])))
+        r = None
+        for _ in range(50):
+            time.sleep(0.1)
+            with contextlib.suppress(ConnectionError):
+                r = self.rpc.block_count()
+                break
+        assert r == R["block_count"][0]
+
+    def test_close(self) -> None:
+        self.rpc.close()
+        with self.assertRaises(ConnectionError):
+            self.rpc.block_count()
+
+    def test_close_reconnecting(self) -> None:
+        api, connecting = Mock(), threading.Event()
+        closed = self.rpc._closed  # pylint: disable=protected-access
+
+        def connect(_: str) -> Mock:
+            connecting.set()
+            closed.wait(5)
+            return api
+
+        with patch("websocket.create_connection", side_effect=connect):
+            self.stub.call(self.stub.stop())
+            assert connecting.wait(5)
+            self.rpc.close()
+        api.abort.assert_called_once_with()
+
+    def test_stream(self) -> None:
+        accounts = R["ledger"][0]["accounts"]
+        assert list(self.rpc.stream("ledger", PACC0)) == list(accounts.items())
+
+
+class TestAsyncWS(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.stub = Stub(ws_handler)
+        url = f"ws://127.0.0.1:{await self.stub.start()}"
+        self.rpc = await asyncio.to_thread(nanopy.rpc.AsyncWS, url, max_in_flight=4)
+
+    async def asyncTearDown(self) -> None:
+        self.rpc.close()
+        await self.stub.stop()
+
+    async def test_requests(self) -> None:
+        r = await asyncio.gather(*(self.rpc.block_count() for _ in range(16)))
+        assert r == [R["block_count"][0]] * 16
+        self.rpc.timeout = 0.01
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.rpc.request({"action": "x", "delay": 0.05})
+
+
+HB = "1f5bc8e8c4b862fdc5d01857325dade3561349505f4a4d478610e3394d2105f3"
+ACCS = [f"nano_{i:060d}" for i in range(25)]
+
+
+def bulk_handler(data: dict[str, Any]) -> Any:
+    if data["action"] == "blocks_info":
+        info = R["block_info"][0]
+        return {"blocks": {h: info for h in data["hashes"]}, "blocks_not_found": [Z64]}
+    if ACCS[12] in data["accounts"]:
+        return {"error": "Bad account number"}
+    if ACCS[22] in data["accounts"]:
+        return {"balances": {a: {"balance": "-1"} for a in data["accounts"]}}
+    return {"balances": {a: {"balance": a[-2:]} for a in data["accounts"]}}
+
+
+class TestChunks(StubCase):
+    handler = staticmethod(bulk_handler)
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.rpc.chunk_size = 10
+
+    def test_merge(self) -> None:
+        r = self.rpc.accounts_balances(ACCS[:10])
+        assert len(self.requests) == 1
+        assert self.rpc.accounts_balances(ACCS[:12] + ACCS[13:22]) == {
+            "balances": {a: {"balance": a[-2:]} for a in ACCS[:12] + ACCS[13:22]}
+        }
+        assert sorted(len(d["accounts"]) for d in self.requests[1:]) == [1, 10, 10]
+        assert r["balances"] == {a: {"balance": a[-2:]} for a in ACCS[:10]}
+        r = self.rpc.blocks_info([HB] * 3, include_not_found=True)
+        assert r["blocks_not_found"] == [Z64]
+        self.rpc.chunk_size = 1
+        r = self.rpc.blocks_info([HB] * 3, include_not_found=True)
+        assert r == {"blocks": {HB: R["block_info"][0]}, "blocks_not_found": [Z64] * 3}
+        assert [d["hashes"] for d in self.requests[-3:]] == [[HB]] * 3
+        self.rpc.chunk_size = 0
+        self.rpc.accounts_balances(ACCS[:12])
+        assert len(self.requests[-1]["accounts"]) == 12
+        merge = nanopy.rpc.RPC._merge  # pylint: disable=protected-access
+        assert merge([["a"], ["b"]], [{"n": "1"}, {"n": "2"}]) == {"n": "1"}
+
+    def test_errors(self) -> None:
+        with self.assertRaises(nanopy.rpc.ChunkError) as cm:
+            self.rpc.accounts_balances(ACCS)
+        e = cm.exception
+        assert list(e.errors) == [1, 2]
+        assert str(e.errors[1]) == "Bad account number"
+        assert isinstance(e.errors[2], ValidationError)
+        assert e.missing == ACCS[10:]
+        assert e.result == {"balances": {a: {"balance": a[-2:]} for a in ACCS[:10]}}
+        assert str(e).startswith(
+            f"2 of 3 chunks failed: chunk 1 (10 items from {ACCS[10]}): RuntimeError"
+        )
+        assert self.rpc.accounts_balances(ACCS[10:20]) == {
+            "error": "Bad account number"
+        }
+
+
+class TestAsyncChunks(StubCase, IsolatedAsyncioTestCase):
+    client: Callable[..., Any] = nanopy.rpc.AsyncHTTP
+    active = max_active = 0
+
+    async def handler(  # pylint: disable=invalid-overridden-method
+        self, data: dict[str, Any]
+    ) -> Any:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return bulk_handler(data)
+
+    async def test_chunks(self) -> None:
+        self.rpc.chunk_size = 4
+        assert (await self.rpc.accounts_balances(ACCS[:10]))["balances"] == {
+            a: {"balance": a[-2:]} for a in ACCS[:10]
+        }
+        with self.assertRaises(nanopy.rpc.ChunkError) as cm:
+            await self.rpc.accounts_balances(ACCS)
+        assert list(cm.exception.errors) == [3, 5]
+        self.rpc.chunk_size = 2
+        r = await self.rpc.blocks_info([HB] * 3)
+        assert r["blocks_not_found"] == [Z64] * 2
+
+    async def test_concurrency(self) -> None:
+        self.rpc.chunk_size, self.rpc.chunk_concurrency = 1, 2
+        assert len((await self.rpc.accounts_balances(ACCS[:6]))["balances"]) == 6
+        assert self.max_active == 2
+
+
+class TestAsyncWSChunks(TestAsyncChunks):
+    client = nanopy.rpc.AsyncWS
+
+
+ACCOUNTS = sorted(nanopy.Account(pk=f"{3 * i:064x}").addr for i in range(25))
+HISTORY = [
+    {
+        "type": "send",
+        "account": PACC0,
+        "amount": "1",
+        "local_timestamp": "0",
+        "height": str(i + 1),
+        "hash": f"{i:064x}",
+        "confirmed": "true",
+    }
+    for i in range(25)
+]
+
+
+def paged_handler(data: dict[str, Any]) -> Any:
+    n = data.get("count", 0) or 1000
+    if data["action"] == "account_history":
+        i = int(data.get("head", f"{24:064x}"), 16)
+        if data.get("reverse"):
+            h = HISTORY[i : i + n]
+            cursor = {"next": f"{i + n:064x}"} if i + n < 25 else {}
+        else:
+            h = HISTORY[max(i - n + 1, 0) : i + 1][::-1]
+            cursor = {"previous": f"{i - n:064x}"} if i - n >= 0 else {}
+        return {"account": PACC0, "history": h} | cursor
+    if data["action"] == "delegators":
+        start = data.get("start", "")
+        a = [x for x in ACCOUNTS if x > start][:n]
+        return {"delegators": {x: "1" for x in a}}
+    start = data.get("account", ACCOUNTS[0])
+    if start == PACC1:
+        return {"error": "Bad account number"}
+    a = [x for x in ACCOUNTS if x >= start][:n]
+    if data["action"] == "ledger":
+        return {"accounts": {x: R["ledger"][0]["accounts"][PACC0] for x in a}}
+    return {"accounts": {x: "1" for x in a}}
+
+
+class TestPagination(StubCase):
+    handler = staticmethod(paged_handler)
+
+    def test_account_history(self) -> None:
+        h = self.rpc.iter_account_history(PACC0, 10)
+        assert next(h) == HISTORY[24]
+        for _ in range(100):
+            if len(self.requests) == 2:
+                break
+            time.sleep(0.01)
+        assert self.requests[1]["head"] == f"{14:064x}"
+        assert [e["height"] for e in h] == [str(i) for i in range(24, 0, -1)]
+        assert len(self.requests) == 3
+        r = self.rpc.iter_account_history(PACC0, 5, head=Z64, reverse=True)
+        assert list(r) == HISTORY
+
+    def test_accounts(self) -> None:
+        assert [a for a, _ in self.rpc.iter_ledger(page_size=10)] == ACCOUNTS
+        assert len(self.requests) == 3
+        assert list(self.rpc.iter_unopened(ACCOUNTS[5], 5)) == [
+            (a, "1") for a in ACCOUNTS[5:]
+        ]
+        assert list(self.rpc.iter_delegators(PACC0, 25)) == [(a, "1") for a in ACCOUNTS]
+        assert len(self.requests) == 3 + 5 + 2
+        with self.assertRaisesRegex(RuntimeError, "Bad account number"):
+            list(self.rpc.iter_unopened(PACC1))
+
+
+class TestAsyncPagination(StubCase, IsolatedAsyncioTestCase):
+    client: Callable[..., Any] = nanopy.rpc.AsyncHTTP
+    handler = staticmethod(paged_handler)
+
+    async def test_pages(self) -> None:
+        h = [e async for e in self.rpc.iter_account_history(PACC0, 7)]
+        assert h == HISTORY[::-1]
+        assert [a async for a, _ in self.rpc.iter_ledger(page_size=4)] == ACCOUNTS
+        with self.assertRaisesRegex(RuntimeError, "Bad account number"):
+            await anext(self.rpc.iter_ledger(PACC1))
+        d = self.rpc.iter_delegators(PACC0, 2)
+        assert await anext(d) == (ACCOUNTS[0], "1")
+        await d.aclose()
+
+
+class TestAsyncWSPagination(TestAsyncPagination):
+    client = nanopy.rpc.AsyncWS
+
+
+class TestStream(StubCase):
+    response: Any = None
+
+    def handler(self, data: dict[str, Any]) -> Any:
+        return self.response
+
+    def test_parser(self) -> None:
+        doc: dict[str, Any] = {
+            "a": 'ä€😀 " }\\',
+            "n": [12345, -1.5e3, True, None, {"x": [1, {}]}, []],
+            "o": {"k": {"y": "z"}, "€": "1"},
+            "e": {},
+        }
+        stream = nanopy.rpc._JSONStream  # pylint: disable=protected-access
+        members = nanopy.rpc._members  # pylint: disable=protected-access
+        b = json.dumps(doc, ensure_ascii=False, indent=1).encode()
+        assert list(stream(b[i : i + 1] for i in range(len(b)))) == list(members(doc))
+        assert not list(stream([b"{}"]))
+        for bad in (b"[1]", b'{"a" 1}', b'{"a": 1 "b": 2}', b'{"a": "x'):
+            with self.assertRaises(json.JSONDecodeError):
+                list(stream([bad]))
+
+    def test_stream(self) -> None:
+        info = R["ledger"][0]["accounts"][PACC0]
+        self.response = {"accounts": {a: info for a in ACCOUNTS}}
+        assert list(self.rpc.stream("ledger", PACC0, 25)) == [
+            (a, info) for a in ACCOUNTS
+        ]
+        self.response["accounts"][ACCOUNTS[3]] = {"balance": "x"}
+        s = self.rpc.stream("ledger", PACC0, 25)
+        assert [a for a, _ in itertools.islice(s, 3)] == ACCOUNTS[:3]
+        with self.assertRaises(ValidationError):
+            next(s)
+        self.response = {"account": PACC0, "history": HISTORY, "previous": Z64}
+        assert list(self.rpc.stream("account_history", PACC0, 25)) == HISTORY
+        self.response = {"history": HISTORY}
+        assert list(self.rpc.stream("wallet_history", Z64)) == HISTORY
+        self.response = {"balances": {PACC0: {"balance": "1", "pending": "0"}}}
+        assert list(self.rpc.stream("accounts_balances", [PACC0])) == list(
+            self.response["balances"].items()
+        )
+        self.response = {"accounts": ""}
+        with self.assertRaises(ValidationError):
+            list(self.rpc.stream("ledger", PACC0))
+        self.response = {}
+        with self.assertRaises(ValidationError):
+            list(self.rpc.stream("ledger", PACC0))
+        self.response = {"error": "Bad account number"}
+        with self.assertRaisesRegex(RuntimeError, "Bad account number"):
+            list(self.rpc.stream("ledger", PACC0))
+        with self.assertRaisesRegex(ValueError, "Cannot stream block_info"):
+            self.rpc.stream("block_info", HB)
+        self.rpc.validation = "off"
+        self.response = {"accounts": ""}
+        assert not list(self.rpc.stream("ledger", PACC0))
+
+    def test_blocks(self) -> None:
+        self.response = {"blocks": {HB: RB}}
+        assert list(self.rpc.stream("blocks", [HB])) == [(HB, RB)]
+        self.response = {"blocks": {HB: RB | {"balance": "1"}}}
+        with self.assertRaises(AssertionError):
+            list(self.rpc.stream("blocks", [HB]))
+        self.response = {"blocks": {HB: RB}}
+        with self.assertRaises(AssertionError):
+            list(self.rpc.stream("blocks", [Z64]))
+
+    def test_requested_blocks(self) -> None:
+        info = R["block_info"][0]
+        self.response = {"blocks": {HB.upper(): RB}}
+        assert self.rpc.blocks([HB]) == self.response
+        for hashes in ([Z64], [HB, Z64]):
+            with self.assertRaises(AssertionError):
+                self.rpc.blocks(hashes)
+        self.response = {"blocks": {HB: info}, "blocks_not_found": [Z64]}
+        assert self.rpc.blocks_info([HB, Z64], include_not_found=True)
+        self.response = {"blocks": {HB: info}, "blocks_not_found": []}
+        with self.assertRaises(AssertionError):
+            self.rpc.blocks_info([HB, Z64], include_not_found=True)
+
+
+class TestAsyncStream(StubCase, IsolatedAsyncioTestCase):
+    client: Callable[..., Any] = nanopy.rpc.AsyncHTTP
+
+    def handler(self, data: dict[str, Any]) -> Any:
+        return {"history": HISTORY}
+
+    async def test_stream(self) -> None:
+        assert [e async for e in self.rpc.stream("wallet_history", Z64)] == HISTORY
+
+
+class TestAsyncWSStream(TestAsyncStream):
+    client = nanopy.rpc.AsyncWS
+
+
+SIGNER = nanopy.Account(sk=R64)
+BLOCKS = [SIGNER.receive(f"{i:064x}", 1, work=R16) for i in range(1, 4)]
+
+
+def cache_handler(data: dict[str, Any]) -> Any:
+    info = R["block_info"][0] | {"confirmed": "true"}
+    if data["action"] == "blocks_info":
+        return {
+            "blocks": {
+                b.hash_: info | {"contents": b.dict_, "confirmed": str(i < 2).lower()}
+                for i, b in enumerate(BLOCKS)
+                if b.hash_ in data["hashes"]
+            }
+        }
+    if data["action"] == "block_info":
+        return info | {"contents": RB, "successor": data.get("successor", Z64)}
+    if data["action"] == "block_account":
+        return {"account": PACC0} if data["hash"] != Z64 else {"error": "x"}
+    return R[data["action"]][0]
+
+
+class TestCache(StubCase):
+    handler = staticmethod(cache_handler)
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.rpc.cache = nanopy.rpc.Cache(size=8)
+
+    def test_blocks(self) -> None:
+        hashes = [b.hash_ for b in BLOCKS]
+        r = self.rpc.blocks_info(hashes)
+        assert list(r["blocks"]) == hashes
+        assert self.rpc.blocks_info(hashes[::-1]) == {
+            "blocks": {h: r["blocks"][h] for h in hashes[::-1]}
+        }
+        assert self.requests[1]["hashes"] == hashes[2:]
+        assert self.rpc.blocks_info(hashes[:2]) == {
+            "blocks": {h: r["blocks"][h] for h in hashes[:2]}
+        }
+        assert self.rpc.blocks_info(hashes[:1], include_not_found=True) == {
+            "blocks": {hashes[0]: r["blocks"][hashes[0]]},
+            "blocks_not_found": [],
+        }
+        self.rpc.blocks_info(hashes[:1], pending=True)
+        self.rpc.blocks_info(hashes[:1], pending=True)
+        assert len(self.requests) == 4
+        cache = self.rpc.cache
+        assert cache is not None
+        assert (cache.hits, cache.misses) == (5, 6)
+        assert cache.hit_rate == 5 / 11
+        assert cache.bytes_saved > 0
+
+    def test_actions(self) -> None:
+        self.rpc.block_info(HB)
+        self.rpc.block_info(HB)
+        assert len(self.requests) == 2
+        self.rpc.block_account(Z64)
+        self.rpc.block_account(Z64)
+        self.rpc.block_account(HB)
+        self.rpc.block_account(HB)
+        self.rpc.chain(HB, reverse=True)
+        self.rpc.chain(HB, reverse=True)
+        self.rpc.chain(HB)
+        self.rpc.chain(HB)
+        self.rpc.version()
+        self.rpc.version()
+        self.rpc.block_count()
+        self.rpc.block_count()
+        assert [d["action"] for d in self.requests[2:]] == [
+            "block_account",
+            "block_account",
+            "block_account",
+            "chain",
+            "chain",
+            "chain",
+            "version",
+            "block_count",
+            "block_count",
+        ]
+        assert self.rpc.cache is not None
+        self.rpc.cache.ttl["block_count"] = 0
+        self.rpc.block_count()
+        self.rpc.block_count()
+        assert len(self.requests) == 13
+        misses = self.rpc.cache.misses
+        self.rpc.account_balance(PACC0)
+        self.rpc.account_balance(PACC0)
+        assert len(self.requests) == 15
+        assert self.rpc.cache.misses == misses
+
+    def test_lru(self) -> None:
+        cache = nanopy.rpc.Cache(size=2)
+        for i in range(3):
+            cache.put(str(i), i)
+        cache.get("1")
+        cache.put("3", 3)
+        assert len(cache) == 2
+        assert cache.get("0") is None and cache.get("2") is None
+        assert cache.get("1") == 1 and cache.get("3") == 3
+        assert nanopy.rpc.Cache().hit_rate == 0
+
+    def test_save(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "cache.json")
+            cache = nanopy.rpc.Cache(path=path)
+            cache.put("a", {"x": 1})
+            cache.put("b", 2, 60)
+            cache.save()
+            cache = nanopy.rpc.Cache(path=path)
+            assert len(cache) == 1
+            assert cache.get("a") == {"x": 1}
+
+
+class TestAsyncCache(StubCase, IsolatedAsyncioTestCase):
+    client = nanopy.rpc.AsyncHTTP
+    handler = staticmethod(cache_handler)
+
+    async def test_cache(self) -> None:
+        self.rpc.cache = c = nanopy.rpc.Cache()
+        hashes = [b.hash_ for b in BLOCKS]
+        b = await self.rpc.blocks_info(hashes)
+        assert await self.rpc.blocks_info(hashes) == b
+        assert await self.rpc.blocks_info(hashes[:2]) == {
+            "blocks": {h: b["blocks"][h] for h in hashes[:2]}
+        }
+        assert c.hits == 4
+
+
+class TestSingleFlight(StubCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.rpc.coalesce = nanopy.rpc.SingleFlight()
+
+    async def handler(  # pylint: disable=invalid-overridden-method
+        self, data: dict[str, Any]
+    ) -> Any:
+        await asyncio.sleep(0.2)
+        if data["action"] == "send":
+            return R["send"][0]
+        return R[data["action"]][0] if data["account"] == PACC0 else {"balance": "x"}
+
+    def test_coalesce(self) -> None:
+        accounts = [PACC0] * 6 + [PACC1] * 2
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            f = [pool.submit(self.rpc.account_balance, a) for a in accounts]
+        assert [g.result() for g in f[:6]] == [R["account_balance"][0]] * 6
+        assert len({id(g.result()) for g in f[:6]}) == 6
+        for g in f[6:]:
+            with self.assertRaises(ValidationError):
+                g.result()
+        assert len(self.requests) == 2
+        assert self.rpc.coalesce
+        assert (self.rpc.coalesce.calls, self.rpc.coalesce.shared) == (2, 6)
+        self.rpc.account_balance(PACC0)
+        assert len(self.requests) == 3
+
+    def test_writes(self) -> None:
+        with concurrent.futures.ThreadPoolExecutor(2) as pool:
+            f = [pool.submit(self.rpc.send, R64, PACC0, PACC1, "1") for _ in range(2)]
+        assert [g.result() for g in f] == [R["send"][0]] * 2
+        assert len(self.requests) == 2
+        assert self.rpc.coalesce
+        assert self.rpc.coalesce.shared == 0
+
+    def test_clients(self) -> None:
+        other = nanopy.rpc.HTTP(self.rpc.url, validation="off")
+        other.coalesce = self.rpc.coalesce
+        with concurrent.futures.ThreadPoolExecutor(2) as pool:
+            f = [pool.submit(r.account_balance, PACC0) for r in (self.rpc, other)]
+        assert [g.result() for g in f] == [R["account_balance"][0]] * 2
+        assert len(self.requests) == 2
+
+
+class TestAsyncSingleFlight(StubCase, IsolatedAsyncioTestCase):
+    client = nanopy.rpc.AsyncHTTP
+
+    async def handler(  # pylint: disable=invalid-overridden-method
+        self, data: dict[str, Any]
+    ) -> Any:
+        await asyncio.sleep(0.05)
+        return R[data["action"]][0]
+
+    async def test_coalesce(self) -> None:
+        r = self.rpc
+        r.coalesce = nanopy.rpc.SingleFlight()
+        t = [asyncio.create_task(r.account_balance(PACC0)) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        t[0].cancel()
+        results = await asyncio.gather(*t[1:])
+        assert results == [R["account_balance"][0]] * 3
+        assert len({id(x) for x in results}) == 3
+        r.cache = nanopy.rpc.Cache()
+        await asyncio.gather(r.version(), r.version())
+        assert await r.version() == R["version"][0]
+        assert len(self.requests) == 2
+
+
+SEED_KEY = "9F0E444C69F77A49BD0BE89DB92C38FE713E0963165CCA12FAF5712D7657120F"
+SEED_PK = "C008B814A7D269A1FA3C6528B19201A24D797912DB9996FF02A1FF356E45552B"
+SK = "781186FB9EF17DB6E3D1056550D9FAE5D5BBADA6A6BC370E4CBB938B1DC71DA3"
+PK = "3068BB1CA04525BB0E416C485FE6A67FD52540227D267CC8B6E8DA958A7FA039"
+ACC = "nano_1e5aqegc1jb7qe964u4adzmcezyo6o146zb8hm6dft8tkp79za3sxwjym5rx"
+XACC = "xrb_" + ACC[5:]
+LEGACY = {
+    "type": "open",
+    "source": O64,
+    "representative": ACC,
+    "account": ACC,
+    "work": R16,
+    "signature": R128,
+}
+
+
+def node_answers() -> list[tuple[Callable[[Any], Any], Any]]:
+    """calls of the offline actions and the answers of a node, from the RPC docs
+    or computed independently"""
+    work, root = R16, R64
+    w = bytearray.fromhex(work)
+    w.reverse()
+    d = bytearray(hashlib.blake2b(w + bytes.fromhex(root), digest_size=8).digest())
+    d.reverse()
+    preamble = "0" * 63 + "6"
+    fields = [PK, Z64, PK, f"{10**30:032x}", O64]
+    h = hashlib.blake2b(bytes.fromhex(preamble + "".join(fields)), digest_size=32)
+    block = {"type": "state", "account": ACC, "previous": Z64, "representative": ACC}
+    block |= {"balance": str(10**30), "link": O64, "work": R16, "signature": R128}
+    m = 0x4000000000 / ((1 << 64) - int(d.hex(), 16))
+    validity = {
+        "valid_all": "1" if d >= bytes.fromhex("fffffff800000000") else "0",
+        "valid_receive": "1" if d >= bytes.fromhex("fffffe0000000000") else "0",
+        "difficulty": d.hex(),
+        "multiplier": f"{m:.15f}",
+    }
+    base = bytes.fromhex(nanopy.Account.network.difficulty)
+    return [
+        (lambda r: r.validate_account_number(ACC), {"valid": "1"}),
+        (lambda r: r.validate_account_number(XACC), {"valid": "1"}),
+        (lambda r: r.validate_account_number(ACC[:-1] + "1"), {"valid": "0"}),
+        (lambda r: r.validate_account_number(PACC0[:-1]), {"valid": "0"}),
+        (lambda r: r.account_key(ACC), {"key": PK}),
+        (lambda r: r.account_key("x"), {"error": "Bad account number"}),
+        (lambda r: r.account_key(1), {"error": "Bad account number"}),
+        (lambda r: r.account_get(PK), {"account": ACC}),
+        (lambda r: r.account_get(PK[1:]), {"error": "Bad public key"}),
+        (
+            lambda r: r.deterministic_key(Z64, 0),
+            {"private": SEED_KEY, "public": SEED_PK, "account": ZACC0},
+        ),
+        (lambda r: r.deterministic_key(Z64[1:], 0), {"error": "Bad seed"}),
+        (lambda r: r.deterministic_key(Z64, 1 << 32), {"error": "Invalid index"}),
+        (lambda r: r.deterministic_key(Z64, "x"), {"error": "Invalid index"}),
+        (lambda r: r.key_expand(SK), {"private": SK, "public": PK, "account": ACC}),
+        (lambda r: r.key_expand("g" * 64), {"error": "Bad private key"}),
+        (lambda r: r.block_hash(block), {"hash": h.hexdigest().upper()}),
+        (
+            lambda r: r.block_hash(block | {"account": XACC, "representative": XACC}),
+            {"hash": h.hexdigest().upper()},
+        ),
+        (lambda r: r.block_hash(block | {"link": "x"}), {"error": "Block is invalid"}),
+        (
+            lambda r: r.block_hash(block | {"balance": str(1 << 128)}),
+            {"error": "Block is invalid"},
+        ),
+        (lambda r: r.block_hash(block | {"account": 1}), {"error": "Block is invalid"}),
+        (
+            lambda r: r.work_validate(work, root, "ffffffffffffffff"),
+            validity | {"valid": "0"},
+        ),
+        (
+            lambda r: r.work_validate(work, root, multiplier=1),
+            validity | {"valid": "1" if d >= base else "0"},
+        ),
+        (
+            lambda r: r.work_validate(work, root, multiplier=-1),
+            {"error": "Bad multiplier"},
+        ),
+        (lambda r: r.work_validate("x", root), {"error": "Bad work"}),
+        (lambda r: r.work_validate(work, "x"), {"error": "Bad hash number"}),
+        (lambda r: r.work_validate(work, root, "x"), {"error": "Bad difficulty"}),
+        (lambda r: r.nano_to_raw("1"), {"amount": str(10**30)}),
+        (lambda r: r.nano_to_raw("0.5"), {"amount": str(5 * 10**29)}),
+        (lambda r: r.nano_to_raw("1e-31"), {"error": "Invalid amount number"}),
+        (lambda r: r.nano_to_raw("1e9"), {"error": "Amount too big"}),
+        (lambda r: r.nano_to_raw("x"), {"error": "Invalid amount number"}),
+        (lambda r: r.raw_to_nano(str(10**30)), {"amount": "1"}),
+        (lambda r: r.raw_to_nano("1"), {"amount": "0.000000000000000000000000000001"}),
+        (lambda r: r.raw_to_nano("0"), {"amount": "0"}),
+        (lambda r: r.raw_to_nano("-1"), {"error": "Invalid amount number"}),
+        (lambda r: r.raw_to_nano(str(1 << 128)), {"error": "Amount too big"}),
+    ]
+
+
+class TestOffline(StubCase):
+    answer: Any = None
+
+    def handler(self, data: dict[str, Any]) -> Any:
+        if data.get("block") == LEGACY:
+            return {"hash": O64}
+        return self.answer
+
+    def test_node(self) -> None:
+        answers = node_answers()
+        for call, answer in answers:
+            self.answer = answer
+            assert call(self.rpc) == answer
+        self.rpc.offline = offline = nanopy.rpc.Offline()
+        for call, answer in answers:
+            with self.subTest(answer):
+                assert call(self.rpc) == answer
+        assert len(self.requests) == len(answers)
+        assert offline.answered == len(answers)
+        assert self.rpc.block_hash(LEGACY) == {"hash": O64}
+        assert len(self.requests) == len(answers) + 1
+
+    def test_many(self) -> None:
+        offline = nanopy.rpc.Offline()
+        requests_ = []
+        for i in range(64):
+            requests_.append(
+                {"action": "work_validate", "work": f"{i:016x}", "hash": R64}
+            )
+        requests_ += [{"action": "work_validate", "work": "x", "hash": R64}]
+        requests_ += [
+            {"action": "work_validate", "work": R16, "hash": R64, "version": "work_2"}
+        ]
+        requests_ += [{"action": "account_key", "account": ACC}, {"action": "version"}]
+        requests_ += [
+            {"action": "work_validate", "work": R16, "hash": R64, "multiplier": m}
+            for m in ("inf", "nan")
+        ]
+        r = offline.many(requests_)
+        assert r[:64] == [offline.answer(d) for d in requests_[:64]]
+        assert (
+            r[64:]
+            == [{"error": "Bad work"}, None, {"key": PK}, None]
+            + [{"error": "Bad multiplier"}] * 2
+        )
+        assert offline.answered == 64 * 2 + 4
+        block = {"type": "state", "account": ACC, "previous": Z64}
+        block |= {"representative": ACC, "balance": "1", "link": Z64}
+        data = {"action": "block_hash", "block": block}
+        h = offline.answer(data)
+        assert h and offline.answer(data | {"block": json.dumps(block)}) == h
+
+
+class TestAsyncOffline(StubCase, IsolatedAsyncioTestCase):
+    client = nanopy.rpc.AsyncHTTP
+
+    async def test_offline(self) -> None:
+        self.rpc.offline = nanopy.rpc.Offline()
+        assert await self.rpc.account_key(ACC) == {"key": PK}
+        assert await self.rpc.block_count() == R["block_count"][0]
+        assert [d["action"] for d in self.requests] == ["block_count"]
+
+
+class TestResponse(StubCase):
+    def handler(self, data: dict[str, Any]) -> Any:
+        if data["action"] == "blocks_info":
+            return {"blocks": {h: R["block_info"][0] for h in data["hashes"]}}
+        if data["action"] in ("nano_to_raw", "raw_to_nano"):
+            return {"amount": "1"}
+        b = {"balance": "1", "pending": "0", "receivable": "0"}
+        return {"balances": {a: b | {"receivable": a} for a in data["accounts"]}}
+
+    def test_decode(self) -> None:
+        raw = {
+            "balance": "10",
+            "frontier": O64,
+            "representative": PACC0,
+            "source": PACC1,
+            "blocks": {O64: "1", Z64: {"work": R16, "account": PACC1}},
+            "hashes": [O64, RD],
+            "valid": "1",
+            "multiplier": RD,
+            "balances": {PACC0: {"balance": "x"}},
+        }
+        r = nanopy.rpc.Response(raw)
+        assert r.balance == 10 and r["frontier"] == bytes.fromhex(O64)
+        assert r.representative == PACC0 and r.source == PACC1
+        assert r.blocks[O64] == 1 and r.blocks[Z64].work == bytes.fromhex(R16)
+        acc = nanopy.rpc.Response(raw).source
+        assert r.blocks[Z64].account == acc and r.blocks[Z64].account is not acc
+        assert r.hashes == (bytes.fromhex(O64), RD)
+        assert r.valid == 1 and r.multiplier == RD
+        blocks = r.blocks
+        assert r.blocks is blocks and len(r) == len(raw) and list(r) == list(raw)
+        assert repr(nanopy.rpc.Response({})) == "Response({})"
+        for a in ("1", "1.5"):
+            amount = nanopy.rpc.Response({"amount": a}, "raw_to_nano").amount
+            assert isinstance(amount, decimal.Decimal) and amount == decimal.Decimal(a)
+        assert isinstance(nanopy.rpc.Response({"amount": "1"}).amount, int)
+        with self.assertRaisesRegex(ValueError, "Invalid amount"):
+            _ = nanopy.rpc.Response({"amount": "1.5"}).amount
+        with self.assertRaisesRegex(ValueError, "Invalid amount"):
+            _ = nanopy.rpc.Response({"amount": "x"}, "raw_to_nano").amount
+        with self.assertRaisesRegex(ValueError, "Invalid balance"):
+            _ = r.balances[PACC0].balance
+        with self.assertRaises(AttributeError):
+            _ = r.error
+        for k, v in (
+            ("balance", str(1 << 128)),
+            ("hash", R16[1:]),
+            ("account", PACC0[:-1]),
+            ("height", 1),
+        ):
+            with self.assertRaises(ValueError):
+                _ = nanopy.rpc.Response({k: v})[k]
+
+    def test_typed(self) -> None:
+        client = self.rpc
+        client.chunk_size = 1
+        r = client.typed("accounts_balances", [PACC0, PACC1])
+        assert r.balances[PACC1].balance == 1 and len(self.requests) == 2
+        with self.assertRaises(ValidationError):
+            client.accounts_balances([PACC0])
+        with self.assertRaises(ValueError):
+            _ = r.balances[PACC1].receivable
+        with self.assertRaises(AssertionError):
+            client.typed("blocks_info", [O64])
+        assert isinstance(client.typed("nano_to_raw", "0.000001").amount, int)
+        amount = client.typed("raw_to_nano", "1").amount
+        assert isinstance(amount, decimal.Decimal) and amount == 1
+
+
+class TestAsyncResponse(StubCase, IsolatedAsyncioTestCase):
+    client = nanopy.rpc.AsyncHTTP
+
+    def handler(self, data: dict[str, Any]) -> Any:
+        return {"count": "5", "unchecked": "0", "cemented": "4"}
+
+    async def test_typed(self) -> None:
+        r = await self.rpc.typed("block_count")
+        assert (r.count, r.cemented) == (5, 4)
+
+
+class TestMetrics(StubCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.metrics = nanopy.rpc.Metrics()
+
+    def tearDown(self) -> None:
+        super().tearDown()
+        self.metrics.close()
+
+    def handler(self, data: dict[str, Any]) -> Any:
+        if data["action"] == "account_balance":
+            return {"error": "Bad account number"}
+        return cache_handler(data)
+
+    def test_observe(self) -> None:
+        m = nanopy.rpc.Metrics([0.1, 1])
+        assert m.count("x") == 0 and not m.errors("x")
+        assert math.isnan(m.quantile("x"))
+        m.observe("x", "request", 0.05, 10)
+        m.observe("x", "request", 0.5, error="a")
+        m.observe("x", "request", 5, error='a"\\\n')
+        assert m.count("x") == 3 and m.count("x", "decode") == 0
+        assert m.errors("x") == {"a": 1, 'a"\\\n': 1}
+        assert [m.quantile("x", q=q) for q in (0.1, 0.5, 0.9)] == [0.1, 1, math.inf]
+        assert m.exposition().splitlines()[2:] == [
+            'nanopy_rpc_seconds_bucket{action="x",phase="request",le="0.1"} 1',
+            'nanopy_rpc_seconds_bucket{action="x",phase="request",le="1"} 2',
+            'nanopy_rpc_seconds_bucket{action="x",phase="request",le="+Inf"} 3',
+            'nanopy_rpc_seconds_sum{action="x",phase="request"} 5.55',
+            'nanopy_rpc_seconds_count{action="x",phase="request"} 3',
+            "# HELP nanopy_rpc_bytes_total Bytes of the RPC responses",
+            "# TYPE nanopy_rpc_bytes_total counter",
+            'nanopy_rpc_bytes_total{action="x",phase="request"} 10',
+            "# HELP nanopy_rpc_errors_total Phases of RPC requests ending in an error",
+            "# TYPE nanopy_rpc_errors_total counter",
+            'nanopy_rpc_errors_total{action="x",phase="request",error="a"} 1',
+            'nanopy_rpc_errors_total{action="x",phase="request",error="a\\"\\\\\\n"} 1',
+        ]
+
+    def test_http(self) -> None:
+        client = nanopy.rpc.HTTP(self.rpc.url, retries=0)
+        client.metrics = m = self.metrics
+        client.block_info(HB)
+        assert client.account_balance(PACC0) == {"error": "Bad account number"}
+        phases = ["request", "network", "decode", "schema-validate"]
+        assert [m.count("block_info", p) for p in phases] == [1, 1, 1, 1]
+        assert m.count("block_info", "block-validate") == 1
+        assert m.errors("account_balance") == {"Bad account number": 1}
+        client.url = "http://127.0.0.1:1"
+        with self.assertRaises(requests.ConnectionError):
+            client.block_count()
+        assert m.errors("block_count", "network") == {"ConnectionError": 1}
+        assert m.errors("block_count") == {"ConnectionError": 1}
+        assert m.count("block_count", "decode") == 0
+        r = requests.get(f"http://127.0.0.1:{m.serve()}/metrics", timeout=5)
+        assert r.headers["Content-Type"] == "text/plain; version=0.0.4"
+        assert r.text == m.exposition()
+        assert 'nanopy_rpc_bytes_total{action="block_info",phase="decode"}' in r.text
+
+    def test_ws(self) -> None:
+        client = nanopy.rpc.WS(f"ws://127.0.0.1:{self.port}")
+        client.metrics = m = self.metrics
+        client.block_info(HB)
+        self.stub.call(self.stub.publish({"topic": "confirmation"}))
+        time.sleep(0.1)
+        client.close()
+        phases = ["request", "network", "decode", "block-validate"]
+        assert [m.count("block_info", p) for p in phases] == [1, 1, 1, 1]
+        assert m.count("confirmation", "decode") == 1
+
+
+class TestAsyncMetrics(StubCase, IsolatedAsyncioTestCase):
+    client: Callable[..., Any] = nanopy.rpc.AsyncHTTP
+    handler = staticmethod(cache_handler)
+
+    async def test_metrics(self) -> None:
+        self.rpc.metrics = m = nanopy.rpc.Metrics()
+        await self.rpc.block_info(HB)
+        await self.rpc.block_count()
+        for p in ("request", "network", "decode", "block-validate"):
+            assert m.count("block_info", p) == 1
+        assert m.count("block_count", "network") == 1
+
+
+class TestAsyncWSMetrics(TestAsyncMetrics):
+    client = nanopy.rpc.AsyncWS
+
+
+class TestLimiter(TestCase):
+    def test_bucket(self) -> None:
+        limiter = nanopy.rpc.Limiter(rate=50, burst=2)
+        t0 = time.perf_counter()
+        limiter.release(limiter.acquire("ledger"))
+        limiter.release(limiter.acquire("block_count"))
+        assert time.perf_counter() - t0 >= 0.015
+        limiter.weights = {}
+        assert nanopy.rpc.Limiter(weights={"ledger": 2.0}).weights == {"ledger": 2.0}
+        t0 = time.perf_counter()
+        limiter.release(limiter.acquire("ledger"))
+        assert 0.015 <= time.perf_counter() - t0 < 0.04
+        for rate in (0.0, -1.0, math.nan):
+            with self.assertRaisesRegex(ValueError, "rate must be positive"):
+                nanopy.rpc.Limiter(rate=rate, burst=5)
+
+    def test_concurrency(self) -> None:
+        limiter = nanopy.rpc.Limiter(limit=1, target=10)
+        started = limiter.acquire("x")
+        with concurrent.futures.ThreadPoolExecutor(1) as pool:
+            f = pool.submit(limiter.acquire, "x")
+            time.sleep(0.05)
+            assert not f.done() and limiter.waiting == 1
+            limiter.release(started)
+            limiter.release(f.result())
+        assert limiter.limit == 2.5 and limiter.in_flight == limiter.waiting == 0
+
+    def test_aimd(self) -> None:
+        limiter = nanopy.rpc.Limiter(limit=4, target=0.01)
+        limiter.min_limit = 1.5
+        started = [limiter.acquire("x") for _ in range(4)]
+        limiter.release(started[0], error=True)
+        limiter.release(started[1], error=True)
+        assert limiter.limit == 2
+        time.sleep(0.02)
+        limiter.release(started[2])
+        assert limiter.limit == 2
+        limiter.release(limiter.acquire("x"), error=True)
+        assert limiter.limit == 1.5 and limiter.in_flight == 1
+        limiter.limit = limiter.max_limit
+        limiter.release(limiter.acquire("x"))
+        assert limiter.limit == limiter.max_limit
+
+    def test_http(self) -> None:
+        stub = Stub(cache_handler)
+        client = nanopy.rpc.HTTP(f"http://127.0.0.1:{stub.start_thread()}", retries=0)
+        client.limiter = nanopy.rpc.Limiter(limit=2)
+        client.metrics = m = nanopy.rpc.Metrics()
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            list(pool.map(lambda _: client.block_count(), range(8)))
+        assert m.count("block_count", "throttle") == 8
+        assert m.gauges["limiter_limit"] == client.limiter.limit > 2
+        assert m.gauges["limiter_in_flight"] == m.gauges["limiter_waiting"] == 0
+        assert "nanopy_rpc_limiter_limit " in m.exposition()
+        stub.call(stub.stop())
+        limit = client.limiter.limit
+        client.url = "http://127.0.0.1:1"
+        with self.assertRaises(requests.ConnectionError):
+            client.block_count()
+        assert client.limiter.limit == limit / 2
+
+
+class TestAsyncLimiter(IsolatedAsyncioTestCase):
+    async def test_limiter(self) -> None:
+        stub = Stub(cache_handler)
+        port = await stub.start()
+        async with nanopy.rpc.AsyncHTTP(f"http://127.0.0.1:{port}") as client:
+            client.limiter = limiter = nanopy.rpc.Limiter(rate=100, burst=1, limit=1)
+            t0 = time.perf_counter()
+            await asyncio.gather(*(client.block_count() for _ in range(4)))
+            assert time.perf_counter() - t0 >= 0.03
+            assert limiter.in_flight == limiter.waiting == 0
+        await stub.stop()
+        async with nanopy.rpc.AsyncHTTP("http://127.0.0.1:1") as client:
+            client.limiter = limiter
+            with self.assertRaises(OSError):
+                await client.block_count()
+        assert limiter.in_flight == 0 and limiter.limit < 2
+
+    async def test_wake(self) -> None:
+        limiter = nanopy.rpc.Limiter(limit=1, target=10)
+        started = limiter.acquire("x")
+        t = [asyncio.create_task(limiter.aacquire("x")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert not t[0].done() and limiter.waiting == 2
+        t[1].cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await t[1]
+        assert limiter.waiting == 1
+        await asyncio.to_thread(limiter.release, started)
+        limiter.release(await asyncio.wait_for(t[0], 1))
+        assert limiter.in_flight == limiter.waiting == 0
+
+
+class TestPool(TestCase):
+    def setUp(self) -> None:
+        self.seen: list[list[str]] = [[], [], []]
+        self.delay = [0.0, 0.0, 0.0]
+        self.count = ["5000", "5000", "5000"]
+        self.down: set[int] = set()
+        self.stubs = [Stub(self.handler(i)) for i in range(3)]
+        self.urls = [f"http://127.0.0.1:{s.start_thread()}" for s in self.stubs]
+        self.pool = nanopy.rpc.Pool(self.urls)
+        self.pool.hedge_delay = 0.05
+
+    def tearDown(self) -> None:
+        self.pool.close()
+        for s in self.stubs:
+            s.call(s.stop())
+
+    def handler(self, i: int) -> Any:
+        async def handle(data: dict[str, Any]) -> Any:
+            self.seen[i].append(data["action"])
+            if i in self.down:
+                raise ConnectionResetError
+            await asyncio.sleep(self.delay[i])
+            if data["action"] == "block_count":
+                if self.count[i] == "error":
+                    return {"error": "Bootstrapping"}
+                return {"count": self.count[i], "unchecked": "0", "cemented": "0"}
+            return R[data["action"]][0]
+
+        return handle
+
+    def test_nodes(self) -> None:
+        with self.assertRaisesRegex(ValueError, "at least one node"):
+            nanopy.rpc.Pool([])
+        stub = Stub(ws_handler)
+        port = stub.start_thread()
+        pool = nanopy.rpc.Pool([f"ws://127.0.0.1:{port}", nanopy.rpc.HTTP()])
+        assert isinstance(pool.nodes[0].rpc, nanopy.rpc.WS)
+        assert pool.block_count() == R["block_count"][0]
+        pool.close()
+        stub.call(stub.stop())
+
+    def test_balance(self) -> None:
+        self.delay = [0.02, 0.0, 0.01]
+        self.pool.hedge = False
+        for _ in range(12):
+            assert self.pool.account_balance(PACC0) == R["account_balance"][0]
+        assert [len(s) for s in self.seen] == [1, 10, 1]
+        status = self.pool.status()
+        assert [s["healthy"] for s in status] == [True] * 3
+        assert status[0]["latency"] > status[1]["latency"]
+        assert [s["p95"] != s["p95"] for s in status] == [True] * 3
+
+    def test_hedge(self) -> None:
+        self.delay[0] = 1
+        t0 = time.perf_counter()
+        assert self.pool.block_count() == {
+            "count": "5000",
+            "unchecked": "0",
+            "cemented": "0",
+        }
+        assert time.perf_counter() - t0 < 0.5
+        assert self.pool.hedges == 1
+        assert [len(s) for s in self.seen] == [1, 1, 0]
+        self.delay[0] = 0
+        for _ in range(25):
+            self.pool.nodes[1].latency.append(0.001)
+        assert self.pool.nodes[1].p95(1) == 0.001
+
+    def test_failover(self) -> None:
+        self.delay = [0.0, 0.02, 0.0]
+        for _ in range(3):
+            assert self.pool.process(RB) == R["process"][0]
+        assert [len(s) for s in self.seen] == [3, 0, 0]
+        self.down.add(0)
+        assert self.pool.process(RB) == R["process"][0]
+        assert self.pool.process(RB) == R["process"][0]
+        assert [len(s) for s in self.seen] == [4, 2, 0]
+        assert self.pool.status()[0]["failures"] == 1
+        assert not self.pool.status()[0]["healthy"]
+        self.pool.nodes[0].down_until = 0
+        self.down.add(2)
+        assert self.pool.account_balance(PACC0) == R["account_balance"][0]
+        assert [len(s) for s in self.seen] == [5, 3, 1]
+        assert self.pool.status()[0]["failures"] == 2
+        self.down |= {1, 2}
+        with self.assertRaises(requests.ConnectionError):
+            self.pool.process(RB)
+        with self.assertRaises(requests.ConnectionError):
+            self.pool.account_balance(PACC0)
+
+    def test_check(self) -> None:
+        self.count = ["5000", "100", "error"]
+        self.pool.check_timeout = 0.5
+        status = self.pool.check()
+        assert [s["blocks"] for s in status] == [5000, 100, -1]
+        assert [s["healthy"] for s in status] == [True, False, False]
+        self.pool.max_lag = 10000
+        self.count = ["5000", "5000", "5000"]
+        self.delay[0] = 1
+        status = self.pool.check()
+        assert [s["blocks"] for s in status] == [-1, 5000, 5000]
+        assert [s["healthy"] for s in status] == [False, True, True]
+        self.delay[0] = 0
+        pool = nanopy.rpc.Pool(self.urls, interval=0.01)
+        time.sleep(0.2)
+        pool.close()
+        assert pool.status()[0]["blocks"] == 5000
+
+
+PAYEE = nanopy.Account(pk=O64)
+
+
+def payment(to: nanopy.Account, amount: int = 1) -> nanopy.StateBlock:
+    payer = nanopy.Account(sk=R64)
+    payer.state = (O64, 10, to)
+    return payer.send(to, amount, work=R16)
+
+
+def confirmation(b: nanopy.StateBlock) -> dict[str, Any]:
+    block = b.dict_ | {"link_as_account": nanopy.Account(pk=b.link).addr}
+    return {
+        "topic": "confirmation",
+        "message": {"account": b.acc.addr, "hash": b.hash_, "block": block},
+    }
+
+
+class TestSubscription(TestCase):
+    def setUp(self) -> None:
+        self.seen: list[Any] = []
+        self.stub = Stub(self.handler)
+        self.url = f"ws://127.0.0.1:{self.stub.start_thread()}"
+        self.sub = nanopy.rpc.Subscription(self.url, [PAYEE.addr], batch=2)
+
+    def tearDown(self) -> None:
+        self.sub.close()
+        self.stub.call(self.stub.stop())
+
+    def handler(self, data: dict[str, Any]) -> Any:
+        self.seen.append(data)
+        return {"ack": data["action"]}
+
+    def publish(self, *messages: Any) -> None:
+        for m in messages:
+            self.stub.call(self.stub.publish(m))
+
+    def test_iterate(self) -> None:
+        assert self.seen == [
+            {
+                "action": "subscribe",
+                "topic": "confirmation",
+                "options": {"accounts": [PAYEE.addr]},
+                "ack": True,
+            }
+        ]
+        send = payment(PAYEE)
+        other = payment(nanopy.Account(pk=Z64))
+        forged = copy.copy(send)
+        forged.bal = 0
+        self.publish(
+            {"topic": "telemetry"},
+            confirmation(other),
+            confirmation(send),
+            {"topic": "confirmation", "message": {"block": {}}},
+            confirmation(forged),
+            confirmation(send),
+        )
+        it = iter(self.sub)
+        assert [next(it), next(it)] == [send, send]
+        assert self.sub.invalid == 2
+        self.sub.verify = False
+        self.publish(confirmation(forged))
+        assert next(it) == forged
+        self.sub.close()
+        assert not list(it)
+
+    def test_update(self) -> None:
+        accounts = self.sub.accounts
+        self.sub.add([nanopy.Account(pk=Z64).addr])
+        self.sub.remove([PAYEE.addr])
+        assert self.sub.accounts == {nanopy.Account(pk=Z64).addr}
+        assert accounts == {PAYEE.addr}
+        assert [m["options"] for m in self.seen[1:]] == [
+            {"accounts_add": [nanopy.Account(pk=Z64).addr]},
+            {"accounts_del": [PAYEE.addr]},
+        ]
+        self.publish(confirmation(payment(PAYEE)))
+        other = payment(nanopy.Account(pk=Z64))
+        self.publish(confirmation(other))
+        assert next(iter(self.sub)) == other
+        with nanopy.rpc.Subscription(self.url) as sub:
+            assert "options" not in self.seen[-1]
+            with self.assertRaisesRegex(ValueError, "Every account"):
+                sub.add([PAYEE.addr])
+
+    def test_reconnect(self) -> None:
+        self.stub.call(self.stub.disconnect())
+        for _ in range(50):
+            time.sleep(0.1)
+            if len(self.seen) > 1:
+                break
+        assert self.sub.reconnects == 1
+        assert self.seen[-1] == {
+            "action": "subscribe",
+            "topic": "confirmation",
+            "options": {"accounts": [PAYEE.addr]},
+        }
+        send = payment(PAYEE)
+        self.publish(confirmation(send))
+        assert next(iter(self.sub)) == send
+        with patch.object(self.sub.ws, "post", side_effect=OSError):
+            self.sub._resubscribe()  # pylint: disable=protected-access
+        assert self.sub.reconnects == 2
+
+
+class TestAsyncSubscription(IsolatedAsyncioTestCase):
+    async def test_iterate(self) -> None:
+        stub = Stub(lambda data: {"ack": data["action"]})
+        url = f"ws://127.0.0.1:{stub.start_thread()}"
+        sub = nanopy.rpc.Subscription(url, [PAYEE.addr])
+        it = aiter(sub)
+        t = asyncio.ensure_future(anext(it))
+        await asyncio.sleep(0.05)
+        send = payment(PAYEE)
+        stub.call(stub.publish(confirmation(send)))
+        stub.call(stub.publish(confirmation(send)))
+        assert await t == send
+        assert await anext(it) == send
+        t = asyncio.ensure_future(anext(it))
+        await asyncio.sleep(0.05)
+        sub.close()
+        with self.assertRaises(StopAsyncIteration):
+            await t
+        with self.assertRaises(StopAsyncIteration):
+            await anext(aiter(sub))
+        stub.call(stub.stop())
+
+
+class TestTracker(StubCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.confirmed: set[str] = set()
+        self.blocks: dict[str, nanopy.StateBlock] = {}
+
+    def handler(self, data: dict[str, Any]) -> Any:
+        if data["action"] == "process":
+            if data["block"]["balance"] == "0":
+                return {"error": "Fork"}
+            b = nanopy.StateBlock.from_dict(data["block"])
+            self.blocks[b.hash_] = b
+            return {"hash": b.hash_}
+        if data["action"] == "blocks_info":
+            if "fail" in self.confirmed:
+                raise ConnectionResetError
+            info = {
+                h: {"confirmed": "true" if h in self.confirmed else "false"}
+                | {"contents": self.blocks[h].dict_}
+                for h in data["hashes"]
+            }
+            return {"blocks": info}
+        return {"ack": data["action"]}
+
+    def test_poll(self) -> None:
+        with nanopy.rpc.Tracker(self.rpc, poll=0.05) as t:
+            b = payment(PAYEE)
+            f = t.process(b)
+            assert t.track(b.hash_.upper()) is f
+            assert len(t) == 1
+            time.sleep(0.1)
+            assert not f.done()
+            self.confirmed.add(b.hash_)
+            assert f.result(1) == b.hash_
+            assert not t
+            time.sleep(0.1)
+            self.confirmed.add("fail")
+            g = t.process(payment(PAYEE, 2))
+            time.sleep(0.1)
+            assert not g.done()
+            with self.assertRaisesRegex(RuntimeError, "Fork"):
+                t.process(payment(PAYEE, 10)).result(1)
+            with self.assertRaisesRegex(TimeoutError, "not confirmed in time"):
+                t.track(O64, timeout=0.01).result(1)
+        assert g.cancelled()
+
+    def test_timeout(self) -> None:
+        with nanopy.rpc.Tracker(self.rpc, poll=10) as t:
+            time.sleep(0.05)
+            t0 = time.monotonic()
+            with self.assertRaisesRegex(TimeoutError, "not confirmed in time"):
+                t.track(O64, timeout=0.05).result(5)
+            assert time.monotonic() - t0 < 1
+
+    def test_subscription(self) -> None:
+        with nanopy.rpc.Tracker(self.rpc, f"ws://127.0.0.1:{self.port}", poll=10) as t:
+            b0, b1 = payment(PAYEE), payment(PAYEE, 2)
+            f = [t.process(b0), t.process(b1)]
+            f.append(t.process(payment(PAYEE, 3)))
+            other = payment(nanopy.Account(pk=Z64))
+            other.acc = nanopy.Account(pk=Z64)
+            t.track(other.hash_, other.acc.addr)
+            acks = [d for d in self.requests if d["action"] in ("subscribe", "update")]
+            assert [d.get("options") for d in acks] == [
+                {"accounts": [b0.acc.addr]},
+                {"accounts_add": [other.acc.addr]},
+            ]
+            for b in (b0, b1):
+                self.stub.call(self.stub.publish(confirmation(b)))
+            assert [g.result(1) for g in f[:2]] == [b0.hash_, b1.hash_]
+            assert len(t) == 2
+
+    def test_process_error(self) -> None:
+        with nanopy.rpc.Tracker(self.rpc) as t:
+            with patch.object(self.rpc, "process", side_effect=OSError):
+                with self.assertRaises(OSError):
+                    t.process(payment(PAYEE))
+            assert not t
+
+
+def chains(accounts: int, length: int) -> list[list[nanopy.StateBlock]]:
+    blocks = []
+    for i in range(1, accounts + 1):
+        a = nanopy.Account(sk=f"{i:064x}")
+        a.state = (O64, length, a)
+        blocks.append([a.send(PAYEE, 1, work=R16) for _ in range(length)])
+    return blocks
+
+
+class TestBroadcaster(StubCase):  # pylint: disable=too-many-instance-attributes
+    def setUp(self) -> None:
+        super().setUp()
+        self.errors: list[str] = []
+        self.dropped: set[str] = set()
+        self.ledger: dict[str, nanopy.StateBlock] = {}
+        self.frontiers: dict[str, str] = {}
+        self.chains = chains(3, 4)
+        self.blocks = [b for c in zip(*self.chains) for b in c]
+
+    def processed(self) -> list[Any]:
+        "process requests the stub received"
+        return [d for d in self.requests if d["action"] == "process"]
+
+    def handler(self, data: dict[str, Any]) -> Any:
+        if data["action"] == "blocks_info":
+            found = [h for h in data["hashes"] if h in self.ledger]
+            return {
+                "blocks": {
+                    h: {"confirmed": "false", "contents": self.ledger[h].dict_}
+                    for h in found
+                },
+                "blocks_not_found": [h for h in data["hashes"] if h not in found],
+            }
+        if data.get("async"):
+            asyncio.get_running_loop().call_later(0.05, self.apply, data)
+            return {"started": "1"}
+        error = self.apply(data)
+        h = nanopy.StateBlock.from_dict(data["block"]).hash_
+        return {"error": error} if error else {"hash": h}
+
+    def apply(self, data: dict[str, Any]) -> str:
+        block = data["block"]
+        b = nanopy.StateBlock.from_dict(block)
+        error = self.errors.pop(0) if self.errors else ""
+        if b.hash_ in self.ledger:
+            error = "Old block"
+        elif block["previous"] != self.frontiers.get(block["account"], O64):
+            error = "Gap previous block"
+        elif data.get("async") and b.hash_ in self.dropped:
+            error = "dropped"
+        if not error:
+            self.ledger[b.hash_] = b
+            self.frontiers[block["account"]] = b.hash_
+        return error
+
+    def broadcaster(self, **kwargs: Any) -> nanopy.rpc.Broadcaster:
+        b = nanopy.rpc.Broadcaster(self.rpc, **kwargs)
+        b.backoff = 0.001
+        return b
+
+    def test_run(self) -> None:
+        b = self.broadcaster(concurrency=2)
+        assert not b.run([])
+        assert not b.rate
+        assert not b.run(self.blocks)
+        assert len(self.processed()) == len(self.blocks) == b.processed
+        assert not b.retried
+        assert b.rate > 0
+        for c in self.chains:
+            assert self.frontiers[c[0].acc.addr] == c[-1].hash_
+        assert not b.run(self.blocks[:2])
+        assert b.processed == 2
+
+    def test_retry(self) -> None:
+        b = self.broadcaster()
+        self.errors = ["Gap source block", "Fork"]
+        assert not b.run(self.chains[0])
+        assert b.retried == 2
+        c = self.chains[1]
+        self.errors = ["Gap source block", "Gap source block"]
+        b.retries = 1
+        assert b.run(c) == {c[0].hash_: "Gap source block"} | {
+            x.hash_: f"Previous block {c[0].hash_} failed" for x in c[1:]
+        }
+        self.errors = ["Bad signature"]
+        assert list(b.run(c).values()) == ["Bad signature"] + 3 * [ANY]
+        assert b.retried == 0
+        with patch.object(self.rpc, "process", side_effect=OSError("down")):
+            assert b.run(c[:1]) == {c[0].hash_: "OSError('down')"}
+
+    def test_async(self) -> None:
+        b = self.broadcaster(async_=True)
+        b.settle = 0.5
+        self.dropped = {self.chains[0][1].hash_}
+        assert not b.run(self.blocks)
+        assert b.processed == len(self.blocks)
+        assert [d.get("async") for d in self.processed()] == [True] * 12 + [None] * 3
+        for c in self.chains:
+            assert self.frontiers[c[0].acc.addr] == c[-1].hash_
+        with patch.object(self.rpc, "blocks_info", side_effect=OSError):
+            assert not b.run(self.blocks)
+        assert b.processed == len(self.blocks)
+        with patch.object(self.rpc, "blocks_info", return_value={"error": "x"}):
+            assert not b.run(self.blocks)
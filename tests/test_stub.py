@@ -0,0 +1,317 @@
+# pylint: disable=missing-module-docstring,missing-class-docstring,missing-function-docstring
+import asyncio
+import json
+import time
+from typing import Any
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+import requests
+import websocket
+
+import nanopy.rpc
+from nanopy.stub import Node, Stub
+
+from . import O64, PACC0, R16, R64, Z64
+
+
+async def echo(data: dict[str, Any]) -> Any:
+    await asyncio.sleep(0)
+    return data
+
+
+class TestStub(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.stub = Stub(echo)
+        self.port = await self.stub.start()
+        self.url = f"ws://127.0.0.1:{self.port}"
+
+    async def asyncTearDown(self) -> None:
+        await self.stub.stop()
+
+    async def test_http(self) -> None:
+        self.stub.handler = lambda data: {"count": "1"} | data
+        async with nanopy.rpc.AsyncHTTP(f"http://127.0.0.1:{self.port}") as rpc:
+            for _ in range(2):
+                assert await rpc.request({"action": "x"}) == {
+                    "count": "1",
+                    "action": "x",
+                }
+        r, w = await asyncio.open_connection("127.0.0.1", self.port)
+        w.write(b"POST / HTTP/1.1\r\nContent-Length: 3\r\n\r\n{x}")
+        await r.readuntil(b"\r\n\r\n")
+        assert json.loads(await r.read(100)) == {"error": "Unable to parse JSON"}
+        w.write(b"POST / HTTP/1.1\r\nContent-Length: 10\r\n\r\n{}")
+        w.close()
+        assert not await r.read()
+
+    async def test_stop(self) -> None:
+        self.stub.handler = lambda _: asyncio.sleep(60)
+        ws = await asyncio.to_thread(websocket.create_connection, self.url)
+        await asyncio.to_thread(ws.send, json.dumps({"action": "x"}))
+        r, w = await asyncio.open_connection("127.0.0.1", self.port)
+        w.write(b"POST / HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}")
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(self.stub.stop(), 1)
+        assert not await r.read()
+        w.close()
+        await asyncio.to_thread(ws.close)
+
+    async def test_websocket(self) -> None:
+        ws = await asyncio.to_thread(websocket.create_connection, self.url)
+        for n in (1, 200, 70000):
+            m = {"id": "1", "x": "a" * n}
+            await asyncio.to_thread(ws.send, json.dumps(m))
+            assert json.loads(await asyncio.to_thread(ws.recv)) == m
+        await asyncio.to_thread(ws.send, "{x}")
+        reply = json.loads(await asyncio.to_thread(ws.recv))
+        assert reply == {"error": "Unable to parse JSON"}
+        await asyncio.to_thread(ws.send, json.dumps({"x": 1}))
+        await asyncio.to_thread(ws.ping, "p")
+        frame = websocket.ABNF(0, 0, 0, 0, websocket.ABNF.OPCODE_TEXT, 1, b'{"id"')
+        await asyncio.to_thread(ws.send_frame, frame)
+        frame = websocket.ABNF(0, 0, 0, 0, websocket.ABNF.OPCODE_PONG, 1, b"")
+        await asyncio.to_thread(ws.send_frame, frame)
+        frame = websocket.ABNF(1, 0, 0, 0, websocket.ABNF.OPCODE_CONT, 1, b': "2"}')
+        await asyncio.to_thread(ws.send_frame, frame)
+        replies = [await asyncio.to_thread(ws.recv_data, True) for _ in range(3)]
+        assert sorted(replies) == [
+            (websocket.ABNF.OPCODE_TEXT, b'{"id": "2"}'),
+            (websocket.ABNF.OPCODE_TEXT, b'{"x": 1}'),
+            (websocket.ABNF.OPCODE_PONG, b"p"),
+        ]
+        await self.stub.publish({"topic": "x"})
+        assert json.loads(await asyncio.to_thread(ws.recv)) == {"topic": "x"}
+        await asyncio.to_thread(ws.close)
+
+    async def test_unmasked(self) -> None:
+        r, w = await asyncio.open_connection("127.0.0.1", self.port)
+        w.write(
+            b"GET / HTTP/1.1\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n\r\n"
+        )
+        assert b"s3pPLMBiTxaQ9kYGzzhZRbK+xOo=" in await r.readuntil(b"\r\n\r\n")
+        w.write(b"\x81\x0c" + b'{"id": "3"}\n')
+        assert await r.readexactly(13) == b"\x81\x0b" + b'{"id": "3"}'
+        self.stub.handler = lambda _: asyncio.sleep(0.01, {})
+        w.write(b"\x81\x0c" + b'{"id": "4"}\n')
+        await asyncio.sleep(0)
+        await self.stub.disconnect()
+        await asyncio.sleep(0.02)
+        w.close()
+
+
+class TestNode(TestCase):  # pylint: disable=too-many-instance-attributes
+    def setUp(self) -> None:
+        self.node = Node(work=False)
+        port = self.node.start_thread()
+        self.rpc = nanopy.rpc.HTTP(f"http://127.0.0.1:{port}", retries=0)
+        self.url = f"ws://127.0.0.1:{port}"
+        self.g = self.node.genesis
+        self.supply = self.g.raw_bal
+        self.a = nanopy.Account(sk=R64)
+        self.a.state = (Z64, 0, self.a)
+
+    def tearDown(self) -> None:
+        self.node.call(self.node.stop())
+
+    def process(self, b: nanopy.StateBlock) -> Any:
+        return self.rpc.process(b.dict_)
+
+    def test_process(self) -> None:
+        g, a = self.g, self.a
+        s1 = g.send(a, 10, work=R16)
+        assert self.process(s1) == {"hash": s1.hash_.upper()}
+        assert self.process(s1) == {"error": "Old block"}
+        s2 = g.send(a, 1, work=R16)
+        s3 = g.send(a, 1, work=R16)
+        assert self.process(s3) == {"error": "Gap previous block"}
+        assert self.process(s2) == {"hash": s2.hash_.upper()}
+        g.state = (s1.hash_, self.supply - 10, g)
+        assert self.process(g.send(a, 2, work=R16)) == {"error": "Fork"}
+        g.state = (s2.hash_, self.supply - 11, g)
+        b = g.send(a, 1, work=R16)
+        b.sig = "0" * 128
+        assert self.process(b) == {"error": "Bad signature"}
+        g.state = (Z64, 0, g)
+        assert self.process(g.receive(O64, 1, work=R16)) == {"error": "Fork"}
+        assert self.process(a.change_rep(g, work=R16)) == {"error": "Block is invalid"}
+        a.state = (Z64, 0, a)
+        r1 = a.receive(s1.hash_, 10, work=R16)
+        assert self.process(r1) == {"hash": r1.hash_.upper()}
+        for h, amount, error in (
+            (s1.hash_, 10, "Unreceivable"),
+            (O64, 1, "Gap source block"),
+            (s2.hash_, 2, "Balance and amount delta do not match"),
+        ):
+            a.state = (r1.hash_, 10, a)
+            assert self.process(a.receive(h, amount, work=R16)) == {"error": error}
+        a.state = (r1.hash_, 10, a)
+        c = a.change_rep(g, work=R16)
+        assert self.process(c) == {"hash": c.hash_.upper()}
+        g.state = (s1.hash_, self.supply - 10, g)
+        data: dict[str, Any] = {
+            "action": "process",
+            "block": json.dumps(g.change_rep(g, work=R16).dict_),
+        }
+        assert self.rpc.request(data) == {"error": "Fork"}
+        data["block"] = {"type": "state"}
+        assert self.rpc.request(data) == {"error": "Block is invalid"}
+        assert self.rpc.process(s1.dict_, async_=True) == {"started": "1"}
+        s4 = a.send(g, 1, work=R16)
+        assert self.rpc.process(s4.dict_, async_=True) == {"started": "1"}
+        assert self.rpc.block_info(s4.hash_)["subtype"] == "send"
+        info = self.rpc.account_info(a.addr, representative=True, pending=True)
+        assert info["representative"] == g.addr
+        assert info["representative_block"] == c.hash_.upper()
+        assert info["open_block"] == r1.hash_.upper()
+        assert info["block_count"] == "3" and info["balance"] == "9"
+        assert info["receivable"] == "1"
+
+    def test_work(self) -> None:
+        network = nanopy.Account.network
+        nanopy.Account.set_network(
+            nanopy.Network(
+                send_difficulty="ff00000000000000",
+                receive_difficulty="fe00000000000000",
+            )
+        )
+        try:
+            self.node.work = True
+            b = self.g.send(self.a, 1)
+            assert self.process(b) == {"hash": b.hash_.upper()}
+            r = self.a.receive(b.hash_, 1, work=Z64[:16])
+            assert not r.work_validate("fe00000000000000")
+            assert self.process(r) == {"error": "Block work is insufficient"}
+            r.work_generate("fe00000000000000")
+            assert self.process(r) == {"hash": r.hash_.upper()}
+            v = self.rpc.work_validate(r.work, r.prev, "fe00000000000000")
+            assert v["valid_receive"] == v["valid"] == "1"
+            assert v["difficulty"] == r.difficulty
+        finally:
+            nanopy.Account.network = network
+
+    def test_queries(self) -> None:  # pylint: disable=too-many-statements
+        g, a, rpc = self.g, self.a, self.rpc
+        s = [g.send(a, i, work=R16) for i in (1, 2, 3)]
+        for b in s:
+            self.process(b)
+        r = a.receive(s[0].hash_, 1, work=R16)
+        self.process(r)
+        h = [b.hash_.upper() for b in s]
+        assert rpc.account_balance(a.addr) == {
+            "balance": "1",
+            "pending": "5",
+            "receivable": "5",
+        }
+        balances = rpc.accounts_balances([a.addr, PACC0])["balances"]
+        assert balances[PACC0]["balance"] == "0"
+        assert rpc.account_block_count(a.addr) == {"block_count": "1"}
+        assert rpc.account_block_count(PACC0) == {"error": "Account not found"}
+        assert rpc.account_info(PACC0) == {"error": "Account not found"}
+        assert rpc.account_representative(a.addr) == {"representative": a.addr}
+        assert rpc.account_representative(PACC0) == {"error": "Account not found"}
+        assert rpc.accounts_frontiers([a.addr, PACC0]) == {
+            "frontiers": {a.addr: r.hash_.upper()}
+        }
+        assert rpc.receivable(a.addr) == {"blocks": h[1:]}
+        assert rpc.receivable(a.addr, count=1) == {"blocks": h[1:2]}
+        assert rpc.receivable(a.addr, threshold=3) == {"blocks": {h[2]: "3"}}
+        assert rpc.receivable(a.addr, count=1, source=True) == {
+            "blocks": {h[1]: {"amount": "2", "source": g.addr}}
+        }
+        assert rpc.accounts_receivable([a.addr, PACC0], 5) == {
+            "blocks": {a.addr: h[1:]}
+        }
+        assert rpc.receivable_exists(h[1]) == {"exists": "1"}
+        assert rpc.receivable_exists(h[0]) == {"exists": "0"}
+        assert rpc.receivable_exists(r.hash_) == {"exists": "0"}
+        assert rpc.receivable_exists(O64) == {"error": "Block not found"}
+        assert rpc.block_account(h[0]) == {"account": g.addr}
+        assert rpc.block_account(O64) == {"error": "Block not found"}
+        assert rpc.block_count() == {"count": "5", "unchecked": "0", "cemented": "5"}
+        info = rpc.block_info(h[0])
+        assert info["successor"] == h[1] and info["height"] == "2"
+        assert info["amount"] == "1" and info["confirmed"] == "true"
+        assert rpc.block_info(O64) == {"error": "Block not found"}
+        assert rpc.blocks_info(h)["blocks"][h[0]] == info
+        assert rpc.blocks_info([O64]) == {"error": "Block not found"}
+        assert rpc.blocks_info([h[0], O64], include_not_found=True)[
+            "blocks_not_found"
+        ] == [O64]
+        assert rpc.blocks(h[:1]) == {"blocks": {h[0]: s[0].dict_}}
+        assert rpc.blocks([O64]) == {"error": "Block not found"}
+        assert rpc.work_validate(Z64[:16], O64)["valid_all"] == "0"
+        assert (
+            rpc.version()["network_identifier"]
+            == self.node.chains[g.addr].open_block.upper()
+        )
+        assert rpc.account_key(g.addr) == {"key": g.pk.upper()}
+        legacy = {"type": "open", "account": g.addr}
+        assert rpc.block_hash(legacy) == {"error": "Invalid request"}
+        assert rpc.request({"action": "x"}) == {"error": "Unknown command"}
+        assert rpc.request({"action": "block_info"}) == {"error": "Invalid request"}
+        assert self.node.requests["block_info"] == 3
+
+    def test_confirm(self) -> None:
+        self.node.confirmed = False
+        b = self.g.send(self.a, 1, work=R16)
+        self.process(b)
+        assert self.rpc.block_info(b.hash_)["confirmed"] == "false"
+        assert self.rpc.receivable(self.a.addr) == {"blocks": []}
+        assert self.rpc.receivable(self.a.addr, include_only_confirmed=False) == {
+            "blocks": [b.hash_.upper()]
+        }
+        assert self.node.call(self.node.confirm(b.hash_.upper()))
+        assert not self.node.call(self.node.confirm(b.hash_))
+        assert not self.node.call(self.node.confirm(O64))
+        assert self.rpc.block_count()["cemented"] == "2"
+
+    def test_injection(self) -> None:
+        self.node.latency = 0.05
+        t0 = time.perf_counter()
+        self.rpc.block_count()
+        assert time.perf_counter() - t0 >= 0.05
+        self.node.latency = 0
+        self.node.error_rate = 1
+        assert self.rpc.block_count() == {"error": "Injected error"}
+        self.node.error_rate = 0
+        self.node.drop_rate = 1
+        with self.assertRaises(requests.ConnectionError):
+            self.rpc.block_count()
+        ws = nanopy.rpc.WS(self.url, timeout=1)
+        with self.assertRaises(ConnectionError):
+            ws.block_count()
+        self.node.drop_rate = 0
+        ws.close()
+
+    def test_confirmations(self) -> None:
+        g, a = self.g, self.a
+        ws = nanopy.rpc.WS(self.url)
+        messages: list[Any] = []
+        ws.subscribers.append(messages.append)
+        sub = {"action": "subscribe", "topic": "confirmation", "ack": True}
+        assert (
+            ws.request(sub | {"options": {"accounts": [a.addr]}})["ack"] == "subscribe"
+        )
+        self.process(g.send(a, 1, work=R16))
+        self.process(g.send(g, 1, work=R16))
+        update = {"action": "update", "topic": "confirmation", "ack": True}
+        ws.request(update | {"options": {"accounts_add": [PACC0]}})
+        self.process(g.send(nanopy.Account(PACC0), 1, work=R16))
+        ws.request(update | {"options": {"accounts_del": [a.addr, PACC0]}})
+        self.process(g.send(a, 1, work=R16))
+        ws.post({"action": "unsubscribe", "topic": "confirmation", "ack": True})
+        self.process(g.send(a, 1, work=R16))
+        ws.request({"action": "subscribe", "topic": "votes", "ack": True})
+        ws.request(update)
+        ws.request(sub)
+        self.process(g.send(g, 2, work=R16))
+        ws.request({"action": "block_count"})
+        ws.close()
+        time.sleep(0.05)
+        self.process(g.send(g, 3, work=R16))
+        pushes = [m for m in messages if m.get("topic") == "confirmation"]
+        assert [m["message"]["amount"] for m in pushes] == ["1", "1", "2"]
+        assert pushes[0]["message"]["block"]["link_as_account"] == a.addr
+        assert pushes[0]["message"]["block"]["subtype"] == "send"
+        assert [m["ack"] for m in messages if "ack" in m] == ["unsubscribe"]